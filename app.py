@@ -7,6 +7,7 @@ Files required in GitHub repo:
   3. Online_Duty.xlsx     — online exam slots   (col A: Date | col B: FN/AN | col C: count)
   4. sastra_logo.png      — university logo (optional)
   5. Willingness.xlsx     — faculty willingness collected via this portal
+  (willingness.db is created on first run and holds portal submissions)
 
 Login credentials:
   Faculty portal : SASTRA / SASTRA
@@ -19,10 +20,17 @@ v2 improvements:
 """
 
 import os
+import json
+import time
+import uuid
+import signal
 import datetime
 import warnings
+import threading
+import traceback
 import calendar as calmod
 import urllib.parse
+import multiprocessing as mp
 from collections import defaultdict
 
 import numpy as np
@@ -30,41 +38,29 @@ import pandas as pd
 import streamlit as st
 import altair as alt
 
-try:
-    from ortools.sat.python import cp_model
-    ORTOOLS_OK = True
-except ImportError:
-    ORTOOLS_OK = False
-
-try:
-    from scipy.optimize import milp, LinearConstraint, Bounds
-    from scipy.sparse import csc_matrix
-    SCIPY_OK = True
-except ImportError:
-    SCIPY_OK = False
+from willingness_store import WillingnessStore
+from report_export import sidecar_path, PYARROW_OK
+from input_cache import source_key
+from log_sink import LogSink, read_tail, TAIL_LINES
+from presolve import analyze as presolve_check
+from duty_engine import DESIG_RULES, WILL_TAGS, EXACT_BACKENDS, FLOW_OK, BizCalendar
+from optimizer import (
+    FACULTY_FILE, OFFLINE_FILE, ONLINE_FILE, WILLINGNESS_FILE, WILLINGNESS_DB,
+    FINAL_ALLOC_FILE, ALLOC_REPORT_FILE, RUN_RECORD_FILE, ALLOC_SIDECAR,
+    EXACT_TIME_LIMIT, EXACT_WORKERS, MULTISTART_RUNS, MULTISTART_SEED,
+    LOCAL_SEARCH_SWEEPS, RunFiles, parse_dates, file_version,
+    duty_table, parse_duty_file, load_registry, read_willingness, load_holidays, incremental_ready, run_optimizer,
+)
 
 warnings.filterwarnings("ignore")
 
-# ─── File names ──────────────────────────────────────────────── #
-FACULTY_FILE      = "Faculty_Master.xlsx"
-OFFLINE_FILE      = "Offline_Duty.xlsx"
-ONLINE_FILE       = "Online_Duty.xlsx"
-WILLINGNESS_FILE  = "Willingness.xlsx"
+# ─── File names (optimizer inputs / outputs live in optimizer.py) ─ #
 LOGO_FILE         = "sastra_logo.png"
-FINAL_ALLOC_FILE  = "Final_Allocation.xlsx"
-ALLOC_REPORT_FILE = "Allocation_Report.xlsx"
 GATE_FILE         = "allotment_gate.txt"   # "1" = open, "0" = locked
+JOBS_DIR          = "optimizer_jobs"       # one sub-folder per background run
+RUN_FILES         = RunFiles()             # optimizer runs in the app folder
 
-# ─── Designation rules ───────────────────────────────────────── #
-DESIG_RULES = {
-    "P":   (1, 1, ["Online"]),
-    "ACP": (2, 2, ["Online", "Offline"]),
-    "SAP": (3, 3, ["Offline"]),
-    "AP3": (3, 3, ["Offline"]),
-    "AP2": (3, 3, ["Offline"]),
-    "TA":  (3, 3, ["Offline"]),
-    "RA":  (4, 4, ["Offline"]),
-}
+# ─── Designation labels (rules & scores live in duty_engine.py) ─ #
 DESIG_FULL = {
     "P":   "Professor",
     "ACP": "Associate Professor",
@@ -76,33 +72,6 @@ DESIG_FULL = {
 }
 DUTY_STRUCTURE = {"P": 3, "ACP": 5, "SAP": 7, "AP3": 7, "AP2": 7, "TA": 9, "RA": 9}
 
-# ── Willingness match scores ──────────────────────────────────── #
-W_EXACT      = 100_000   # exact date + session match
-W_ACP_ONLINE =  80_000   # ACP offline→online mapping
-W_FLIP       =  60_000   # same date, opposite session (FN↔AN)
-W_ADJ1       =  40_000   # ±1 business day adjacency
-W_VAL_ADJ    =   5_000   # adjacent to own valuation date
-W_NON_SUB    =     100   # no willingness submitted
-PENALTY      =      10   # submitted but slot outside window (discourage)
-
-# ── Designation priority (higher = preferred for slot filling) ── #
-# P > ACP > SAP = AP3 = AP2 >> TA = RA
-# TA and RA are last resort; senior faculty fill slots first
-DESIG_PRIORITY = {
-    "P":   6_000_000,
-    "ACP": 5_000_000,
-    "SAP": 4_000_000,
-    "AP3": 3_000_000,
-    "AP2": 2_000_000,
-    "TA":        0,    # TA/RA get no priority bonus — used as fill-in only
-    "RA":        0,
-}
-
-WILL_TAGS = {
-    "Willingness-Exact", "Willingness-ACPOnline",
-    "Willingness-SessionFlip", "Willingness-±1Day", "Willingness-ValAdj"
-}
-
 # ─── Page config ─────────────────────────────────────────────── #
 st.set_page_config(page_title="SASTRA Duty Portal", layout="wide")
 st.markdown("""
@@ -146,43 +115,43 @@ def set_gate(open_: bool):
 def clean(x):
     return str(x).strip().lower()
 
-def normalize_session(v):
-    t = str(v).strip().upper()
-    if t in {"FN", "FORENOON", "MORNING", "AM"}:
-        return "FN"
-    if t in {"AN", "AFTERNOON", "EVENING", "PM"}:
-        return "AN"
-    return t
-
 def fmt_day(val):
     dt = pd.to_datetime(val, dayfirst=True, errors="coerce")
     return f"{dt.strftime('%d-%m-%Y')} ({dt.strftime('%A')})" if pd.notna(dt) else str(val)
 
-def valuation_dates_for(row):
-    return sorted({
-        pd.to_datetime(row[c], dayfirst=True).date()
-        for c in ["V1", "V2", "V3", "V4", "V5"]
-        if c in row.index and pd.notna(row[c])
-    })
+class IndexedFrame:
+    """A read-only frame plus a clean(name) → row positions index.
 
-def qp_dates_for(row):
-    return sorted({
-        pd.to_datetime(row[c], dayfirst=True, errors="coerce").strftime("%d-%m-%Y")
-        for c in row.index
-        if "QP" in str(c).upper()
-        and "DATE" in str(c).upper()
-        and pd.notna(row[c])
-        and pd.notna(pd.to_datetime(row[c], dayfirst=True, errors="coerce"))
-    })
+    Every column whose header mentions "name" or "faculty" is indexed, so
+    willingness, allocation and report sheets share one lookup path. The
+    index is built on the first lookup; instances live in st.cache_resource,
+    so treat ``frame`` as read-only."""
+    __slots__ = ("frame", "_rows")
+
+    def __init__(self, frame):
+        self.frame = frame
+        self._rows = None
+
+    @property
+    def rows(self):
+        if self._rows is None:
+            cols  = [c for c in self.frame.columns
+                     if "name" in str(c).lower() or "faculty" in str(c).lower()]
+            parts = defaultdict(list)
+            for c in cols:
+                keys = self.frame[c].astype(str).map(clean)
+                for k, pos in keys.groupby(keys.to_numpy()).indices.items():
+                    parts[k].append(pos)
+            self._rows = {k: (v[0] if len(v) == 1 else np.unique(np.concatenate(v)))
+                          for k, v in parts.items()}
+        return self._rows
+
+    def __contains__(self, sel_clean):
+        return sel_clean in self.rows
+
+    def rows_for(self, sel_clean):
+        return self.frame.iloc[self.rows.get(sel_clean, [])]
 
-def fac_mask(df, sel_clean):
-    if df.empty:
-        return pd.Series([], dtype=bool)
-    cols = [c for c in df.columns if "name" in c.lower() or "faculty" in c.lower()]
-    mask = pd.Series([False] * len(df), index=df.index)
-    for c in cols:
-        mask = mask | (df[c].astype(str).apply(clean) == sel_clean)
-    return mask
 
 def wa_link(phone, msg):
     p = str(phone).strip().replace("+", "").replace(" ", "").replace("-", "")
@@ -227,144 +196,232 @@ def render_header(logo=True):
 
 
 # ═══════════════════════════════════════════════════════════════ #
-#               PARSE DUTY FILE (shared helper)                  #
+#                     DUTY SLOTS                                 #
 # ═══════════════════════════════════════════════════════════════ #
-def parse_duty_file(filepath, duty_type):
-    if not os.path.exists(filepath):
-        return []
-    try:
-        raw = pd.read_excel(filepath, header=None)
-    except Exception:
-        return []
-    try:
-        pd.to_datetime(raw.iloc[0, 0])
-        start = 0
-    except Exception:
-        start = 1
-    slots = []
-    for i in range(start, len(raw)):
-        row = raw.iloc[i]
-        d    = row.iloc[0]
-        sess = row.iloc[1] if len(row) > 1 else None
-        req  = row.iloc[2] if len(row) > 2 else 1
-        if pd.isna(d):
-            continue
-        sn = normalize_session(sess)
-        if sn not in ("FN", "AN"):
-            continue
-        try:
-            date = pd.to_datetime(d).date()
-        except Exception:
-            continue
-        try:
-            required = max(int(float(req)), 0)
-        except Exception:
-            required = 1
-        slots.append({"date": date, "session": sn, "required": required, "type": duty_type})
-    return slots
-
 @st.cache_data
 def load_slots(off_path, on_path):
-    def to_df(slots):
-        if not slots:
-            df = pd.DataFrame(columns=["Date", "Session", "Required"])
-            df["Date"] = pd.to_datetime(df["Date"])
-            return df
-        df = pd.DataFrame(slots)
-        df["Date"]     = pd.to_datetime(df["date"], errors="coerce")
-        df["Session"]  = df["session"]
-        df["Required"] = df["required"].astype(int)
-        return df[["Date", "Session", "Required"]]
-    return to_df(parse_duty_file(off_path, "Offline")), to_df(parse_duty_file(on_path, "Online"))
+    def to_df(arr):
+        return pd.DataFrame({"Date":     pd.to_datetime(arr["date"]),
+                             "Session":  arr["session"].astype(object),
+                             "Required": arr["required"].astype(int)})
+    return to_df(duty_table(off_path)[0]), to_df(duty_table(on_path)[0])
+
+
+# ═══════════════════════════════════════════════════════════════ #
+#                     FACULTY REGISTRY                           #
+# ═══════════════════════════════════════════════════════════════ #
+@st.cache_resource(max_entries=2)
+def _faculty_registry(version):
+    return load_registry(version[0])
+
+def faculty_registry():
+    """Faculty_Master parsed once per file version (path, mtime, size)."""
+    return _faculty_registry(file_version(FACULTY_FILE))
+
+
+@st.cache_resource(max_entries=4)
+def _biz_calendar(version, start, end):
+    return BizCalendar(start, end, load_holidays(RUN_FILES.holidays))
+
+def biz_calendar(start, end):
+    """Weekends + Holidays.xlsx over [start, end], rebuilt when the file changes."""
+    path = RUN_FILES.holidays
+    return _biz_calendar(file_version(path) if os.path.exists(path) else None, start, end)
 
 
 # ═══════════════════════════════════════════════════════════════ #
 #               WILLINGNESS FILE FUNCTIONS                       #
 # ═══════════════════════════════════════════════════════════════ #
-def load_willingness():
-    # Priority: admin-uploaded file in session state → file on disk
+def willingness_source():
+    """(cache key, source) — admin upload wins over the file on disk."""
     uploaded_bytes = st.session_state.get("uploaded_willingness_bytes", None)
-    source = None
     if uploaded_bytes is not None:
-        try:
-            import io
-            source = io.BytesIO(uploaded_bytes)
-        except Exception:
-            source = None
-    if source is None:
-        if not os.path.exists(WILLINGNESS_FILE):
-            return pd.DataFrame(columns=["Faculty", "Date", "Session", "FacultyClean"])
-        source = WILLINGNESS_FILE
+        key = st.session_state.get("uploaded_willingness_key") or source_key(data=uploaded_bytes)
+        return key, uploaded_bytes
+    if not os.path.exists(WILLINGNESS_FILE):
+        return None, None
+    return source_key(WILLINGNESS_FILE), WILLINGNESS_FILE
 
-    try:
-        xl = pd.ExcelFile(source)
-        df = None
-        for sh in xl.sheet_names:
-            c = xl.parse(sh)
-            c.columns = c.columns.str.strip()
-            if {"Faculty", "Date", "Session"}.issubset(set(c.columns)):
-                df = c[["Faculty", "Date", "Session"]].copy()
-                break
-        if df is None:
-            c = xl.parse(xl.sheet_names[0])
-            c.columns = c.columns.str.strip()
-            if len(c.columns) >= 3:
-                c = c.rename(columns={c.columns[0]: "Faculty", c.columns[1]: "Date", c.columns[2]: "Session"})
-                df = c[["Faculty", "Date", "Session"]].copy()
-            else:
-                df = pd.DataFrame(columns=["Faculty", "Date", "Session"])
-    except Exception:
-        df = pd.DataFrame(columns=["Faculty", "Date", "Session"])
+@st.cache_resource(max_entries=4)
+def _parse_willingness(source_key, _source):
+    return IndexedFrame(read_willingness(source_key, _source))
+
+_EMPTY_WILLINGNESS = IndexedFrame(
+    pd.DataFrame(columns=["Faculty", "Date", "Session", "FacultyClean"]))
+
+def load_willingness_data():
+    key, source = willingness_source()
+    return _EMPTY_WILLINGNESS if key is None else _parse_willingness(key, source)
+
+def load_willingness():
+    return load_willingness_data().frame
+
+@st.cache_resource
+def willingness_store():
+    return WillingnessStore(WILLINGNESS_DB)
+
+@st.cache_data(max_entries=4)
+def _submitted_frame(revision):
+    # Keyed on the store revision — re-read only after a write
+    return willingness_store().frame()
 
-    df["Faculty"]      = df["Faculty"].astype(str).str.strip()
-    df["Date"]         = df["Date"].astype(str).str.strip()
-    df["Session"]      = df["Session"].astype(str).str.strip().str.upper()
-    df["FacultyClean"] = df["Faculty"].apply(clean)
-    return df.dropna(subset=["Faculty"]).reset_index(drop=True)
+def submitted_willingness():
+    return _submitted_frame(willingness_store().revision())
 
 def get_all_willingness():
     committed = load_willingness().drop(columns=["FacultyClean"], errors="ignore")
-    pending   = st.session_state.get(
-        "pending_submissions", pd.DataFrame(columns=["Faculty", "Date", "Session"]))
+    pending   = submitted_willingness()
     combined  = pd.concat([committed, pending], ignore_index=True)
     combined  = combined.drop_duplicates(subset=["Faculty", "Date", "Session"])
     combined["FacultyClean"] = combined["Faculty"].apply(clean)
     return combined
 
 def save_submission(faculty_name, slots):
-    new_rows = pd.DataFrame([
-        {"Faculty": faculty_name,
-         "Date": item["Date"].strftime("%d-%m-%Y"),
-         "Session": item["Session"]}
-        for item in slots
-    ])
-    if "pending_submissions" not in st.session_state:
-        st.session_state.pending_submissions = pd.DataFrame(columns=["Faculty", "Date", "Session"])
-    st.session_state.pending_submissions = pd.concat(
-        [st.session_state.pending_submissions, new_rows], ignore_index=True)
+    rec = faculty_registry().get(clean(faculty_name))
+    willingness_store().upsert(
+        faculty_name, [(item["Date"], item["Session"]) for item in slots],
+        duty_type=rec.submit_type if rec is not None else "Offline")
 
 
 # ═══════════════════════════════════════════════════════════════ #
-#        FEATURE 1 — SLOT PROBABILITY INDICATOR                  #
+#                  ALLOCATION OUTPUT FILES                       #
 # ═══════════════════════════════════════════════════════════════ #
-def slot_probability(all_will_df, duty_df, date_val, session_val):
-    seats = 0
-    if not duty_df.empty:
-        m = duty_df[
-            (duty_df["Date"].dt.date == date_val) &
-            (duty_df["Session"].str.upper() == session_val.upper())
-        ]
-        if not m.empty:
-            seats = int(m["Required"].sum())
-
-    applicants = 0
-    if not all_will_df.empty and "Date" in all_will_df.columns:
-        norm = pd.to_datetime(all_will_df["Date"], dayfirst=True, errors="coerce")
-        applicants = int((
-            (norm.dt.date == date_val) &
-            (all_will_df["Session"].str.upper() == session_val.upper())
-        ).sum())
+@st.cache_resource(max_entries=2)
+def _read_allocation(version):
+    return IndexedFrame(pd.read_excel(version[0]))
+
+@st.cache_resource(max_entries=2)
+def _read_report(version):
+    xl = pd.ExcelFile(version[0])
+    return {sh: IndexedFrame(xl.parse(sh)) for sh in xl.sheet_names}
+
+def load_allocation():
+    if not os.path.exists(FINAL_ALLOC_FILE):
+        return IndexedFrame(pd.DataFrame())
+    return _read_allocation(file_version(FINAL_ALLOC_FILE))
+
+def load_report():
+    if not os.path.exists(ALLOC_REPORT_FILE):
+        return {}
+    return _read_report(file_version(ALLOC_REPORT_FILE))
+
+def load_run_record():
+    try:
+        with open(RUN_RECORD_FILE) as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+def render_run_record(rec):
+    """Stage timings / memory of the last optimizer run (View Results tab)."""
+    with st.expander(f"⏱ Run profile — {rec.get('finished', '?')} · {rec.get('method', rec.get('solver', ''))}"):
+        r1, r2, r3, r4 = st.columns(4)
+        r1.metric("Wall time", f"{rec.get('wall_s', 0):.2f} s")
+        r2.metric("CPU time",  f"{rec.get('cpu_s', 0):.2f} s")
+        r3.metric("Peak memory", f"{rec['peak_rss_mb']:.0f} MB" if rec.get("peak_rss_mb") else "n/a")
+        r4.metric("Seats / gaps", f"{rec.get('seats', '?')} / {rec.get('gaps', '?')}")
+        stages = pd.DataFrame(rec.get("stages", []))
+        if stages.empty:
+            return
+        chart = alt.Chart(stages).mark_bar().encode(
+            x=alt.X("wall_s:Q", title="Wall time (s)"),
+            y=alt.Y("stage:N", sort=None, title=None),
+            tooltip=list(stages.columns))
+        st.altair_chart(chart, use_container_width=True)
+        st.dataframe(stages, use_container_width=True, hide_index=True)
+        st.download_button("⬇ Run record (JSON)", data=json.dumps(rec, indent=1),
+                           file_name=RUN_RECORD_FILE, mime="application/json")
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def _presolve(versions):
+    reg   = _faculty_registry(versions[0])
+    slots = parse_duty_file(OFFLINE_FILE, "Offline") + parse_duty_file(ONLINE_FILE, "Online")
+    return presolve_check([r.name for r in reg.records], reg.fac_d, slots, reg.val_dates)
+
+def render_presolve():
+    """Supply vs demand for the current inputs, shown above the Run button."""
+    versions = tuple(file_version(p) if os.path.exists(p) else None
+                     for p in (FACULTY_FILE, OFFLINE_FILE, ONLINE_FILE))
+    rep   = _presolve(versions)
+    dates = rep["by_date"][rep["by_date"]["Short"] > 0]
+    types = rep["by_type"]
+    lost  = int(types["Short"].sum())
+    ok    = rep["short"] == 0 and lost == 0
+    title = "all seats fillable under the full rules" if ok else \
+            f"{rep['short']} seat(s) provably short under the full rules"
+    with st.expander(f"{'✅' if ok else '⚠'} Pre-solve check — {rep['seats']} seats, {title}",
+                     expanded=not ok):
+        p1, p2, p3 = st.columns(3)
+        p1.metric("Seats", rep["seats"])
+        p2.metric("Fillable (full rules)",
+                  "n/a" if rep["fill_bound"] is None else f"≤ {rep['fill_bound']}")
+        p3.metric("Unfillable (any relaxation)", lost)
+        if not dates.empty:
+            st.markdown("**Short dates** — not enough free faculty of the right designation "
+                        "on the day (valuation dates, Saturdays → TA/RA, Online → P/ACP). "
+                        "The Slot Completion Pass may still recover some by relaxing rules.")
+            st.dataframe(dates.assign(Date=pd.to_datetime(dates["Date"]).dt.strftime("%d-%m-%Y (%a)")),
+                         use_container_width=True, hide_index=True)
+        st.dataframe(types.rename(columns={"Capacity": "Duty capacity"}),
+                     use_container_width=True, hide_index=True)
+        st.caption(f"Computed in {rep['ms']:.0f} ms from Faculty_Master and the duty files.")
 
+# ═══════════════════════════════════════════════════════════════ #
+#        FEATURE 1 — SLOT PROBABILITY INDICATOR                  #
+# ═══════════════════════════════════════════════════════════════ #
+@st.cache_resource(max_entries=2)
+def _seat_table(off_path, on_path):
+    seats = defaultdict(int)
+    for tp, df in zip(("Offline", "Online"), load_slots(off_path, on_path)):
+        if df.empty:
+            continue
+        g = df.assign(D=df["Date"].dt.date, S=df["Session"].str.upper()
+                      ).groupby(["D", "S"])["Required"].sum()
+        for (d, sess), n in g.items():
+            seats[(d, sess, tp)] += int(n)
+    return dict(seats)
+
+@st.cache_resource(max_entries=4)
+def _committed_demand(will_key, fac_key, _frame, _reg):
+    if _frame.empty:
+        return {}
+    tp = _frame["FacultyClean"].map(
+        {c: r.submit_type for c, r in _reg.by_clean.items()}).fillna("Offline")
+    d  = parse_dates(_frame["Date"]).dt.date
+    g  = pd.DataFrame({"D": d, "S": _frame["Session"], "T": tp}).dropna().value_counts()
+    return {k: int(n) for k, n in g.items()}
+
+@st.cache_data(max_entries=4)
+def _submitted_demand(revision):
+    return willingness_store().demand()
+
+class SlotDemand:
+    """Seats and applicants per (date, session, type) — every lookup is a dict get.
+
+    Applicants = committed willingness workbook + portal submissions; the
+    latter is the store's slot_demand table, maintained on each upsert."""
+    __slots__ = ("seats", "committed", "submitted")
+
+    def __init__(self, seats, committed, submitted):
+        self.seats, self.committed, self.submitted = seats, committed, submitted
+
+    def applicants(self, key):
+        return self.committed.get(key, 0) + self.submitted.get(key, 0)
+
+    def probability(self, date_val, session_val, duty_type):
+        key = (date_val, session_val.upper(), duty_type)
+        return slot_probability(self.seats.get(key, 0), self.applicants(key))
+
+def slot_demand():
+    wkey, _ = willingness_source()
+    return SlotDemand(
+        _seat_table(OFFLINE_FILE, ONLINE_FILE),
+        _committed_demand(wkey, file_version(FACULTY_FILE),
+                          load_willingness(), faculty_registry()),
+        _submitted_demand(willingness_store().revision()))
+
+def slot_probability(seats, applicants):
     if seats == 0:
         prob, label, colour = 0.0, "No slot on this day", "#94a3b8"
     elif applicants == 0:
@@ -407,7 +464,7 @@ def render_prob_bar(info: dict, session_label: str):
 # ═══════════════════════════════════════════════════════════════ #
 #        DEVIATION ANALYSIS  (admin-only helper)                 #
 # ═══════════════════════════════════════════════════════════════ #
-def classify_duty(alloc_by: str, duty_date, duty_sess: str, will_set: set):
+def classify_duty(alloc_by: str, duty_date, duty_sess: str, will_set: set, cal=None):
     ab = str(alloc_by).strip()
 
     if ab == "Willingness-Exact":
@@ -427,10 +484,10 @@ def classify_duty(alloc_by: str, duty_date, duty_sess: str, will_set: set):
     if ab == "Willingness-±1Day":
         closest = ""
         for direction in [1, -1]:
-            adj = duty_date + datetime.timedelta(days=direction)
+            adj = (cal or biz_calendar(duty_date, duty_date)).shift_date(duty_date, direction)
             for s in ["FN", "AN"]:
                 if (adj, s) in will_set:
-                    direction_lbl = "after" if direction > 0 else "before"
+                    direction_lbl = "before" if direction > 0 else "after"
                     closest = (f"You submitted {adj.strftime('%d-%m-%Y')} {s} "
                                f"→ duty shifted 1 working day {direction_lbl} "
                                f"to {duty_date.strftime('%d-%m-%Y')} {duty_sess}")
@@ -460,6 +517,8 @@ def render_deviation_section(allot_rows: pd.DataFrame, will_set: set):
         st.info("No allotment data found for this faculty yet.")
         return "Not available", []
 
+    days = pd.to_datetime(allot_rows["Date"], dayfirst=True, errors="coerce").dropna()
+    cal  = biz_calendar(days.min().date(), days.max().date()) if len(days) else None
     duty_rows = []
     for _, ar in allot_rows.iterrows():
         norm = pd.to_datetime(ar["Date"], dayfirst=True, errors="coerce")
@@ -469,7 +528,7 @@ def render_deviation_section(allot_rows: pd.DataFrame, will_set: set):
         dtype    = str(ar.get("Type", "")).strip()
         alloc_by = str(ar.get("Allocated_By", "")).strip()
         status, emoji, detail, is_matched = classify_duty(
-            alloc_by, norm.date(), sess, will_set)
+            alloc_by, norm.date(), sess, will_set, cal)
         duty_rows.append({
             "norm_date":  norm.date(),
             "sess":       sess,
@@ -795,500 +854,179 @@ def render_calendar(duty_df, val_dates, title):
 
 
 # ═══════════════════════════════════════════════════════════════ #
-#           OR-Tools CP-SAT OPTIMIZER  (v5)                      #
+#              BACKGROUND OPTIMIZER JOBS                         #
 # ═══════════════════════════════════════════════════════════════ #
-def run_optimizer(log_box):
-    log_lines = []
-    def log(m=""):
-        log_lines.append(m)
-        log_box.code("\n".join(log_lines), language="text")
-
-    log("=" * 62)
-    log("  SASTRA SoME Duty Optimizer  (OR-Tools CP-SAT  –  v5)")
-    log("  Slot-fill guaranteed | val-safe | session-flip |")
-    log("  ±1 biz-day adj | Sat→TA/RA | seniority | ACP 1+1")
-    log("=" * 62)
-
-    if not ORTOOLS_OK:
-        raise RuntimeError(
-            "OR-Tools not installed. Add 'ortools' to requirements.txt and redeploy.")
-
-    # ── Load faculty ─────────────────────────────────────────────
-    fr = pd.read_excel(FACULTY_FILE)
-    fr.columns = fr.columns.str.strip()
-    col_names  = fr.columns.tolist()
-    if len(col_names) < 2:
-        raise RuntimeError("Faculty_Master.xlsx must have at least 2 columns.")
-    fr.rename(columns={col_names[0]: "Name", col_names[1]: "Designation"}, inplace=True)
-    fr = fr.dropna(subset=["Name"]).reset_index(drop=True)
-    fr["Name"]        = fr["Name"].astype(str).str.strip()
-    fr["Designation"] = fr["Designation"].astype(str).str.strip().str.upper()
-
-    ALL_FAC = fr["Name"].tolist()
-    FAC_IDX = {n: i for i, n in enumerate(ALL_FAC)}
-    N_FAC   = len(ALL_FAC)
-    fac_d   = {row["Name"]: (row["Designation"] if row["Designation"] in DESIG_RULES else "TA")
-               for _, row in fr.iterrows()}
-    dgroups = defaultdict(list)
-    for n, d in fac_d.items():
-        dgroups[d].append(n)
-    log(f"\n  Faculty loaded     : {N_FAC}")
-
-    # ── Per-faculty valuation dates ──────────────────────────────
-    fac_val_dates = {}
-    for _, frow in fr.iterrows():
-        fname  = frow["Name"]
-        vdates = set()
-        for c in ["V1", "V2", "V3", "V4", "V5"]:
-            if c in frow.index and pd.notna(frow[c]):
-                try:
-                    vdates.add(pd.to_datetime(frow[c], dayfirst=True).date())
-                except Exception:
-                    pass
-        fac_val_dates[fname] = vdates
-    log(f"  Valuation dates    : {sum(1 for v in fac_val_dates.values() if v)} faculty")
-
-    # ── Load willingness ─────────────────────────────────────────
-    wdf = get_all_willingness().drop(columns=["FacultyClean"], errors="ignore")
-    if not wdf.empty:
-        wdf["Date"]    = pd.to_datetime(wdf["Date"], dayfirst=True, errors="coerce")
-        wdf["Session"] = wdf["Session"].astype(str).str.strip().str.upper()
-        wdf = wdf.dropna(subset=["Date"])
-    submitted  = set(wdf["Faculty"].str.strip().unique()) if not wdf.empty else set()
-    non_sub    = [n for n in ALL_FAC if n not in submitted]
-
-    # Count how many willingness dates each faculty submitted vs required
-    sub_counts = {}
-    if not wdf.empty:
-        for n, grp in wdf.groupby("Faculty"):
-            sub_counts[n.strip()] = len(grp)
-
-    under_sub = []   # submitted but fewer dates than required
-    for n in submitted:
-        required = DESIG_RULES.get(fac_d.get(n, "TA"), (0,0))[0]
-        given    = sub_counts.get(n, 0)
-        if given < required:
-            under_sub.append((n, given, required))
-
-    log(f"  Willingness loaded : {len(submitted)} submitted | {len(non_sub)} not submitted")
-    if under_sub:
-        log(f"  ⚠ Under-submitted  : {len(under_sub)} faculty submitted fewer dates than required:")
-        for n, given, req in sorted(under_sub, key=lambda x: x[0]):
-            log(f"      {n}  →  submitted {given} / required {req}")
-    if non_sub:
-        log(f"  ⚠ No submission    : {len(non_sub)} faculty — will be auto-assigned:")
-        for n in non_sub:
-            log(f"      {n}")
-
-    log("")
-    for fp, lbl in [(OFFLINE_FILE, "Offline"), (ONLINE_FILE, "Online")]:
-        log(f"  {lbl:8} : {'✓ found' if os.path.exists(fp) else '✗ MISSING — ' + fp}")
-
-    # ── Load slots ───────────────────────────────────────────────
-    s_off = parse_duty_file(OFFLINE_FILE, "Offline")
-    s_on  = parse_duty_file(ONLINE_FILE,  "Online")
-    ALL_S = s_off + s_on
-    NS    = len(ALL_S)
-    if NS == 0:
-        raise RuntimeError("No exam slots found. Check Offline_Duty.xlsx / Online_Duty.xlsx.")
-    log(f"  Slots parsed       : {NS}  ({len(s_off)} offline + {len(s_on)} online)")
-    log(f"  Total seats needed : {sum(s['required'] for s in ALL_S)}")
-
-    SAT_DESIG  = {"TA", "RA"}
-    slot_dates = {s["date"] for s in ALL_S}
-
-    def is_weekend(d): return d.weekday() >= 5
-
-    def next_biz_day(d, steps):
-        """Walk |steps| business days; steps>0 = forward, steps<0 = back."""
-        step = 1 if steps > 0 else -1
-        cur  = d
-        cnt  = 0
-        while cnt < abs(steps):
-            cur += datetime.timedelta(days=step)
-            if not is_weekend(cur):
-                cnt += 1
-        return cur
-
-    # ── Score matrix ─────────────────────────────────────────────
-    # fexp[faculty_name][(date, session, type)] = preference score (integer)
-    # Higher = solver more motivated to assign this pair
-    fexp         = defaultdict(dict)
-    fac_will_set = defaultdict(set)   # for classify_duty / deviation report
-
-    def set_score(d, k, val):
-        d[k] = max(d.get(k, 0), val)
-
-    for _, row in wdf.iterrows():
-        n = str(row.get("Faculty", "")).strip()
-        if n not in FAC_IDX:
-            continue
-        dt2     = row["Date"].date()
-        sess    = str(row["Session"]).strip().upper()
-        opp     = "AN" if sess == "FN" else "FN"
-        allowed = DESIG_RULES[fac_d.get(n, "TA")][2]
-        fac_will_set[n].add((dt2, sess))
-
-        # Exact date + session
-        for tp in allowed:
-            set_score(fexp[n], (dt2, sess, tp), W_EXACT)
-
-        # ACP: submitted offline date → also usable for online slot
-        if fac_d.get(n) == "ACP":
-            for s2 in ["FN", "AN"]:
-                set_score(fexp[n], (dt2, s2, "Online"), W_ACP_ONLINE)
-
-        # Session flip: same date, opposite session
-        for tp in allowed:
-            set_score(fexp[n], (dt2, opp, tp), W_FLIP)
-
-        # ±1 business day (only if an exam slot exists on that date)
-        for direction in [+1, -1]:
-            adj = next_biz_day(dt2, direction)
-            if adj not in slot_dates:
-                continue
-            for s2 in ["FN", "AN"]:
-                for tp in allowed:
-                    set_score(fexp[n], (adj, s2, tp), W_ADJ1)
-
-    # Valuation-adjacent bonus: day before/after each val date
-    for n in ALL_FAC:
-        allowed = DESIG_RULES[fac_d.get(n, "TA")][2]
-        for vd in fac_val_dates.get(n, set()):
-            for direction in [+1, -1]:
-                adj = next_biz_day(vd, direction)
-                if adj not in slot_dates:
-                    continue
-                for s2 in ["FN", "AN"]:
-                    for tp in allowed:
-                        k = (adj, s2, tp)
-                        if fexp[n].get(k, 0) < W_VAL_ADJ:
-                            set_score(fexp[n], k, W_VAL_ADJ)
-
-    # Non-submitted faculty: baseline score so they can fill any eligible slot
-    for n in non_sub:
-        allowed = DESIG_RULES[fac_d.get(n, "TA")][2]
-        for s in ALL_S:
-            if s["type"] in allowed:
-                set_score(fexp[n], (s["date"], s["session"], s["type"]), W_NON_SUB)
-
-    log(f"  Preference window  : exact + flip + ±1 biz-day (exam dates only)")
-
-    # ── Solve ────────────────────────────────────────────────────
-    # ── Solve: greedy-first, CP-SAT optional ─────────────────────
-    # On Streamlit free tier, CP-SAT with many variables can exceed
-    # CPU limits. We run greedy first (instant), then the mandatory
-    # slot completion pass guarantees all seats are filled.
-    # CP-SAT is skipped to stay within resource limits.
-    log(f"\n  Solver: Greedy + Slot Completion Pass (resource-safe mode)")
-    status      = None
-    status_name = "Greedy"
-
-    # ── Tag helper ───────────────────────────────────────────────
-    def tag(fn, k, sc):
-        if fn in non_sub:        return "Auto-Assigned"
-        if sc >= W_EXACT:        return "Willingness-Exact"
-        if sc >= W_ACP_ONLINE:   return "Willingness-ACPOnline"
-        if sc >= W_FLIP:         return "Willingness-SessionFlip"
-        if sc >= W_ADJ1:         return "Willingness-±1Day"
-        if sc >= W_VAL_ADJ:      return "Willingness-ValAdj"
-        return "OR-Assigned"
-
-    # ── Extract assignments — always greedy ──────────────────────
-    assigned = []
-    method   = "Greedy + Slot Completion"
-
-    if False:  # CP-SAT path disabled for Streamlit Cloud resource limits
-        pass
-    else:
-        # ── Greedy solver ─────────────────────────────────────────
-        log("  Running greedy solver (seniority + willingness priority)...")
-        alloc_count    = defaultdict(int)
-        used_dates     = defaultdict(set)
-        acp_type_count = defaultdict(lambda: {"Online": 0, "Offline": 0})
-
-        def remaining(n):
-            return DESIG_RULES[fac_d[n]][0] - alloc_count[n]
-
-        def ok(n, dt_, tp_):
-            desig_ = fac_d[n]
-            if tp_ not in DESIG_RULES[desig_][2]:                    return False
-            if dt_ in fac_val_dates.get(n, set()):                   return False
-            if dt_ in used_dates[n]:                                  return False
-            if remaining(n) <= 0:                                     return False
-            if dt_.weekday() == 5 and desig_ not in SAT_DESIG:       return False
-            if desig_ == "ACP":
-                if tp_ == "Online"  and acp_type_count[n]["Online"]  >= acp_online_limit.get(n, 1):  return False
-                if tp_ == "Offline" and acp_type_count[n]["Offline"] >= acp_offline_limit.get(n, 1): return False
-            return True
-
-        # Pass 1: fill slots largest-first, honouring willingness + seniority
-        for sl in sorted(ALL_S, key=lambda s: -s["required"]):
-            d2, s2, r2, t2 = sl["date"], sl["session"], sl["required"], sl["type"]
-            k     = (d2, s2, t2)
-            cands = sorted(
-                [(n, fexp[n].get(k, 0)) for n in ALL_FAC if ok(n, d2, t2)],
-                key=lambda z: (
-                    -DESIG_PRIORITY.get(fac_d[z[0]], 0),
-                    -z[1],
-                    alloc_count[z[0]]
-                ))
-            for fn, sc in cands[:r2]:
-                alloc_count[fn] += 1
-                used_dates[fn].add(d2)
-                if fac_d[fn] == "ACP":
-                    acp_type_count[fn][t2] += 1
-                assigned.append({"Name": fn, "Date": d2, "Session": s2,
-                                 "Type": t2, "Allocated_By": tag(fn, k, sc)})
-
-        # Pass 2: fill remaining faculty duty quotas
-        for fn in ALL_FAC:
-            if remaining(fn) <= 0:
-                continue
-            for sl in sorted(ALL_S, key=lambda s: s["date"]):
-                if remaining(fn) <= 0:
-                    break
-                d2, s2, t2 = sl["date"], sl["session"], sl["type"]
-                if not ok(fn, d2, t2):
-                    continue
-                alloc_count[fn] += 1
-                used_dates[fn].add(d2)
-                if fac_d[fn] == "ACP":
-                    acp_type_count[fn][t2] += 1
-                assigned.append({"Name": fn, "Date": d2, "Session": s2,
-                                 "Type": t2, "Allocated_By": "Gap-Fill"})
-
-    # ══════════════════════════════════════════════════════════════
-    #  MANDATORY SLOT COMPLETION PASS
-    #  Runs after CP-SAT or greedy.  Guarantees every slot seat is
-    #  filled by progressively relaxing soft constraints:
-    #    Relax-0  full rules enforced
-    #    Relax-1  allow same-date second duty
-    #    Relax-2  allow Saturday for non-TA/RA
-    #    Relax-3  allow duty on valuation date (absolute last resort)
-    #  ACP 1-online + 1-offline rule is NEVER relaxed.
-    # ══════════════════════════════════════════════════════════════
-    log("\n  ── Slot Completion Pass ─────────────────────────────")
-
-    cur_alloc   = defaultdict(int)
-    cur_dates   = defaultdict(set)
-    acp_tc      = defaultdict(lambda: {"Online": 0, "Offline": 0})
-    slot_filled = defaultdict(int)
-
-    for row in assigned:
-        fn = row["Name"]; d2 = row["Date"]; t2 = row["Type"]
-        cur_alloc[fn] += 1
-        cur_dates[fn].add(d2)
-        if fac_d.get(fn) == "ACP":
-            acp_tc[fn][t2] += 1
-        slot_filled[(d2, row["Session"], t2)] += 1
-
-    gaps_before = sum(
-        max(0, sl["required"] - slot_filled.get((sl["date"], sl["session"], sl["type"]), 0))
-        for sl in ALL_S)
-    log(f"  Gaps after solver  : {gaps_before}")
-
-    for sl in ALL_S:
-        key    = (sl["date"], sl["session"], sl["type"])
-        needed = sl["required"] - slot_filled[key]
-        if needed <= 0:
-            continue
+# Each run gets a folder JOBS_DIR/<job_id>/ holding status.json, the
+# full run.log and tail.log (the last lines, for the live view).
+# The optimizer runs in a forked worker process, so the Streamlit
+# script thread stays free; any browser session can poll the
+# folder, which also survives a page refresh.
+JOB_FORK = "fork" in mp.get_all_start_methods()
 
-        for relax in range(4):
-            if needed <= 0:
-                break
-            cands = []
-            for fn in ALL_FAC:
-                desig_ = fac_d[fn]
-                if sl["type"] not in DESIG_RULES[desig_][2]:
-                    continue
-                if relax < 3 and sl["date"] in fac_val_dates.get(fn, set()):
-                    continue
-                if relax < 2 and sl["date"].weekday() == 5 and desig_ not in SAT_DESIG:
-                    continue
-                if desig_ == "ACP":
-                    lim_on  = acp_online_limit.get(fn, 1)
-                    lim_off = acp_offline_limit.get(fn, 1)
-                    if sl["type"] == "Online"  and acp_tc[fn]["Online"]  >= lim_on:  continue
-                    if sl["type"] == "Offline" and acp_tc[fn]["Offline"] >= lim_off: continue
-                if relax < 1 and sl["date"] in cur_dates[fn]:
-                    continue
-                if cur_alloc[fn] >= DESIG_RULES[desig_][1]:
-                    continue
-                cands.append((fn, fexp[fn].get(key, 0)))
-
-            cands.sort(key=lambda z: (
-                -DESIG_PRIORITY.get(fac_d[z[0]], 0),
-                -z[1],
-                cur_alloc[z[0]]
-            ))
-
-            for fn, sc in cands:
-                if needed <= 0:
-                    break
-                cur_alloc[fn] += 1
-                cur_dates[fn].add(sl["date"])
-                if fac_d.get(fn) == "ACP":
-                    acp_tc[fn][sl["type"]] += 1
-                slot_filled[key] += 1
-                needed -= 1
-                lbl = "Gap-Fill" if relax == 0 else f"Gap-Fill-R{relax+1}"
-                assigned.append({"Name": fn, "Date": sl["date"],
-                                 "Session": sl["session"], "Type": sl["type"],
-                                 "Allocated_By": lbl})
-
-        if needed > 0:
-            log(f"  ⚠ Unfillable: {needed} seat(s) at "
-                f"{sl['date']} {sl['session']} {sl['type']} "
-                f"(insufficient eligible faculty)")
-
-    gaps_after = sum(
-        max(0, sl["required"] - slot_filled.get((sl["date"], sl["session"], sl["type"]), 0))
-        for sl in ALL_S)
-    log(f"  Gaps after completion: {gaps_after}  "
-        f"{'✓ All slots filled!' if gaps_after == 0 else '⚠ Some seats unfilled'}")
-
-    # ── Build output dataframes ───────────────────────────────────
-    if not assigned:
-        raise RuntimeError("No assignments produced. Check input files.")
-
-    alloc = pd.DataFrame(assigned)
-    alloc["Date"] = pd.to_datetime(alloc["Date"]).dt.strftime("%d-%m-%Y")
-    alloc = alloc.sort_values(["Date", "Session", "Name"]).reset_index(drop=True)
-    alloc.insert(0, "Sl.No", alloc.index + 1)
-
-    sumrows = []
-    for fn in ALL_FAC:
-        d2  = fac_d[fn]; dr = DESIG_RULES[d2]
-        rf  = alloc[alloc["Name"] == fn]; ab = rf["Allocated_By"]
-        tot = len(rf)
-        wt  = int(ab.isin(WILL_TAGS).sum())
-        sumrows.append({
-            "Name": fn, "Designation": d2,
-            "Submitted":          "Yes" if fn in submitted else "No",
-            "Submitted_Count":    sub_counts.get(fn, 0),
-            "Required_Duties":    dr[0],
-            "Submission_Shortfall": max(0, dr[0] - sub_counts.get(fn, 0)),
-            "Assigned_Duties":    tot,
-            "Willingness_Total": wt,
-            "Match_%":          f"{wt/tot*100:.0f}%" if tot else "N/A",
-            "Exact_Match":      int((ab == "Willingness-Exact").sum()),
-            "ACP_Online":       int((ab == "Willingness-ACPOnline").sum()),
-            "Session_Flip":     int((ab == "Willingness-SessionFlip").sum()),
-            "Adj_±1Day":        int((ab == "Willingness-±1Day").sum()),
-            "Val_Adj":          int((ab == "Willingness-ValAdj").sum()),
-            "Auto_Assigned":    int(ab.isin(["Auto-Assigned","OR-Assigned",
-                                             "Gap-Fill","Gap-Fill-R2",
-                                             "Gap-Fill-R3","Gap-Fill-R4"]).sum()),
-            "Online":           int((rf["Type"] == "Online").sum()),
-            "Offline":          int((rf["Type"] == "Offline").sum()),
-            "Gap":              max(dr[0] - tot, 0),
-        })
-    sumdf = pd.DataFrame(sumrows)
-
-    slotrows = []
-    for sl in ALL_S:
-        ds  = pd.Timestamp(sl["date"]).strftime("%d-%m-%Y")
-        na  = len(alloc[(alloc["Date"] == ds) &
-                        (alloc["Session"] == sl["session"]) &
-                        (alloc["Type"]    == sl["type"])])
-        slotrows.append({
-            "Date": ds, "Session": sl["session"], "Type": sl["type"],
-            "Required": sl["required"], "Assigned": na,
-            "Status": "✓" if na >= sl["required"] else f"✗ short {sl['required']-na}"
-        })
-    slotdf = pd.DataFrame(slotrows)
-
-    desigrows = []
-    for d2 in DESIG_RULES:
-        sub2 = sumdf[sumdf["Designation"] == d2]
-        if sub2.empty: continue
-        on   = int(sub2["Online"].sum())
-        of   = int(sub2["Offline"].sum())
-        dr   = DESIG_RULES[d2]
-        desigrows.append({
-            "Designation": d2, "Faculty_Count": len(sub2),
-            "Duties_Per_Person": dr[0],
-            "Total_Required":   dr[0] * len(sub2),
-            "Total_Assigned":   on + of,
-            "Willingness_Matched": int(sub2["Willingness_Total"].sum()),
-            "Auto_Assigned":    int(sub2["Auto_Assigned"].sum()),
-            "Online": on, "Offline": of
-        })
-    desigdf = pd.DataFrame(desigrows)
-
-    # ── Save to Excel ─────────────────────────────────────────────
-    alloc.to_excel(FINAL_ALLOC_FILE, index=False)
-    with pd.ExcelWriter(ALLOC_REPORT_FILE, engine="openpyxl") as writer:
-        desigdf.to_excel(writer, sheet_name="Designation_Summary", index=False)
-        sumdf.to_excel(writer,   sheet_name="Faculty_Summary",     index=False)
-        slotdf.to_excel(writer,  sheet_name="Slot_Verification",   index=False)
-        alloc.to_excel(writer,   sheet_name="Full_Allocation",     index=False)
-
-    # ── Summary log ───────────────────────────────────────────────
-    tot  = len(alloc); ab2 = alloc["Allocated_By"]
-    unmet = slotdf[~slotdf["Status"].str.startswith("✓")]
-    gaps  = sumdf[sumdf["Gap"] > 0]
-
-    sub_alloc      = alloc[alloc["Name"].isin(submitted)]
-    will_matched   = int(sub_alloc["Allocated_By"].isin(WILL_TAGS).sum()) if not sub_alloc.empty else 0
-    will_total_sub = len(sub_alloc)
-    overall_match_pct = (will_matched / will_total_sub * 100) if will_total_sub > 0 else 0
-
-    sub_sumdf  = sumdf[sumdf["Submitted"] == "Yes"].copy()
-    sub_sumdf["_pct"] = sub_sumdf.apply(
-        lambda r: r["Willingness_Total"] / r["Assigned_Duties"] * 100
-        if r["Assigned_Duties"] > 0 else 0, axis=1)
-    above80 = int((sub_sumdf["_pct"] >= 80).sum())
-
-    log(f"\n{'='*62}\n  RESULTS  [{method}]\n{'='*62}")
-    log(f"  Total assignments          : {tot}")
-    log(f"  ├─ Exact willingness       : {int((ab2 == 'Willingness-Exact').sum())}")
-    log(f"  ├─ ACP offline→online      : {int((ab2 == 'Willingness-ACPOnline').sum())}")
-    log(f"  ├─ Session flip FN↔AN      : {int((ab2 == 'Willingness-SessionFlip').sum())}")
-    log(f"  ├─ Adjacent ±1 biz-day     : {int((ab2 == 'Willingness-±1Day').sum())}")
-    log(f"  ├─ Valuation-adj           : {int((ab2 == 'Willingness-ValAdj').sum())}")
-    log(f"  └─ Auto / Gap-Fill         : {int(ab2.isin(['Auto-Assigned','OR-Assigned','Gap-Fill','Gap-Fill-R2','Gap-Fill-R3','Gap-Fill-R4']).sum())}")
-    log(f"\n  ★ Overall willingness match: {overall_match_pct:.1f}%  ({will_matched}/{will_total_sub})")
-    log(f"  ★ Faculty ≥80% match       : {above80}/{len(sub_sumdf)}")
-
-    log(f"\n  Designation-wise breakdown:")
-    for dg in ["P", "ACP", "SAP", "AP3", "AP2", "TA", "RA"]:
-        sub2 = sumdf[sumdf["Designation"] == dg]
-        if sub2.empty: continue
-        prio_lbl = "⭐ priority" if DESIG_PRIORITY.get(dg, 0) > 0 else "  fill-in"
-        avg_m = sub2.apply(
-            lambda r: r["Willingness_Total"] / r["Assigned_Duties"] * 100
-            if r["Assigned_Duties"] > 0 else 0, axis=1).mean()
-        log(f"  {dg:4} [{prio_lbl}]: {len(sub2):3} faculty | "
-            f"avg match {avg_m:.0f}% | auto {int(sub2['Auto_Assigned'].sum())}")
-
-    if not unmet.empty:
-        log(f"\n  ⚠ Unfilled slots ({len(unmet)}):")
-        for _, r in unmet.iterrows():
-            log(f"    {r['Date']} {r['Session']} {r['Type']} — {r['Status']}")
-    else:
-        log(f"\n  ✓ All {len(slotdf)} slots fully filled")
+def job_file(job_id, name):
+    return os.path.join(JOBS_DIR, job_id, name)
 
-    if not gaps.empty:
-        log(f"  ⚠ Faculty under-assigned ({len(gaps)}):")
-        for _, r in gaps.iterrows():
-            log(f"    {r['Name']} ({r['Designation']}) — {r['Gap']} duty gap")
-    else:
-        log(f"  ✓ All faculty assigned correct duty count")
+def read_job(job_id):
+    try:
+        with open(job_file(job_id, "status.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def write_job(job_id, **fields):
+    job = read_job(job_id) or {"job_id": job_id}
+    job.update(fields)
+    tmp = job_file(job_id, "status.json.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(job, f)
+    os.replace(tmp, job_file(job_id, "status.json"))
+    return job
+
+def read_job_log(job_id):
+    try:
+        with open(job_file(job_id, "run.log"), encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        return ""
+
+def latest_job():
+    if not os.path.isdir(JOBS_DIR):
+        return None
+    for job_id in sorted(os.listdir(JOBS_DIR), reverse=True):
+        job = read_job(job_id)
+        if job:
+            return job
+    return None
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except (OSError, TypeError):
+        return False
+    return True
 
-    if non_sub:
-        log(f"\n  ⚠ No-submission faculty ({len(non_sub)}) — auto-assigned:")
-        for n in non_sub:
-            log(f"      {n}  ({fac_d.get(n,'?')})")
-    if under_sub:
-        log(f"\n  ⚠ Under-submitted faculty ({len(under_sub)}):")
-        for n, given, req in under_sub:
-            rf2   = alloc[alloc["Name"] == n]
-            exact = int(rf2["Allocated_By"].isin(WILL_TAGS).sum())
-            log(f"      {n}  ({fac_d.get(n,'?')})  submitted {given}/{req}  →  {exact} matched")
+def _finish_job(job_id, **fields):
+    # A cancel may land while the run wraps up — never overwrite it
+    if (read_job(job_id) or {}).get("state") == "running":
+        write_job(job_id, finished=time.time(), **fields)
 
-    return alloc, sumdf, slotdf, desigdf
+def _optimizer_job(job_id, will_df, registry, opts):
+    if JOB_FORK:
+        os.setsid()                                     # own group: cancel reaches pool children
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)   # don't inherit Streamlit's handler
+    try:
+        # Lines reach disk in 200 ms batches; the sink is flushed before the state changes
+        with LogSink(job_file(job_id, "run.log"), job_file(job_id, "tail.log")) as sink:
+            run_optimizer(RUN_FILES, will_df=will_df, registry=registry, log=sink, **opts)
+        _finish_job(job_id, state="done")
+    except Exception as e:
+        _finish_job(job_id, state="failed", error=str(e), trace=traceback.format_exc())
+
+def start_job(will_df, **opts):
+    job_id = datetime.datetime.now().strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+    os.makedirs(os.path.join(JOBS_DIR, job_id), exist_ok=True)
+    write_job(job_id, state="running", started=time.time(), opts=opts, pid=None)
+    # Cached resources are read here, in the server process: a forked child
+    # could inherit a cache lock another Streamlit thread held at fork time
+    args = (job_id, will_df, faculty_registry(), opts)
+    if JOB_FORK:
+        proc = mp.get_context("fork").Process(target=_optimizer_job, args=args, daemon=False)
+        proc.start()
+        write_job(job_id, pid=proc.pid)
+    else:
+        threading.Thread(target=_optimizer_job, args=args, daemon=True).start()
+    return job_id
+
+def cancel_job(job_id):
+    job = read_job(job_id)
+    if job and job.get("state") == "running" and job.get("pid"):
+        write_job(job_id, state="cancelled", finished=time.time())
+        try:
+            os.killpg(job["pid"], signal.SIGTERM)   # worker + its process pools
+        except OSError:
+            try:                                    # not yet its own group leader
+                os.kill(job["pid"], signal.SIGTERM)
+            except OSError:
+                pass
+
+def poll_job(job_id):
+    """Reap finished workers and catch ones that died without reporting."""
+    mp.active_children()
+    job = read_job(job_id)
+    if job and job.get("state") == "running" and job.get("pid") and not _pid_alive(job["pid"]):
+        job = write_job(job_id, state="failed", finished=time.time(),
+                        error="Worker process exited unexpectedly.")
+    return job
+
+
+def render_submission_issues(will_df):
+    wd_check = will_df
+    sub_set  = set(wd_check["Faculty"].str.strip().unique()) if not wd_check.empty else set()
+    sub_cnt  = {}
+    if not wd_check.empty:
+        for nm, grp in wd_check.groupby("Faculty"):
+            sub_cnt[nm.strip()] = len(grp)
+
+    no_sub_names    = []
+    under_sub_names = []
+    for rec in faculty_registry().records:
+        nm, desig, req = rec.name, rec.designation, rec.required
+        if nm not in sub_set:
+            no_sub_names.append((nm, desig, req))
+        elif sub_cnt.get(nm, 0) < req:
+            under_sub_names.append((nm, desig, sub_cnt.get(nm,0), req))
+
+    if no_sub_names or under_sub_names:
+        st.markdown("---")
+        st.markdown("#### ⚠️ Willingness Submission Issues")
+        if no_sub_names:
+            st.error(f"**{len(no_sub_names)} faculty did not submit willingness at all:**")
+            rows = [{"Name": nm, "Designation": DESIG_FULL.get(d, d),
+                     "Required Duties": r} for nm, d, r in no_sub_names]
+            st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+        if under_sub_names:
+            st.warning(f"**{len(under_sub_names)} faculty submitted fewer dates than required:**")
+            rows = [{"Name": nm, "Designation": DESIG_FULL.get(d, d),
+                     "Submitted": g, "Required": r,
+                     "Shortfall": r - g}
+                    for nm, d, g, r in under_sub_names]
+            st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+
+
+def render_job_panel(job_id):
+    job = poll_job(job_id)
+    if not job:
+        return
+    state   = job.get("state", "?")
+    end     = job.get("finished") or time.time()
+    elapsed = end - job.get("started", end)
+    badge   = {"running": "⏳ Running", "done": "✅ Done", "failed": "❌ Failed",
+               "cancelled": "⛔ Cancelled"}.get(state, state)
+    st.markdown(f"**Job `{job_id}`** — {badge} · {elapsed:.0f}s")
+
+    tail = read_tail(job_file(job_id, "tail.log")) or \
+        "\n".join(read_job_log(job_id).splitlines()[-TAIL_LINES:])
+    st.code(tail, language="text")
+
+    if state == "running":
+        if JOB_FORK and st.button("⛔ Cancel Run", key=f"cancel_{job_id}"):
+            cancel_job(job_id)
+            st.rerun()
+        return
+    if state == "done":
+        st.success("✅ Optimization complete! Review results, then enable the allotment view in Portal Settings.")
+        render_submission_issues(get_all_willingness())
+        if st.session_state.get("celebrated_job") != job_id:
+            st.session_state["celebrated_job"] = job_id
+            st.balloons()
+    elif state == "failed":
+        st.error(f"Optimizer error: {job.get('error', 'unknown error')}")
+        if job.get("trace"):
+            st.code(job["trace"], language="text")
+    st.caption(f"Live view shows the last {TAIL_LINES} lines — download the full log below.")
+    st.download_button("⬇ Full run log", data=read_job_log(job_id).encode("utf-8"),
+                       file_name=f"optimizer_{job_id}.log", mime="text/plain",
+                       key=f"log_{job_id}")
 
 
 # ═══════════════════════════════════════════════════════════════ #
@@ -1302,7 +1040,6 @@ _defaults = {
     "selected_faculty":    "",
     "selected_slots":      [],
     "confirm_delete":      False,
-    "pending_submissions": pd.DataFrame(columns=["Faculty", "Date", "Session"]),
 }
 for k, val in _defaults.items():
     if k not in st.session_state:
@@ -1340,13 +1077,11 @@ if not os.path.exists(FACULTY_FILE):
     st.error(f"**{FACULTY_FILE}** not found. Upload it to your GitHub repo.")
     st.stop()
 
-fac_df = pd.read_excel(FACULTY_FILE)
-fac_df.columns = fac_df.columns.str.strip()
-_fc = fac_df.columns.tolist()
-fac_df.rename(columns={_fc[0]: "Name", _fc[1]: "Designation"}, inplace=True)
-fac_df = fac_df.dropna(subset=["Name"]).reset_index(drop=True)
-fac_df["Name"]  = fac_df["Name"].astype(str).str.strip()
-fac_df["Clean"] = fac_df["Name"].apply(clean)
+try:
+    fac_reg = faculty_registry()
+except ValueError as e:
+    st.error(str(e))
+    st.stop()
 
 offline_df, online_df = load_slots(OFFLINE_FILE, ONLINE_FILE)
 
@@ -1413,13 +1148,20 @@ if panel_mode == "Admin View":
                 help="Upload the faculty willingness Excel file collected externally or exported from this portal."
             )
             if uploaded_will is not None:
-                st.session_state["uploaded_willingness_bytes"] = uploaded_will.read()
-                st.success(f"✅ '{uploaded_will.name}' uploaded successfully. Reload the tab to see updated records.")
-                st.rerun()
+                up_bytes = uploaded_will.getvalue()
+                up_key   = source_key(data=up_bytes)
+                if up_key != st.session_state.get("uploaded_willingness_key"):
+                    st.session_state["uploaded_willingness_bytes"] = up_bytes
+                    st.session_state["uploaded_willingness_key"]   = up_key
+                    _parse_willingness.clear()
+                    st.success(f"✅ '{uploaded_will.name}' uploaded successfully. Reload the tab to see updated records.")
+                    st.rerun()
 
             if st.session_state.get("uploaded_willingness_bytes"):
                 if st.button("🗑 Remove Uploaded File (revert to repository file)", type="secondary"):
                     del st.session_state["uploaded_willingness_bytes"]
+                    st.session_state.pop("uploaded_willingness_key", None)
+                    _parse_willingness.clear()
                     st.rerun()
 
             st.markdown("---")
@@ -1436,7 +1178,7 @@ if panel_mode == "Admin View":
                 sub_cnt_val = vdf["Faculty"].nunique() if "Faculty" in vdf.columns else 0
                 c1, c2, c3 = st.columns(3)
                 c1.metric("Faculty Submitted",  sub_cnt_val)
-                c2.metric("Not Yet Submitted",  len(fac_df) - sub_cnt_val)
+                c2.metric("Not Yet Submitted",  len(fac_reg) - sub_cnt_val)
                 c3.metric("Total Rows",          len(vdf))
                 st.dataframe(vdf, use_container_width=True, hide_index=True)
                 st.download_button(
@@ -1445,11 +1187,13 @@ if panel_mode == "Admin View":
                     file_name="Willingness.csv", mime="text/csv")
 
             st.markdown("---")
-            st.markdown("#### ⚠ Clear In-Session Submissions")
-            st.checkbox("Confirm clearing all in-session submissions", key="confirm_delete")
-            if st.button("Clear Session Submissions", type="primary"):
+            st.markdown("#### ⚠ Clear Portal Submissions")
+            st.caption(f"Submissions made through this portal are stored in `{WILLINGNESS_DB}`. "
+                       "Download the CSV above first if you need a copy.")
+            st.checkbox("Confirm clearing all portal submissions", key="confirm_delete")
+            if st.button("Clear Portal Submissions", type="primary"):
                 if st.session_state.confirm_delete:
-                    st.session_state.pending_submissions = pd.DataFrame(columns=["Faculty", "Date", "Session"])
+                    willingness_store().clear()
                     st.success("Cleared.")
                     st.session_state.confirm_delete = False
                     st.rerun()
@@ -1474,81 +1218,93 @@ if panel_mode == "Admin View":
 | `Online_Duty.xlsx`    | Online exam slots           | {fstat(ONLINE_FILE)} |
 | `Willingness.xlsx`    | Faculty willingness         | {wstat} |
 """)
+            for dfile in (OFFLINE_FILE, ONLINE_FILE):
+                issues = duty_table(dfile)[1]
+                if not issues.empty:
+                    n_skip = int((issues["Action"] == "skipped").sum())
+                    with st.expander(f"⚠ {dfile}: {n_skip} row(s) skipped, "
+                                     f"{len(issues) - n_skip} defaulted"):
+                        st.dataframe(issues, use_container_width=True, hide_index=True)
             wn = get_all_willingness()
             sc2 = wn["Faculty"].nunique() if not wn.empty and "Faculty" in wn.columns else 0
             c1, c2, c3 = st.columns(3)
-            c1.metric("Total Faculty",         len(fac_df))
-            c2.metric("Willingness Submitted", f"{sc2}/{len(fac_df)}")
+            c1.metric("Total Faculty",         len(fac_reg))
+            c2.metric("Willingness Submitted", f"{sc2}/{len(fac_reg)}")
             c3.metric("Willingness Rows",      len(wn))
 
             if not os.path.exists(FACULTY_FILE) or not os.path.exists(OFFLINE_FILE):
                 st.error("Faculty_Master.xlsx and Offline_Duty.xlsx are required.")
-            elif not ORTOOLS_OK:
-                st.error("OR-Tools not installed. Add 'ortools' to requirements.txt and redeploy.")
             else:
                 st.info(
                     "💡 **Recommended:** Disable the allotment view (Portal Settings) before "
                     "running, then re-enable after reviewing results.")
-                if st.button("▶ Run Optimizer", type="primary", use_container_width=True):
-                    lb2 = st.empty()
-                    # Snapshot willingness bytes before entering spinner
-                    # (session_state reads can be unreliable inside st.spinner)
-                    will_bytes_snapshot = st.session_state.get("uploaded_willingness_bytes", None)
-                    with st.spinner("Running CP-SAT optimization..."):
-                        try:
-                            # Temporarily ensure the bytes are available
-                            if will_bytes_snapshot is not None:
-                                st.session_state["uploaded_willingness_bytes"] = will_bytes_snapshot
-                            alloc_out, sumdf_out, slotdf_out, _ = run_optimizer(lb2)
-                            st.success("✅ Optimization complete! Review results, then enable the allotment view in Portal Settings.")
-
-                            # ── Submission status panel ───────────────
-                            wd_check = get_all_willingness()
-                            fr_check = pd.read_excel(FACULTY_FILE)
-                            fr_check.columns = fr_check.columns.str.strip()
-                            fr_check.rename(columns={fr_check.columns[0]: "Name",
-                                                     fr_check.columns[1]: "Designation"}, inplace=True)
-                            fr_check["Name"]        = fr_check["Name"].astype(str).str.strip()
-                            fr_check["Designation"] = fr_check["Designation"].astype(str).str.strip().str.upper()
-
-                            sub_set  = set(wd_check["Faculty"].str.strip().unique()) if not wd_check.empty else set()
-                            sub_cnt  = {}
-                            if not wd_check.empty:
-                                for nm, grp in wd_check.groupby("Faculty"):
-                                    sub_cnt[nm.strip()] = len(grp)
-
-                            no_sub_names    = []
-                            under_sub_names = []
-                            for _, frow in fr_check.iterrows():
-                                nm   = frow["Name"]
-                                desig = str(frow["Designation"]).strip().upper()
-                                req  = DESIG_RULES.get(desig if desig in DESIG_RULES else "TA", (0,0))[0]
-                                if nm not in sub_set:
-                                    no_sub_names.append((nm, desig, req))
-                                elif sub_cnt.get(nm, 0) < req:
-                                    under_sub_names.append((nm, desig, sub_cnt.get(nm,0), req))
-
-                            if no_sub_names or under_sub_names:
-                                st.markdown("---")
-                                st.markdown("#### ⚠️ Willingness Submission Issues")
-                                if no_sub_names:
-                                    st.error(f"**{len(no_sub_names)} faculty did not submit willingness at all:**")
-                                    rows = [{"Name": nm, "Designation": DESIG_FULL.get(d, d),
-                                             "Required Duties": r} for nm, d, r in no_sub_names]
-                                    st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
-                                if under_sub_names:
-                                    st.warning(f"**{len(under_sub_names)} faculty submitted fewer dates than required:**")
-                                    rows = [{"Name": nm, "Designation": DESIG_FULL.get(d, d),
-                                             "Submitted": g, "Required": r,
-                                             "Shortfall": r - g}
-                                            for nm, d, g, r in under_sub_names]
-                                    st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
-
-                            st.balloons()
-                        except Exception as e:
-                            import traceback
-                            st.error(f"Optimizer error: {e}")
-                            st.code(traceback.format_exc(), language="text")
+
+                render_presolve()
+
+                mode_opts = (["Greedy (fast)", "Multi-start (best of N)"]
+                             + (["Flow (min-cost heuristic)"] if FLOW_OK else [])
+                             + (["Exact (time-boxed)"] if EXACT_BACKENDS else [])
+                             + (["Incremental (changes only)"] if incremental_ready(RUN_FILES) else []))
+                solver_mode = st.radio("Solver mode", mode_opts, horizontal=True, key="solver_mode",
+                    help="Exact mode runs CP-SAT/MILP warm-started from the greedy result "
+                         "and keeps it only if it improves willingness match in time. "
+                         "Flow mode is a fast heuristic: one min-cost flow over seats, quotas "
+                         "and seniority-then-willingness, in seconds on large instances. ACP "
+                         "same-date clashes it produces are dropped and left to the Slot "
+                         "Completion Pass (counted in the run log). "
+                         "Multi-start runs N randomised greedy passes in parallel and keeps "
+                         "the one with the fewest gaps and best willingness match. "
+                         "Incremental mode keeps the previous allocation and re-solves only "
+                         "the faculty and slots whose inputs changed since that run.")
+                if not EXACT_BACKENDS:
+                    st.caption("Exact mode unavailable — add 'ortools' to requirements.txt to enable it.")
+                ex_time, ex_workers = EXACT_TIME_LIMIT, EXACT_WORKERS
+                ms_starts, ms_seed  = MULTISTART_RUNS, MULTISTART_SEED
+                if solver_mode.startswith("Exact"):
+                    e1, e2 = st.columns(2)
+                    ex_time    = e1.number_input("Time limit (s)", 5, 1800, EXACT_TIME_LIMIT, step=5)
+                    ex_workers = e2.number_input("Workers", 1, os.cpu_count() or 1,
+                                                 min(EXACT_WORKERS, os.cpu_count() or 1))
+                elif solver_mode.startswith("Multi"):
+                    m1, m2 = st.columns(2)
+                    ms_starts = m1.number_input("Runs", 2, 256, MULTISTART_RUNS)
+                    ms_seed   = m2.number_input("Seed", 0, 10**6, MULTISTART_SEED,
+                                                help="Same seed + same inputs → same allocation")
+                ls_sweeps = 0
+                if not solver_mode.startswith("Incremental"):
+                    ls_sweeps = st.number_input(
+                        "Local search (sweeps)", 0, 10, LOCAL_SEARCH_SWEEPS,
+                        help="After the Slot Completion Pass, swap and move duties between "
+                             "faculty to raise willingness match. Each sweep revisits every "
+                             "duty of submitted faculty once; most of the gain comes from the "
+                             "first. It changes the solver's allocation; 0 turns it off.")
+
+                job     = latest_job()
+                running = bool(job) and poll_job(job["job_id"]).get("state") == "running"
+                if st.button("▶ Run Optimizer", type="primary", use_container_width=True,
+                             disabled=running):
+                    start_job(get_all_willingness(),
+                              solver=solver_mode.split()[0].lower().replace("-", ""),
+                              time_limit=float(ex_time), workers=int(ex_workers),
+                              starts=int(ms_starts), seed=int(ms_seed),
+                              local_search=int(ls_sweeps))
+                    st.rerun()
+                if running:
+                    st.caption("A run is in progress — the log below refreshes automatically.")
+
+                if job:
+                    st.markdown("#### Latest Run")
+                    if running and hasattr(st, "fragment"):
+                        @st.fragment(run_every=2)
+                        def _live_job_panel():
+                            render_job_panel(job["job_id"])
+                            if read_job(job["job_id"]).get("state") != "running":
+                                st.rerun()
+                        _live_job_panel()
+                    else:
+                        render_job_panel(job["job_id"])
+                        if running:
+                            st.button("🔄 Refresh progress")
 
         # ── Tab 3: View Results ───────────────────────────────────
         with t3:
@@ -1556,11 +1312,9 @@ if panel_mode == "Admin View":
             if not os.path.exists(FINAL_ALLOC_FILE):
                 st.info("No results yet. Run the optimizer first.")
             else:
-                av  = pd.read_excel(FINAL_ALLOC_FILE)
-                rep = {}
-                if os.path.exists(ALLOC_REPORT_FILE):
-                    xl2 = pd.ExcelFile(ALLOC_REPORT_FILE)
-                    for sh in xl2.sheet_names: rep[sh] = xl2.parse(sh)
+                av_ix = load_allocation()
+                av    = av_ix.frame
+                rep   = {sh: ix.frame for sh, ix in load_report().items()}
 
                 tot2 = len(av)
                 if tot2 > 0 and "Allocated_By" in av.columns:
@@ -1573,6 +1327,10 @@ if panel_mode == "Admin View":
                     c3.metric("Auto-Assigned",        aut)
                     c4.metric("Overall Match %",      f"{will_m / tot2 * 100:.1f}%")
 
+                run_rec = load_run_record()
+                if run_rec:
+                    render_run_record(run_rec)
+
                 for sh_name, label in [("Designation_Summary", "Designation Summary"),
                                        ("Slot_Verification",   "Slot Verification"),
                                        ("Faculty_Summary",     "Faculty Summary")]:
@@ -1589,29 +1347,27 @@ if panel_mode == "Admin View":
                 st.markdown("---")
                 st.markdown("#### 🔍 Per-Faculty Deviation Analysis")
                 st.caption("Select a faculty member to inspect their willingness match and deviation details.")
-                admin_fnames = fac_df["Name"].dropna().drop_duplicates().tolist()
+                admin_fnames = fac_reg.names
                 admin_sel    = st.selectbox("Select Faculty", admin_fnames, key="admin_dev_sel")
                 admin_sc     = clean(admin_sel)
 
-                wd_admin = load_willingness()
+                wd_admin = load_willingness_data()
                 admin_will_set = set()
-                if not wd_admin.empty:
-                    wm_admin = fac_mask(wd_admin, admin_sc)
-                    wr_admin = wd_admin[wm_admin]
+                if not wd_admin.frame.empty:
+                    wr_admin = wd_admin.rows_for(admin_sc)
                     if not wr_admin.empty and {"Date", "Session"}.issubset(wr_admin.columns):
                         for d2, s2 in zip(wr_admin["Date"], wr_admin["Session"]):
                             nd = pd.to_datetime(d2, dayfirst=True, errors="coerce")
                             if pd.notna(nd):
                                 admin_will_set.add((nd.date(), str(s2).upper()))
 
-                am_admin = fac_mask(av, admin_sc)
-                admin_allot_rows = av[am_admin].copy()
+                admin_allot_rows = av_ix.rows_for(admin_sc).copy()
                 render_deviation_section(admin_allot_rows, admin_will_set)
 
                 st.markdown("---")
                 st.markdown("#### Full Allocation Table")
                 st.dataframe(av, use_container_width=True, hide_index=True)
-                col1, col2 = st.columns(2)
+                col1, col2, col3 = st.columns(3)
                 with col1:
                     with open(FINAL_ALLOC_FILE, "rb") as fh:
                         st.download_button("⬇ Final_Allocation.xlsx", data=fh.read(),
@@ -1622,6 +1378,15 @@ if panel_mode == "Admin View":
                         st.download_button("⬇ Allocation_Report.xlsx", data=fh.read(),
                             file_name="Allocation_Report.xlsx",
                             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+                with col3:
+                    side = sidecar_path(FINAL_ALLOC_FILE,
+                                        "parquet" if ALLOC_SIDECAR == "parquet" and PYARROW_OK else "csv")
+                    if ALLOC_SIDECAR and os.path.exists(side):
+                        with open(side, "rb") as fh:
+                            st.download_button(f"⬇ {os.path.basename(side)}", data=fh.read(),
+                                file_name=os.path.basename(side),
+                                mime="application/octet-stream" if side.endswith(".parquet")
+                                     else "text/csv")
 
         # ── Tab 4: Portal Settings ────────────────────────────────
         with t4:
@@ -1707,33 +1472,28 @@ if user_mode == "Allotment":
         st.caption("Curated by Dr. N. Sathiya Narayanan | School of Mechanical Engineering")
         st.stop()
 
-    fnames = fac_df["Name"].dropna().drop_duplicates().tolist()
+    fnames = fac_reg.names
     sn = st.selectbox("Select Your Name", fnames, key="aname")
     sc = clean(sn)
-    frd = fac_df[fac_df["Clean"] == sc]
+    frec = fac_reg.get(sc)
 
     vd, qd = [], []
-    if not frd.empty:
-        fr2 = frd.iloc[0]
-        vd = [f"{fmt_day(d.strftime('%d-%m-%Y'))} - Full Day" for d in valuation_dates_for(fr2)]
-        qd = [fmt_day(d) for d in qp_dates_for(fr2)]
+    if frec is not None:
+        vd = [f"{fmt_day(d.strftime('%d-%m-%Y'))} - Full Day" for d in sorted(frec.val_dates)]
+        qd = [fmt_day(d.strftime('%d-%m-%Y')) for d in frec.qp_dates]
 
     # Load willingness (for WhatsApp message only — not displayed to user)
-    wd2 = load_willingness()
+    wr = load_willingness_data().rows_for(sc)
     wdisp = []
-    if not wd2.empty:
-        wm = fac_mask(wd2, sc)
-        wr = wd2[wm]
+    if not wr.empty:
         if not wr.empty and {"Date", "Session"}.issubset(wr.columns):
             for d2, s2 in zip(wr["Date"], wr["Session"]):
                 wdisp.append(f"{fmt_day(d2)} - {str(s2).upper()}")
 
     # Load allotment
-    adf = pd.read_excel(FINAL_ALLOC_FILE) if os.path.exists(FINAL_ALLOC_FILE) else pd.DataFrame()
+    allot_rows = load_allocation().rows_for(sc)
     idisp = []
-    if not adf.empty:
-        am = fac_mask(adf, sc)
-        allot_rows = adf[am].copy()
+    if not allot_rows.empty:
         if not allot_rows.empty and {"Date", "Session"}.issubset(allot_rows.columns):
             for _, ar in allot_rows.iterrows():
                 dtype    = str(ar.get("Type", "")).strip()
@@ -1786,7 +1546,8 @@ if user_mode == "Allotment":
     st.markdown("**Message Preview:**")
     st.code(msg, language="text")
 
-    wph = st.text_input("WhatsApp Number (with country code)", placeholder="+919876543210")
+    wph = st.text_input("WhatsApp Number (with country code)", placeholder="+919876543210",
+                        value=frec.phone if frec is not None else "")
     if wph.strip():
         lnk = wa_link(wph.strip(), msg)
         st.markdown(
@@ -1804,20 +1565,18 @@ if user_mode == "Allotment":
 
 
 # ─── WILLINGNESS SUBMISSION ───────────────────────────────────── #
-fnames2   = fac_df["Name"].dropna().drop_duplicates().tolist()
+fnames2   = fac_reg.names
 sel_name  = st.selectbox("Select Your Name", fnames2)
 sel_clean = clean(sel_name)
-fmatch    = fac_df[fac_df["Clean"] == sel_clean]
+frec2     = fac_reg.get(sel_clean)
 
-if fmatch.empty:
+if frec2 is None:
     st.error("Faculty not found. Contact admin.")
     st.stop()
 
-frow2   = fmatch.iloc[0]
-desig2  = str(frow2["Designation"]).strip().upper()
+desig2  = frec2.designation
 req_cnt = DUTY_STRUCTURE.get(desig2, 0)
-val_d2  = valuation_dates_for(frow2)
-val_s2  = set(val_d2)
+val_s2  = frec2.val_dates
 
 if req_cnt == 0:
     st.warning(f"Designation '{desig2}' not recognised. Contact admin.")
@@ -1910,11 +1669,11 @@ with left:
         avail = set(sopts[sopts["DateOnly"] == picked]["Session"].dropna().astype(str).str.upper())
 
         # Live probability bars — shown only when applicants >= 3x seats
-        all_will_now = get_all_willingness()
+        demand = slot_demand()
         any_prob_shown = False
         for sess_opt in ["FN", "AN"]:
             if sess_opt in avail:
-                prob_info = slot_probability(all_will_now, sopts, picked, sess_opt)
+                prob_info = demand.probability(picked, sess_opt, frec2.submit_type)
                 seats_val = prob_info["seats"]
                 appl_val  = prob_info["applicants"]
                 if seats_val > 0 and appl_val >= 3 * seats_val:
@@ -1968,12 +1727,8 @@ with left:
                 if not (s["Date"] == td and s["Session"] == ts)]
             st.rerun()
 
-    wl2 = load_willingness()
-    already = (sel_clean in wl2["FacultyClean"].tolist()
-               if not wl2.empty and "FacultyClean" in wl2.columns else False)
-    pend = st.session_state.get("pending_submissions", pd.DataFrame(columns=["Faculty", "Date", "Session"]))
-    if not pend.empty and "Faculty" in pend.columns:
-        already = already or (sel_name in pend["Faculty"].tolist())
+    already = sel_clean in load_willingness_data()
+    already = already or willingness_store().has_faculty(sel_name)
 
     st.markdown("### Submit Willingness")
     rem2 = max(req_cnt - len(st.session_state.selected_slots), 0)
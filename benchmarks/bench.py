@@ -0,0 +1,169 @@
+"""
+Optimizer benchmark
+===================
+Runs optimizer.run_optimizer — the same loaders, solver dispatch, Slot
+Completion Pass, local search and export the portal uses — on synthetic
+datasets (see synth.py) or real input folders, and records its run
+profile and quality, so speed or quality regressions show up as a diff
+against a saved baseline:
+
+  stages   load · solve · completion · search · reports · export
+           (run_optimizer's own RunProfile stages, grouped)
+  quality  seats, gaps after completion, faculty short of quota,
+           overall willingness match %
+
+    python benchmarks/bench.py --sizes 100,1000,5000,20000 --json bench.json
+    python benchmarks/bench.py --sizes 1000 --baseline bench.json   # exit 1 on regression
+    python benchmarks/bench.py --data /srv/duty --solver flow --cold
+
+Stage times are the best of ``--repeat`` runs. The Arrow input cache
+lives in a temp folder per dataset, so only the first repeat parses the
+workbooks unless ``--cold`` clears it before every run. Datasets are
+generated into a temp folder unless ``--data`` points at real input
+workbooks.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import input_cache  # noqa: E402
+from optimizer import (  # noqa: E402
+    EXACT_TIME_LIMIT, LOCAL_SEARCH_SWEEPS, MULTISTART_RUNS, MULTISTART_SEED, RunFiles, run_optimizer,
+)
+from synth import generate  # noqa: E402
+
+STAGES     = ["load", "solve", "completion", "search", "reports", "export"]
+SLOW_RATIO = 1.25    # stage slower than baseline by this factor …
+SLOW_MIN_S = 0.05    # … and by at least this many seconds is a regression
+
+# RunProfile stage → column; anything else is a solver stage
+STAGE_OF = {"faculty + valuation dates": "load", "willingness": "load", "duty slots": "load",
+            "pre-solve check": "load", "slot completion": "completion",
+            "local search": "search", "report build": "reports", "excel write": "export"}
+
+
+def _quiet(m=""):
+    pass
+
+
+def run_once(folder, out, cold=False, **opts):
+    """One run_optimizer pass. Returns ({stage: seconds}, {metric: value})."""
+    files = RunFiles(folder, out)
+    if cold:
+        shutil.rmtree(input_cache.CACHE_DIR, ignore_errors=True)
+    _, sumdf, _, _ = run_optimizer(files, log=_quiet, **opts)
+    with open(files.run_record) as f:
+        rec = json.load(f)
+
+    marks = dict.fromkeys(STAGES, 0.0)
+    for st in rec["stages"]:
+        if not st["stage"].startswith("completion relax"):     # nested in slot completion
+            marks[STAGE_OF.get(st["stage"], "solve")] += st["wall_s"]
+    quality = {
+        "faculty":      rec["faculty"],
+        "seats":        rec["seats"],
+        "assignments":  rec["assignments"],
+        "gaps":         rec["gaps"],
+        "quota_short":  int((sumdf["Gap"] > 0).sum()),
+        "match_pct":    rec["match_pct"],
+        "method":       rec["method"],
+    }
+    return marks, quality
+
+
+def bench(label, folder, repeat, cold=False, **opts):
+    best, cache = {}, input_cache.CACHE_DIR
+    with tempfile.TemporaryDirectory() as out:
+        input_cache.CACHE_DIR = os.path.join(out, ".input_cache")
+        try:
+            for _ in range(repeat):
+                marks, quality = run_once(folder, out, cold, **opts)
+                best = {s: min(marks[s], best.get(s, float("inf"))) for s in STAGES}
+        finally:
+            input_cache.CACHE_DIR = cache
+    return {"label": label, "seconds": best, "total": sum(best.values()), **quality}
+
+
+def regressions(results, baseline):
+    """Human-readable regression lines for results that got slower or worse."""
+    base, out = {r["label"]: r for r in baseline}, []
+    for r in results:
+        b = base.get(r["label"])
+        if not b:
+            continue
+        for s in STAGES:
+            if s not in b["seconds"]:                    # baseline from an older stage layout
+                continue
+            now, was = r["seconds"][s], b["seconds"][s]
+            if now > was * SLOW_RATIO and now - was > SLOW_MIN_S:
+                out.append(f"{r['label']}: {s} {was:.3f}s → {now:.3f}s")
+        if r["gaps"] > b["gaps"]:
+            out.append(f"{r['label']}: gaps {b['gaps']} → {r['gaps']}")
+        if r["match_pct"] < b["match_pct"] - 0.1:
+            out.append(f"{r['label']}: match {b['match_pct']:.1f}% → {r['match_pct']:.1f}%")
+    return out
+
+
+def print_table(results):
+    head = f"{'dataset':>10} " + " ".join(f"{s:>10}" for s in STAGES) + \
+           f" {'total':>8} {'seats':>7} {'gaps':>5} {'match%':>7}"
+    print(head)
+    print("-" * len(head))
+    for r in results:
+        print(f"{r['label']:>10} " + " ".join(f"{r['seconds'][s]:>10.3f}" for s in STAGES) +
+              f" {r['total']:>8.2f} {r['seats']:>7} {r['gaps']:>5} {r['match_pct']:>7.1f}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark the duty optimizer pipeline.")
+    ap.add_argument("--sizes", default="100,1000,5000",
+                    help="comma-separated faculty counts for synthetic datasets")
+    ap.add_argument("--data", action="append", default=[],
+                    help="folder with real input workbooks (repeatable)")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--schools", type=int, default=0)
+    ap.add_argument("--repeat", type=int, default=1)
+    ap.add_argument("--cold", action="store_true", help="clear the input cache before every run")
+    ap.add_argument("--solver", choices=["greedy", "exact", "flow", "multistart"], default="greedy")
+    ap.add_argument("--time-limit", type=float, default=EXACT_TIME_LIMIT, help="exact mode, seconds")
+    ap.add_argument("--starts", type=int, default=MULTISTART_RUNS, help="multistart mode: greedy runs")
+    ap.add_argument("--local-search", type=int, default=LOCAL_SEARCH_SWEEPS, metavar="SWEEPS")
+    ap.add_argument("--json", help="write results here")
+    ap.add_argument("--baseline", help="earlier --json output to compare against")
+    a = ap.parse_args(argv)
+
+    opts = {"solver": a.solver, "time_limit": a.time_limit, "starts": a.starts,
+            "seed": MULTISTART_SEED, "local_search": a.local_search}
+    results = []
+    for folder in a.data:
+        results.append(bench(os.path.basename(os.path.normpath(folder)), folder, a.repeat, a.cold,
+                             **opts))
+        print(f"  {results[-1]['label']}: {results[-1]['total']:.2f}s", file=sys.stderr)
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in [int(x) for x in a.sizes.split(",") if x.strip()]:
+            folder = os.path.join(tmp, f"n{n}")
+            generate(n, folder, seed=a.seed, schools=a.schools)
+            results.append(bench(f"n{n}", folder, a.repeat, a.cold, **opts))
+            print(f"  n{n}: {results[-1]['total']:.2f}s", file=sys.stderr)
+    print_table(results)
+
+    if a.json:
+        with open(a.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if a.baseline:
+        with open(a.baseline) as f:
+            found = regressions(results, json.load(f))
+        print("\nRegressions:" if found else "\nNo regressions against baseline.")
+        for line in found:
+            print(f"  ⚠ {line}")
+        return 1 if found else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
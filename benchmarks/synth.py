@@ -0,0 +1,119 @@
+"""
+Synthetic datasets
+==================
+Writes Faculty_Master / Offline_Duty / Online_Duty / Willingness workbooks
+shaped like the real ones, at any scale:
+
+  * designations drawn from DESIG_MIX; duty quotas and allowed duty types
+    come straight from DESIG_RULES, so seat totals track the faculty pool
+  * 0–5 valuation dates per faculty in V1..V5
+  * Online seats sized to the faculty allowed Online duties, Offline seats
+    to the rest, spread over the exam days (Sundays excluded) at LOAD
+  * willingness dates drawn from a Zipf popularity curve, so a few days
+    are heavily over-subscribed — as in a real exam period
+  * optional School column on faculty and duty files (multi-school runs)
+
+    python benchmarks/synth.py 5000 --out /tmp/bench-5000 --seed 7
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from duty_engine import DESIG_RULES, VAL_COLS  # noqa: E402
+
+DESIG_MIX   = {"P": .10, "ACP": .18, "SAP": .18, "AP3": .18, "AP2": .06, "TA": .25, "RA": .05}
+WILL_DATES  = {"P": 3, "ACP": 5, "SAP": 7, "AP3": 7, "AP2": 7, "TA": 9, "RA": 9}
+START       = "2025-05-05"
+EXAM_DAYS   = 40      # calendar days in the exam period
+LOAD        = 0.97    # seats / duty quota capacity
+SUBMIT_RATE = 0.90    # share of faculty who submit willingness
+POPULARITY  = 1.6     # Zipf exponent for date popularity
+
+
+def generate(n_faculty, out, seed=1, days=EXAM_DAYS, load=LOAD,
+             submit_rate=SUBMIT_RATE, popularity=POPULARITY, schools=0):
+    """Write the four input workbooks for ``n_faculty`` faculty into ``out``.
+    Returns {"faculty": n, "seats": n, "willingness": n}."""
+    rng = np.random.default_rng(seed)
+    os.makedirs(out, exist_ok=True)
+    cal  = [d for d in pd.date_range(START, periods=days) if d.weekday() != 6]
+    des  = rng.choice(list(DESIG_MIX), n_faculty, p=list(DESIG_MIX.values()))
+    names = [f"Dr. F{i:05d}" for i in range(n_faculty)]
+    school = ([f"S{i % schools + 1}" for i in range(n_faculty)] if schools else None)
+
+    # ── Faculty_Master ───────────────────────────────────────────
+    vals = np.full((n_faculty, len(VAL_COLS)), np.datetime64("NaT"), dtype="datetime64[ns]")
+    for i, k in enumerate(rng.integers(0, len(VAL_COLS) + 1, n_faculty)):
+        vals[i, :k] = np.sort(np.array(cal, dtype="datetime64[ns]")[rng.choice(len(cal), k, replace=False)])
+    fac = pd.DataFrame({"Name": names, "Designation": des})
+    if school:
+        fac["School"] = school
+    for j, c in enumerate(VAL_COLS):
+        fac[c] = vals[:, j]
+    fac.to_excel(os.path.join(out, "Faculty_Master.xlsx"), index=False)
+
+    # ── Duty files: seats sized to each type's quota capacity ────
+    online_only = {d for d, r in DESIG_RULES.items() if r[2] == ["Online"]}
+    cap = {"Online": 0, "Offline": 0}
+    for d in des:
+        quota, _, types = DESIG_RULES[d]
+        if d in online_only:
+            cap["Online"] += quota
+        elif "Online" in types:                 # ACP 1+1: one of each
+            cap["Online"] += 1
+            cap["Offline"] += quota - 1
+        else:
+            cap["Offline"] += quota
+
+    def slots(total, sessions):
+        keys = [(d, s) for d in cal for s in sessions]
+        cnt  = rng.multinomial(int(total * load), rng.dirichlet(np.ones(len(keys))))
+        df   = pd.DataFrame({"Date": [d for d, _ in keys], "Session": [s for _, s in keys],
+                             "Required": cnt})
+        df = df[df["Required"] > 0].reset_index(drop=True)
+        if schools:
+            # Split each slot's seats across schools
+            parts = []
+            for k in range(schools):
+                p = df.copy()
+                p["Required"] = (df["Required"] + schools - 1 - k) // schools
+                p["School"]   = f"S{k + 1}"
+                parts.append(p[p["Required"] > 0])
+            df = pd.concat(parts, ignore_index=True)
+        return df
+
+    off = slots(cap["Offline"], ["FN", "AN"])
+    on  = slots(cap["Online"], ["FN"])
+    off.to_excel(os.path.join(out, "Offline_Duty.xlsx"), index=False)
+    on.to_excel(os.path.join(out, "Online_Duty.xlsx"), index=False)
+
+    # ── Willingness: Zipf-skewed date popularity ─────────────────
+    pop = rng.zipf(popularity, len(cal)).astype(float)
+    pop /= pop.sum()
+    rows = []
+    for i in np.flatnonzero(rng.random(n_faculty) < submit_rate):
+        k = max(1, WILL_DATES[des[i]] - int(rng.integers(0, 3)))
+        for d in rng.choice(len(cal), min(k, len(cal)), replace=False, p=pop):
+            rows.append((names[i], cal[d].strftime("%d-%m-%Y"), rng.choice(["FN", "AN"])))
+    pd.DataFrame(rows, columns=["Faculty", "Date", "Session"]).to_excel(
+        os.path.join(out, "Willingness.xlsx"), index=False)
+    return {"faculty": n_faculty, "seats": int(off["Required"].sum() + on["Required"].sum()),
+            "willingness": len(rows)}
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Generate a synthetic duty-portal dataset.")
+    ap.add_argument("faculty", type=int)
+    ap.add_argument("--out", required=True)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--days", type=int, default=EXAM_DAYS)
+    ap.add_argument("--load", type=float, default=LOAD)
+    ap.add_argument("--submit-rate", type=float, default=SUBMIT_RATE)
+    ap.add_argument("--schools", type=int, default=0)
+    a = ap.parse_args()
+    print(generate(a.faculty, a.out, a.seed, a.days, a.load, a.submit_rate, schools=a.schools))
@@ -0,0 +1,1578 @@
+"""
+SASTRA SoME Duty Optimizer — engine components
+==============================================
+Streamlit-free building blocks used by run_optimizer() in optimizer.py.
+
+  FacultyRegistry  — Faculty_Master parsed once into typed ``__slots__``
+                     records (designation, valuation / QP dates, phone).
+  BizCalendar      — business days (weekends + holidays) of one exam period as
+                     cumulative ordinals, so ±k business-day shifts are array
+                     lookups over all willingness rows at once.
+  ScoreMatrix      — dense faculty × slot int32 willingness scores, built
+                     with vectorised date arithmetic.
+  GreedyEngine     — Pass-1 greedy slot filling over per-designation candidate
+                     heaps and a (date, session, type) → scored-faculty index,
+                     so each slot only touches the faculty relevant to it.
+  CompletionEngine — Slot Completion Pass over precomputed per-(date, type,
+                     relax level) eligibility bitsets and capacity counters.
+  solve_exact      — time-boxed CP-SAT (or scipy MILP) model over the same
+                     scores and rules, warm-started from the greedy result.
+  multistart_greedy — best of N randomised greedy + completion runs (perturbed
+                     slot order and tie-breaks, seeded) over a process pool.
+  solve_flow       — seats / quotas / seniority-then-willingness as a min-cost
+                     flow with per-faculty-per-date gadget nodes: a fast
+                     heuristic (ACP same-date clashes repaired afterwards).
+  solve_assignments / solve_by_school
+                   — the Pass 1 / Pass 2 / exact pipeline for one partition, and
+                     the per-school process pool + shared-pool stage around it.
+  solve_incremental
+                   — re-solves only the seats and faculty whose inputs changed
+                     since a previous Final_Allocation, keeping the rest.
+  LocalSearch      — swap / move improvement of a finished allocation, each
+                     change scored in O(1) from the score matrix.
+  build_reports    — Faculty_Summary / Slot_Verification / Designation_Summary
+                     from single crosstab / groupby passes over the allocation.
+"""
+
+import hashlib
+import heapq
+import multiprocessing as mp
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from run_profile import NULL_PROFILE
+
+try:
+    from ortools.sat.python import cp_model
+    ORTOOLS_OK = True
+except ImportError:
+    ORTOOLS_OK = False
+
+try:
+    from ortools.graph.python import min_cost_flow
+    FLOW_OK = True
+except ImportError:
+    FLOW_OK = False
+
+try:
+    from scipy.optimize import milp, LinearConstraint, Bounds
+    from scipy.sparse import csc_matrix
+    SCIPY_OK = True
+except ImportError:
+    SCIPY_OK = False
+
+# ─── Designation rules ───────────────────────────────────────── #
+# designation → (min duties, max duties, allowed duty types)
+DESIG_RULES = {
+    "P":   (1, 1, ["Online"]),
+    "ACP": (2, 2, ["Online", "Offline"]),
+    "SAP": (3, 3, ["Offline"]),
+    "AP3": (3, 3, ["Offline"]),
+    "AP2": (3, 3, ["Offline"]),
+    "TA":  (3, 3, ["Offline"]),
+    "RA":  (4, 4, ["Offline"]),
+}
+
+# ── Willingness match scores ──────────────────────────────────── #
+W_EXACT      = 100_000   # exact date + session match
+W_ACP_ONLINE =  80_000   # ACP offline→online mapping
+W_FLIP       =  60_000   # same date, opposite session (FN↔AN)
+W_ADJ1       =  40_000   # ±1 business day adjacency
+W_VAL_ADJ    =   5_000   # adjacent to own valuation date
+W_NON_SUB    =     100   # no willingness submitted
+PENALTY      =      10   # submitted but slot outside window (discourage)
+
+# ── Designation priority (higher = preferred for slot filling) ── #
+# P > ACP > SAP = AP3 = AP2 >> TA = RA
+# TA and RA are last resort; senior faculty fill slots first
+DESIG_PRIORITY = {
+    "P":   6_000_000,
+    "ACP": 5_000_000,
+    "SAP": 4_000_000,
+    "AP3": 3_000_000,
+    "AP2": 2_000_000,
+    "TA":        0,    # TA/RA get no priority bonus — used as fill-in only
+    "RA":        0,
+}
+
+WILL_TAGS = {
+    "Willingness-Exact", "Willingness-ACPOnline",
+    "Willingness-SessionFlip", "Willingness-±1Day", "Willingness-ValAdj"
+}
+
+SAT_DESIG = {"TA", "RA"}   # only these may take Saturday duties without relaxation
+
+AUTO_TAGS = ["Auto-Assigned", "OR-Assigned", "Gap-Fill",
+             "Gap-Fill-R2", "Gap-Fill-R3", "Gap-Fill-R4"]
+
+
+# ═══════════════════════════════════════════════════════════════ #
+#                      FACULTY REGISTRY                          #
+# ═══════════════════════════════════════════════════════════════ #
+VAL_COLS    = ["V1", "V2", "V3", "V4", "V5"]
+SCHOOL_COLS = ("school", "department", "dept")   # optional partition column (any case)
+
+def clean_name(x):
+    return str(x).strip().lower()
+
+def _parse_dates(col):
+    return pd.to_datetime(col, dayfirst=True, errors="coerce", format="mixed")
+
+
+class FacultyRecord:
+    __slots__ = ("name", "clean", "designation", "rule_desig", "submit_type",
+                 "val_dates", "qp_dates", "phone", "school")
+
+    def __init__(self, name, designation, val_dates, qp_dates, phone="", school=""):
+        self.name        = name
+        self.clean       = clean_name(name)
+        self.designation = designation
+        self.rule_desig  = designation if designation in DESIG_RULES else "TA"
+        # Calendar the faculty picks willingness dates from (ACP → Offline)
+        self.submit_type = "Online" if designation == "P" else "Offline"
+        self.val_dates   = val_dates     # frozenset of datetime.date
+        self.qp_dates    = qp_dates      # sorted tuple of datetime.date
+        self.phone       = phone
+        self.school      = school        # "" = shared pool / single-school portal
+
+    @property
+    def required(self):
+        return DESIG_RULES[self.rule_desig][0]
+
+
+class FacultyRegistry:
+    """All Faculty_Master rows, in file order, with name lookups.
+
+    Duplicate names keep every row in ``records``; ``get`` returns the
+    first match and the per-name maps (``fac_d``, ``val_dates``) the last,
+    as the optimizer always has.
+    """
+
+    def __init__(self, records):
+        self.records   = list(records)
+        self.names     = list(dict.fromkeys(r.name for r in self.records))
+        self.by_clean  = {}
+        for r in self.records:
+            self.by_clean.setdefault(r.clean, r)
+        self.fac_d     = {r.name: r.rule_desig for r in self.records}
+        self.val_dates = {r.name: set(r.val_dates) for r in self.records}
+        self.school    = {r.name: r.school for r in self.records}
+
+    def __len__(self):
+        return len(self.records)
+
+    def get(self, sel_clean):
+        return self.by_clean.get(sel_clean)
+
+    def groups(self):
+        dgroups = defaultdict(list)
+        for n, d in self.fac_d.items():
+            dgroups[d].append(n)
+        return dgroups
+
+    @staticmethod
+    def normalize(fr):
+        """Raw Faculty_Master sheet → typed columns (dates as sorted date lists)."""
+        fr = fr.copy()
+        fr.columns = fr.columns.astype(str).str.strip()
+        col_names  = fr.columns.tolist()
+        if len(col_names) < 2:
+            raise ValueError("Faculty_Master.xlsx must have at least 2 columns.")
+        fr = fr.rename(columns={col_names[0]: "Name", col_names[1]: "Designation"})
+        fr = fr.dropna(subset=["Name"]).reset_index(drop=True)
+
+        def date_lists(cols):
+            if not cols:
+                return [[] for _ in range(len(fr))]
+            parsed = pd.concat([_parse_dates(fr[c]).dt.date for c in cols], axis=1)
+            return [sorted({d for d in row if pd.notna(d)})
+                    for row in parsed.itertuples(index=False)]
+
+        vcols  = [c for c in VAL_COLS if c in fr.columns]
+        qcols  = [c for c in fr.columns if "QP" in c.upper() and "DATE" in c.upper()]
+        pcols  = [c for c in fr.columns
+                  if any(t in c.lower() for t in ("phone", "mobile", "whatsapp"))]
+        scols  = [c for c in fr.columns if c.lower() in SCHOOL_COLS]
+
+        def text(cols):
+            if not cols:
+                return pd.Series([""] * len(fr), dtype=object)
+            return fr[cols[0]].fillna("").astype(str).str.strip().str.removesuffix(".0").astype(object)
+
+        return pd.DataFrame({
+            "Name":        fr["Name"].astype(str).str.strip().astype(object),
+            "Designation": fr["Designation"].astype(str).str.strip().str.upper().astype(object),
+            "Phone":       text(pcols),
+            "School":      text(scols),
+            "Val_Dates":   date_lists(vcols),
+            "QP_Dates":    date_lists(qcols),
+        })
+
+    @classmethod
+    def from_frame(cls, df):
+        return cls(FacultyRecord(n, d, frozenset(v), tuple(q), p, sc) for n, d, p, sc, v, q in
+                   zip(df["Name"], df["Designation"], df["Phone"], df["School"],
+                       df["Val_Dates"], df["QP_Dates"]))
+
+    @classmethod
+    def from_excel(cls, path):
+        return cls.from_frame(cls.normalize(pd.read_excel(path)))
+
+
+# ═══════════════════════════════════════════════════════════════ #
+#                  WILLINGNESS SCORE MATRIX                      #
+# ═══════════════════════════════════════════════════════════════ #
+SESSIONS   = ("FN", "AN")
+DUTY_TYPES = ("Online", "Offline")
+
+BIZ_WEEKMASK = "1111100"    # Mon–Fri; Saturday exam days are not working days for adjacency
+BIZ_PAD_DAYS = 21           # calendar margin around the exam period
+
+
+class BizCalendar:
+    """Business days around one exam period, built once per run.
+
+    Every day in the window gets the count of business days up to and
+    including it, so "k business days after/before" is an index into the
+    sorted business-day array — one vectorised lookup for all willingness
+    rows.  Holidays are excluded like weekends.  Dates outside the window
+    map to NaT, which never matches a slot.
+    """
+
+    def __init__(self, start, end, holidays=(), weekmask=BIZ_WEEKMASK, pad=BIZ_PAD_DAYS):
+        self.holidays = sorted({np.datetime64(h, "D") for h in holidays})
+        self.d0   = np.datetime64(start, "D") - pad
+        days      = np.arange(self.d0, np.datetime64(end, "D") + pad + 1, dtype="datetime64[D]")
+        self.is_biz = np.is_busday(days, weekmask=weekmask, holidays=self.holidays)
+        self.cum  = np.cumsum(self.is_biz)          # business days in [d0, day]
+        self.biz  = days[self.is_biz]
+
+    @classmethod
+    def for_slots(cls, slots, holidays=()):
+        dates = [s["date"] for s in slots] or [np.datetime64("today", "D")]
+        return cls(min(dates), max(dates), holidays)
+
+    def _offsets(self, days):
+        off = (np.asarray(days, dtype="datetime64[D]") - self.d0).astype(np.int64)
+        return off, (off >= 0) & (off < len(self.cum))
+
+    def ordinal(self, days):
+        """Business-day index of each date (-1 outside the window); a
+        non-business day shares the index of the business day before it."""
+        off, ok = self._offsets(days)
+        out = np.full(off.shape, -1, dtype=np.int64)
+        out[ok] = self.cum[off[ok]] - 1
+        return out
+
+    def count(self, start, end):
+        """Business days in [start, end]."""
+        a, b = self.ordinal(np.array([start, end], dtype="datetime64[D]"))
+        return int(b - a + self.is_biz[self._offsets([start])[0][0]])
+
+    def shift(self, days, k):
+        """The k-th business day after (k > 0) or before (k < 0) each date."""
+        off, ok = self._offsets(days)
+        j = np.full(off.shape, -1, dtype=np.int64)
+        before = self.cum[off[ok]] - self.is_biz[off[ok]]     # business days strictly before
+        j[ok] = before + k if k < 0 else self.cum[off[ok]] + k - 1
+        ok &= (j >= 0) & (j < len(self.biz))
+        out = np.full(off.shape, np.datetime64("NaT"), dtype="datetime64[D]")
+        out[ok] = self.biz[j[ok]]
+        return out
+
+    def shift_date(self, d, k):
+        """Scalar shift() for a datetime.date; None outside the window."""
+        out = self.shift(np.array([d], dtype="datetime64[D]"), k)[0]
+        return None if np.isnat(out) else out.astype(object)
+
+
+class ScoreMatrix:
+    """Willingness scores as a faculty × slot-key int32 matrix.
+
+    Rows follow ``names`` (first occurrence wins), columns follow the
+    unique (date, session, type) keys of the slot list.
+    """
+
+    def __init__(self, names, slots):
+        self.names = list(dict.fromkeys(names))
+        self.fidx  = {n: i for i, n in enumerate(self.names)}
+        self.keys  = list(dict.fromkeys((s["date"], s["session"], s["type"]) for s in slots))
+        self.kidx  = {k: j for j, k in enumerate(self.keys)}
+        self.M     = np.zeros((len(self.names), len(self.keys)), dtype=np.int32)
+
+        # Key arrays + a dense (day, session, type) → column lookup table
+        self.k_day  = np.array([k[0] for k in self.keys], dtype="datetime64[D]")
+        self.k_sess = np.array([SESSIONS.index(k[1]) for k in self.keys], dtype=np.int8)
+        self.k_type = np.array([DUTY_TYPES.index(k[2]) for k in self.keys], dtype=np.int8)
+        if self.keys:
+            self.d0  = self.k_day.min()
+            span     = int((self.k_day.max() - self.d0).astype(int)) + 1
+            self.lut = np.full((span, 2, 2), -1, dtype=np.int32)
+            self.lut[(self.k_day - self.d0).astype(int), self.k_sess, self.k_type] = np.arange(len(self.keys))
+        else:
+            self.d0, self.lut = np.datetime64("1970-01-01"), np.full((0, 2, 2), -1, dtype=np.int32)
+
+    def lookup(self, days, sess, tp):
+        """Column index per (day, session, type) triple, -1 where no slot exists."""
+        off = (np.asarray(days, dtype="datetime64[D]") - self.d0).astype(int)
+        ok  = (off >= 0) & (off < len(self.lut))
+        out = np.full(off.shape, -1, dtype=np.int32)
+        out[ok] = self.lut[off[ok], np.broadcast_to(sess, off.shape)[ok],
+                           np.broadcast_to(tp, off.shape)[ok]]
+        return out
+
+    def apply(self, rows, cols, value, valid=True):
+        """Layer ``value`` onto (rows, cols) with np.maximum."""
+        m = (cols >= 0) & valid
+        np.maximum.at(self.M, (rows[m], cols[m]), value)
+
+    def get(self, name, key):
+        i, j = self.fidx.get(name), self.kidx.get(key)
+        return 0 if i is None or j is None else int(self.M[i, j])
+
+    def column(self, key):
+        return self.M[:, self.kidx[key]]
+
+
+def build_score_matrix(names, fac_d, slots, wdf, fac_val_dates, non_sub, cal=None):
+    """Layer exact / ACP-online / flip / ±1 biz-day / val-adjacent / baseline
+    scores, each as one vectorised pass over the willingness rows.
+    ``cal`` is the run's BizCalendar (weekends only when omitted)."""
+    cal     = cal or BizCalendar.for_slots(slots)
+    sm      = ScoreMatrix(names, slots)
+    desig   = [fac_d.get(n, "TA") for n in sm.names]
+    allow   = np.array([[tp in DESIG_RULES[d][2] for tp in DUTY_TYPES] for d in desig], dtype=bool)
+    is_acp  = np.array([d == "ACP" for d in desig], dtype=bool)
+    ONLINE, OFFLINE = DUTY_TYPES.index("Online"), DUTY_TYPES.index("Offline")
+
+    # ── Willingness layers ────────────────────────────────────────
+    if wdf is not None and not wdf.empty:
+        f    = pd.Index(sm.names).get_indexer(wdf["Faculty"].astype(str).str.strip())
+        keep = f >= 0
+        f    = f[keep]
+        day  = wdf["Date"].values[keep].astype("datetime64[D]")
+        sraw = wdf["Session"].astype(str).str.strip().str.upper().values[keep]
+        sess = np.where(sraw == "FN", 0, np.where(sraw == "AN", 1, -1)).astype(np.int8)
+        opp  = np.where(sess == 0, 1, 0).astype(np.int8)   # anything but FN flips to FN
+
+        for tp in (ONLINE, OFFLINE):
+            ok_tp = allow[f, tp]
+            # Exact date + session
+            cols = np.where(sess >= 0, sm.lookup(day, np.maximum(sess, 0), tp), -1)
+            sm.apply(f, cols, W_EXACT, ok_tp)
+            # Session flip: same date, opposite session
+            sm.apply(f, sm.lookup(day, opp, tp), W_FLIP, ok_tp)
+            # ±1 business day (only where an exam slot exists)
+            for steps in (+1, -1):
+                adj = cal.shift(day, steps)
+                for s2 in (0, 1):
+                    sm.apply(f, sm.lookup(adj, s2, tp), W_ADJ1, ok_tp)
+
+        # ACP: submitted offline date → also usable for online slot
+        for s2 in (0, 1):
+            sm.apply(f, sm.lookup(day, s2, ONLINE), W_ACP_ONLINE, is_acp[f])
+
+    # ── Valuation-adjacent bonus: day before/after each val date ──
+    vf = [(i, d) for i, n in enumerate(sm.names) for d in fac_val_dates.get(n, ())]
+    if vf:
+        f   = np.array([i for i, _ in vf], dtype=np.int64)
+        day = np.array([d for _, d in vf], dtype="datetime64[D]")
+        for steps in (+1, -1):
+            adj = cal.shift(day, steps)
+            for s2 in (0, 1):
+                for tp in (ONLINE, OFFLINE):
+                    sm.apply(f, sm.lookup(adj, s2, tp), W_VAL_ADJ, allow[f, tp])
+
+    # ── Non-submitted faculty: baseline for every eligible slot ───
+    ns = np.array([sm.fidx[n] for n in dict.fromkeys(non_sub) if n in sm.fidx], dtype=np.int64)
+    if len(ns):
+        base = np.where(allow[ns][:, sm.k_type], W_NON_SUB, 0).astype(np.int32)
+        sm.M[ns] = np.maximum(sm.M[ns], base)
+    return sm
+
+
+# ═══════════════════════════════════════════════════════════════ #
+#                 INDEXED GREEDY ENGINE  (Pass 1)                #
+# ═══════════════════════════════════════════════════════════════ #
+class GreedyEngine:
+    """Greedy allocator equivalent to sorting every faculty per slot by
+    (-DESIG_PRIORITY, -score, alloc_count), without the full scan.
+
+    Candidates with a nonzero score for a slot come from a reverse index
+    built once from the ScoreMatrix.  Zero-score candidates come from one heap per
+    designation keyed by (alloc_count, faculty order), updated lazily as
+    assignments are committed.  ``rank`` replaces the faculty order in every
+    tie-break (multi-start runs pass a random permutation).
+    """
+
+    def __init__(self, score, fac_d, slots, fac_val_dates,
+                 acp_online_limit, acp_offline_limit, rank=None):
+        self.score = score
+        self.names = score.names
+        self.idx   = score.fidx
+        self.rank  = list(range(len(self.names))) if rank is None else [int(r) for r in rank]
+        self.inv   = sorted(range(len(self.names)), key=self.rank.__getitem__)
+        self.desig = [fac_d[n] for n in self.names]
+        self.val   = [fac_val_dates.get(n, set()) for n in self.names]
+        self.lim   = [{"Online":  acp_online_limit.get(n, 1),
+                       "Offline": acp_offline_limit.get(n, 1)} for n in self.names]
+
+        nf = len(self.names)
+        self.alloc_count    = [0] * nf
+        self.used_dates     = [set() for _ in range(nf)]
+        self.acp_type_count = [{"Online": 0, "Offline": 0} for _ in range(nf)]
+
+        # Priority tiers: designations sharing a DESIG_PRIORITY compete on score
+        tiers = defaultdict(list)
+        for d in DESIG_RULES:
+            tiers[DESIG_PRIORITY.get(d, 0)].append(d)
+        self.tiers = [tiers[p] for p in sorted(tiers, reverse=True)]
+
+        # Reverse index: slot key → designation → [(faculty idx, score)]
+        desig_arr   = np.array(self.desig)
+        self.scored = defaultdict(lambda: defaultdict(list))
+        for k, j in score.kidx.items():
+            col = score.M[:, j]
+            ix  = np.flatnonzero(col > 0)
+            for d in np.unique(desig_arr[ix]):
+                sel = ix[desig_arr[ix] == d]
+                self.scored[k][d] = list(zip(sel.tolist(), col[sel].tolist()))
+
+        # Zero-score heaps — faculty scored on every slot of their types never need one
+        allow  = np.array([[t in DESIG_RULES[d][2] for t in DUTY_TYPES] for d in self.desig],
+                          dtype=bool).reshape(nf, len(DUTY_TYPES))[:, score.k_type]
+        unscored = (allow & (score.M <= 0)).any(axis=1)
+        self.heaps  = defaultdict(list)
+        self.heaped = set(np.flatnonzero(unscored).tolist())
+        for i in sorted(self.heaped):
+            self.heaps[self.desig[i]].append((0, self.rank[i]))
+        for h in self.heaps.values():
+            heapq.heapify(h)
+
+    # ── Eligibility ───────────────────────────────────────────────
+    def remaining(self, i):
+        return DESIG_RULES[self.desig[i]][0] - self.alloc_count[i]
+
+    def ok(self, i, dt_, tp_):
+        desig_ = self.desig[i]
+        if tp_ not in DESIG_RULES[desig_][2]:                    return False
+        if dt_ in self.val[i]:                                    return False
+        if dt_ in self.used_dates[i]:                             return False
+        if self.remaining(i) <= 0:                                return False
+        if dt_.weekday() == 5 and desig_ not in SAT_DESIG:       return False
+        if desig_ == "ACP" and self.acp_type_count[i][tp_] >= self.lim[i][tp_]:
+            return False
+        return True
+
+    def commit(self, i, dt_, tp_):
+        self.alloc_count[i] += 1
+        self.used_dates[i].add(dt_)
+        if self.desig[i] == "ACP":
+            self.acp_type_count[i][tp_] += 1
+        if self.remaining(i) > 0 and i in self.heaped:
+            heapq.heappush(self.heaps[self.desig[i]], (self.alloc_count[i], self.rank[i]))
+
+    # ── Zero-score candidates from the designation heaps ──────────
+    def _pop_unscored(self, desig_, key, dt_, tp_, need):
+        heap  = self.heaps.get(desig_)
+        if not heap:
+            return []
+        skip  = {i for i, _ in self.scored[key][desig_]}
+        found, held = [], []
+        while heap and len(found) < need:
+            cnt, r = heapq.heappop(heap)
+            i = self.inv[r]
+            if cnt != self.alloc_count[i] or self.remaining(i) <= 0:
+                continue                      # stale or exhausted — drop
+            if i in skip or not self.ok(i, dt_, tp_):
+                held.append((cnt, r))
+                continue
+            found.append((cnt, r))
+        for e in held + found:
+            heapq.heappush(heap, e)
+        return found
+
+    def fill_slot(self, dt_, sess, tp_, required):
+        """Pick and commit up to ``required`` faculty for one slot.
+        Returns [(name, score)] in the same order the full sort would."""
+        key, picks, need = (dt_, sess, tp_), [], required
+        for tier in self.tiers:
+            if need <= 0:
+                break
+            desigs = [d for d in tier
+                      if tp_ in DESIG_RULES[d][2]
+                      and (dt_.weekday() != 5 or d in SAT_DESIG)]
+            if not desigs:
+                continue
+            cands = [(i, sc) for d in desigs for i, sc in self.scored[key][d]
+                     if self.ok(i, dt_, tp_)]
+            cands.sort(key=lambda z: (-z[1], self.alloc_count[z[0]], self.rank[z[0]]))
+            picks += cands[:need]
+            need  -= len(cands[:need])
+            if need > 0:
+                zero = sorted(e for d in desigs
+                              for e in self._pop_unscored(d, key, dt_, tp_, need))
+                picks += [(self.inv[r], 0) for _, r in zero[:need]]
+                need  -= len(zero[:need])
+        for i, _ in picks:
+            self.commit(i, dt_, tp_)
+        return [(self.names[i], sc) for i, sc in picks]
+
+
+# ═══════════════════════════════════════════════════════════════ #
+#               SLOT COMPLETION ENGINE  (relax 0-3)              #
+# ═══════════════════════════════════════════════════════════════ #
+N_RELAX = 4
+
+class CompletionEngine:
+    """Slot Completion Pass state with vectorised candidate lookup.
+
+    Static rules (duty type, valuation date, Saturday) are folded into one
+    packed bitset per (date, type, relax level), built once.  Dynamic rules
+    (remaining capacity, ACP per-type limit, same-date duty) are kept as
+    boolean arrays updated on every commit, so "best eligible faculty for
+    this slot at relax level k" is a handful of array ops plus a sort of
+    the survivors only.
+    """
+
+    def __init__(self, score, fac_d, slots, fac_val_dates,
+                 acp_online_limit, acp_offline_limit):
+        self.score = score
+        self.names = score.names
+        self.idx   = score.fidx
+        nf         = len(self.names)
+        desig      = [fac_d[n] for n in self.names]
+        self.nf    = nf
+        self.prio  = np.array([DESIG_PRIORITY.get(d, 0) for d in desig], dtype=np.int64)
+        self.cap   = np.array([DESIG_RULES[d][1] for d in desig], dtype=np.int32)
+        self.acp   = np.array([d == "ACP" for d in desig], dtype=bool)
+        self.lim   = {"Online":  np.array([acp_online_limit.get(n, 1)  for n in self.names]),
+                      "Offline": np.array([acp_offline_limit.get(n, 1) for n in self.names])}
+
+        # Remaining-capacity and dynamic-rule state
+        self.cur_alloc = np.zeros(nf, dtype=np.int32)
+        self.acp_tc    = {"Online":  np.zeros(nf, dtype=np.int32),
+                          "Offline": np.zeros(nf, dtype=np.int32)}
+        dates          = sorted({s["date"] for s in slots})
+        self.didx      = {d: j for j, d in enumerate(dates)}
+        self.busy      = np.zeros((len(dates), nf), dtype=bool)   # date → has duty
+        self.slot_filled = defaultdict(int)
+        self.relax_wall  = [0.0] * N_RELAX     # time / seats per relax level, for the run profile
+        self.relax_picks = [0] * N_RELAX
+
+        # Static eligibility bitsets per (date, type, relax)
+        type_ok = {tp: np.array([tp in DESIG_RULES[d][2] for d in desig], dtype=bool)
+                   for tp in {s["type"] for s in slots}}
+        sat_ok  = np.array([d in SAT_DESIG for d in desig], dtype=bool)
+        val_ix  = defaultdict(list)
+        for i, n in enumerate(self.names):
+            for d in fac_val_dates.get(n, ()):
+                val_ix[d].append(i)
+        self.static = {}
+        for d, tp in {(s["date"], s["type"]) for s in slots}:
+            on_val = np.zeros(nf, dtype=bool)
+            on_val[val_ix.get(d, [])] = True
+            r3     = type_ok[tp]
+            r2     = r3 & ~on_val
+            r0     = r2 & sat_ok if d.weekday() == 5 else r2
+            self.static[(d, tp)] = [np.packbits(m) for m in (r0, r0, r2, r3)]
+
+    def scores(self, key):
+        return self.score.column(key).astype(np.int64)
+
+    def commit(self, i, dt_, sess, tp_):
+        self.cur_alloc[i] += 1
+        self.busy[self.didx[dt_], i] = True
+        if self.acp[i]:
+            self.acp_tc[tp_][i] += 1
+        self.slot_filled[(dt_, sess, tp_)] += 1
+
+    def load(self, assigned):
+        """Seed state from the solver's assignments."""
+        for row in assigned:
+            self.commit(self.idx[row["Name"]], row["Date"], row["Session"], row["Type"])
+
+    def gaps(self, slots):
+        return sum(max(0, s["required"] - self.slot_filled.get((s["date"], s["session"], s["type"]), 0))
+                   for s in slots)
+
+    def candidates(self, dt_, tp_, relax, scores):
+        """Eligible faculty at ``relax``, ordered by
+        (-DESIG_PRIORITY, -score, cur_alloc, faculty order)."""
+        mask  = np.unpackbits(self.static[(dt_, tp_)][relax], count=self.nf).view(bool)
+        mask &= self.cur_alloc < self.cap
+        mask &= ~self.acp | (self.acp_tc[tp_] < self.lim[tp_])
+        if relax < 1:
+            mask &= ~self.busy[self.didx[dt_]]
+        ix = np.flatnonzero(mask)
+        order = np.lexsort((ix, self.cur_alloc[ix], -scores[ix], -self.prio[ix]))
+        return ix[order]
+
+    def fill(self, sl):
+        """Fill one slot's remaining seats, relaxing rules level by level.
+        Returns ([(name, relax)], seats still unfilled)."""
+        dt_, sess, tp_ = sl["date"], sl["session"], sl["type"]
+        key    = (dt_, sess, tp_)
+        needed = sl["required"] - self.slot_filled[key]
+        picks  = []
+        if needed <= 0:
+            return picks, 0
+        scores = self.scores(key)
+        for relax in range(N_RELAX):
+            if needed <= 0:
+                break
+            t = time.perf_counter()
+            for i in self.candidates(dt_, tp_, relax, scores)[:needed]:
+                self.commit(i, dt_, sess, tp_)
+                picks.append((self.names[i], relax))
+                self.relax_picks[relax] += 1
+                needed -= 1
+            self.relax_wall[relax] += time.perf_counter() - t
+        return picks, needed
+
+
+# ═══════════════════════════════════════════════════════════════ #
+#             EXACT SOLVER  (CP-SAT, MILP fallback)              #
+# ═══════════════════════════════════════════════════════════════ #
+W_SEAT          = 1_000_000   # per covered seat — dominates everything else
+W_DUTY          =   500_000   # per assigned duty — quotas before willingness
+MAX_EXACT_VARS  = 400_000     # above this, zero-score pairs are pruned from the model
+EXACT_BACKENDS  = [b for b, ok in (("CP-SAT", ORTOOLS_OK), ("MILP", SCIPY_OK)) if ok]
+
+def exact_pairs(score, fac_d, fac_val_dates, hint=(), max_vars=MAX_EXACT_VARS):
+    """Statically eligible (faculty row, slot column) pairs: duty type,
+    valuation date and Saturday rules.  Zero-score pairs are dropped when
+    the model would exceed ``max_vars`` (hinted pairs are always kept)."""
+    desig  = [fac_d[n] for n in score.names]
+    allow  = np.array([[t in DESIG_RULES[d][2] for t in DUTY_TYPES] for d in desig],
+                      dtype=bool).reshape(len(desig), len(DUTY_TYPES))
+    sat_ok = np.array([d in SAT_DESIG for d in desig], dtype=bool)
+    val_ix = defaultdict(list)
+    for i, n in enumerate(score.names):
+        for d in fac_val_dates.get(n, ()):
+            val_ix[d].append(i)
+
+    elig = allow[:, score.k_type].copy()
+    for j, (d, _, _) in enumerate(score.keys):
+        elig[val_ix.get(d, []), j] = False
+        if d.weekday() == 5:
+            elig[~sat_ok, j] = False
+    pruned = elig.sum() > max_vars
+    if pruned:
+        keep = score.M > 0
+        for i, j in hint:
+            keep[i, j] = True
+        elig &= keep
+    rows, cols = np.nonzero(elig)
+    return rows, cols, pruned
+
+
+def solve_exact(score, fac_d, slots, fac_val_dates,
+                acp_online_limit, acp_offline_limit, hint,
+                time_limit=60.0, workers=4, log=print):
+    """Maximise  W_SEAT·covered seats + Σ (W_DUTY + score)·assignments
+    subject to duty quotas, one duty per date, ACP per-type limits and the
+    static rules.  Like greedy Pass 2, duties beyond a slot's requirement
+    are allowed but earn no seat credit.  ``hint`` is the greedy solution as
+    [(name, key)]; it seeds CP-SAT and is the bar the exact result has to beat.
+
+    Returns (pairs, info) where ``pairs`` is [(name, key)] or None when the
+    greedy solution should be kept."""
+    info = {"backend": None, "status": "skipped", "objective": None, "hint_objective": None}
+    if not EXACT_BACKENDS:
+        log("  ⚠ Exact mode needs OR-Tools or SciPy — keeping greedy result")
+        return None, info
+
+    hint_ix = {(score.fidx[n], score.kidx[k]) for n, k in hint}
+    rows, cols, pruned = exact_pairs(score, fac_d, fac_val_dates, hint_ix)
+    nv, nk = len(rows), len(score.keys)
+    w   = W_DUTY + score.M[rows, cols].astype(np.int64)
+    req = np.zeros(nk, dtype=np.int64)
+    for s in slots:
+        req[score.kidx[(s["date"], s["session"], s["type"])]] += s["required"]
+
+    def objective(pairs):
+        per_slot = np.bincount([j for _, j in pairs], minlength=nk) if pairs else np.zeros(nk, int)
+        return int(W_SEAT * np.minimum(per_slot, req).sum()
+                   + sum(W_DUTY + int(score.M[i, j]) for i, j in pairs))
+
+    hint_obj = objective(list(hint_ix))
+    info["hint_objective"] = hint_obj
+    log(f"  Exact model        : {nv} variables"
+        + ("  (zero-score pairs pruned)" if pruned else ""))
+
+    # ── Constraint groups (lists of variable indices + upper bound) ─
+    by_slot = defaultdict(list)
+    groups  = defaultdict(list)
+    for v, (i, j) in enumerate(zip(rows.tolist(), cols.tolist())):
+        by_slot[j].append(v)
+        groups[("fac", i)].append(v)
+        groups[("date", i, score.keys[j][0])].append(v)
+        if fac_d[score.names[i]] == "ACP":
+            groups[("acp", i, score.keys[j][2])].append(v)
+
+    def bound(g):
+        if g[0] == "fac":
+            return DESIG_RULES[fac_d[score.names[g[1]]]][1]
+        if g[0] == "date":
+            return 1
+        lim = acp_online_limit if g[2] == "Online" else acp_offline_limit
+        return lim.get(score.names[g[1]], 1)
+
+    cons  = [(vs, bound(g)) for g, vs in groups.items() if len(vs) > bound(g)]
+    slots_ = [j for j in range(nk) if req[j] > 0 and by_slot[j]]
+
+    backend = EXACT_BACKENDS[0]
+    info["backend"] = backend
+    chosen = None
+    if backend == "CP-SAT":
+        model = cp_model.CpModel()
+        x = [model.NewBoolVar(f"x{v}") for v in range(nv)]
+        y = {j: model.NewIntVar(0, int(req[j]), f"y{j}") for j in slots_}   # covered seats
+        for vs, ub in cons:
+            if ub == 1:
+                model.AddAtMostOne(x[v] for v in vs)
+            else:
+                model.Add(sum(x[v] for v in vs) <= ub)
+        for j in slots_:
+            model.Add(y[j] <= sum(x[v] for v in by_slot[j]))
+        model.Maximize(W_SEAT * sum(y.values())
+                       + sum(int(w[v]) * x[v] for v in range(nv)))
+        per_slot = defaultdict(int)
+        for v, (i, j) in enumerate(zip(rows.tolist(), cols.tolist())):
+            on = (i, j) in hint_ix
+            model.AddHint(x[v], on)
+            per_slot[j] += on
+        for j in slots_:
+            model.AddHint(y[j], min(per_slot[j], int(req[j])))
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = float(time_limit)
+        solver.parameters.num_workers         = max(int(workers), 1)
+        st_ = solver.Solve(model)
+        info["status"] = solver.StatusName(st_)
+        if st_ in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            chosen = [v for v in range(nv) if solver.BooleanValue(x[v])]
+    else:
+        # Variables: x (nv binaries) then y (one integer per slot)
+        ny = len(slots_)
+        A_rows, A_cols, A_vals, ub = [], [], [], []
+        for r, (vs, b) in enumerate(cons):
+            A_rows += [r] * len(vs); A_cols += vs; A_vals += [1] * len(vs)
+            ub.append(b)
+        for t, j in enumerate(slots_):
+            r = len(ub)
+            A_rows += [r] * (len(by_slot[j]) + 1)
+            A_cols += by_slot[j] + [nv + t]
+            A_vals += [-1] * len(by_slot[j]) + [1]
+            ub.append(0)
+        A = csc_matrix((A_vals, (A_rows, A_cols)), shape=(len(ub), nv + ny))
+        c = -np.concatenate([w, np.full(ny, W_SEAT)]).astype(float)
+        res = milp(c,
+                   constraints=[LinearConstraint(A, -np.inf, ub)] if ub else [],
+                   integrality=np.ones(nv + ny),
+                   bounds=Bounds(0, np.concatenate([np.ones(nv), req[slots_]])),
+                   options={"time_limit": float(time_limit), "disp": False})
+        info["status"] = res.message
+        if res.x is not None:
+            chosen = np.flatnonzero(res.x[:nv] > 0.5).tolist()
+
+    if chosen is not None:
+        info["objective"] = objective([(rows[v], cols[v]) for v in chosen])
+    if chosen is None or info["objective"] <= hint_obj:
+        log(f"  {backend}: {info['status']} — no improvement over greedy "
+            f"({info['objective']} vs {hint_obj}), keeping greedy result")
+        return None, info
+    log(f"  {backend}: {info['status']} — objective {info['objective']} "
+        f"(greedy {hint_obj})")
+    return [(score.names[rows[v]], score.keys[cols[v]]) for v in chosen], info
+
+
+# ═══════════════════════════════════════════════════════════════ #
+#              MIN-COST FLOW SOLVER  (OR-Tools graph)             #
+# ═══════════════════════════════════════════════════════════════ #
+MAX_FLOW_ARCS   = 20_000_000   # faculty → slot arcs; zero-score ones pruned above this
+
+def solve_flow(score, fac_d, slots, fac_val_dates,
+               acp_online_limit, acp_offline_limit, log=print):
+    """Seats, then quotas, then willingness as a min-cost flow — a fast
+    heuristic, not an exact solve:
+
+        source → faculty            quota, −(W_DUTY + tier bonus)
+        faculty → ACP type node     ACP only, per-type limit
+        → (faculty, date) gadget    capacity 1: one duty per date
+        gadget → slot               capacity 1, −score (+ tier bonus if willing)
+        slot → sink                 required seats at −W_SEAT, then free
+        source → sink               bypass for unused quota
+
+    The tier bonus is the designation's DESIG_PRIORITY tier × (top score
+    + 1), so, as in greedy, a senior's willingness outranks a junior's
+    whatever their scores; W_SEAT is raised above the largest pair value
+    so covered seats still come first.
+
+    An ACP gets one gadget per (type, date), so flow can give them an
+    Online and an Offline duty on the same date.  Those clashes are
+    repaired afterwards by dropping the lower-scored duty, and its seat
+    is left to the Slot Completion Pass.
+
+    Returns (pairs, info) where ``pairs`` is [(name, key)]."""
+    info = {"backend": "min-cost flow", "status": "skipped", "objective": None}
+    if not FLOW_OK:
+        log("  ⚠ Min-cost flow needs OR-Tools — keeping greedy result")
+        return None, info
+
+    names, keys = score.names, score.keys
+    nf, nk      = len(names), len(keys)
+    rows, cols, pruned = exact_pairs(score, fac_d, fac_val_dates, max_vars=MAX_FLOW_ARCS)
+    desig = [fac_d[n] for n in names]
+    quota = np.array([DESIG_RULES[d][1] for d in desig], dtype=np.int64)
+    tiers = sorted(set(DESIG_PRIORITY.values()))
+    top   = int(score.M.max(initial=0)) + 1
+    bonus = np.array([tiers.index(DESIG_PRIORITY.get(d, 0)) * top for d in desig], dtype=np.int64)
+    value = score.M[rows, cols].astype(np.int64)
+    value += np.where(value >= W_VAL_ADJ, bonus[rows], 0)
+    w_seat = max(W_SEAT, int(value.max(initial=0)) + 1)
+    acp   = np.array([d == "ACP" for d in desig], dtype=bool)
+    req   = np.zeros(nk, dtype=np.int64)
+    for s in slots:
+        req[score.kidx[(s["date"], s["session"], s["type"])]] += s["required"]
+    dates    = sorted({k[0] for k in keys})
+    k_date   = np.array([dates.index(k[0]) for k in keys], dtype=np.int64) if nk else np.zeros(0, int)
+    limit    = np.array([[acp_online_limit.get(n, 1), acp_offline_limit.get(n, 1)]
+                         for n in names], dtype=np.int64).reshape(nf, 2)
+
+    # ── Node ids: source, sink, faculty, ACP type nodes, gadgets, slots ─
+    S, T    = 0, 1
+    fac0    = 2
+    acp_ix  = np.flatnonzero(acp)
+    type0   = fac0 + nf                                    # 2 per ACP: Online, Offline
+    acp_pos = np.full(nf, -1, dtype=np.int64)
+    acp_pos[acp_ix] = np.arange(len(acp_ix))
+    tp      = np.where(score.k_type[cols] == DUTY_TYPES.index("Online"), 0, 1)
+    split   = acp[rows]
+    gkey    = (rows * 2 + np.where(split, tp, 0)) * max(len(dates), 1) + k_date[cols]
+    gkeys, g_of_pair = np.unique(gkey, return_inverse=True)
+    gad0    = type0 + 2 * len(acp_ix)
+    slot0   = gad0 + len(gkeys)
+    g_fac   = gkeys // max(len(dates), 1) // 2
+    g_tp    = gkeys // max(len(dates), 1) % 2
+    g_par   = np.where(acp[g_fac], type0 + 2 * acp_pos[g_fac] + g_tp, fac0 + g_fac)
+
+    total = int(quota.sum())
+    tails = [np.full(nf, S), np.repeat(fac0 + acp_ix, 2), g_par,
+             gad0 + g_of_pair, slot0 + np.arange(nk), slot0 + np.arange(nk), [S]]
+    heads = [fac0 + np.arange(nf), type0 + np.arange(2 * len(acp_ix)), gad0 + np.arange(len(gkeys)),
+             slot0 + cols, np.full(nk, T), np.full(nk, T), [T]]
+    caps  = [quota, limit[acp_ix].ravel(), np.ones(len(gkeys), dtype=np.int64),
+             np.ones(len(rows), dtype=np.int64), req, np.full(nk, total), [total]]
+    costs = [-(W_DUTY + bonus), np.zeros(2 * len(acp_ix), dtype=np.int64),
+             np.zeros(len(gkeys), dtype=np.int64), -value,
+             np.full(nk, -w_seat), np.zeros(nk, dtype=np.int64), [0]]
+    cat = lambda parts: np.concatenate([np.asarray(p, dtype=np.int64) for p in parts])
+
+    mcf  = min_cost_flow.SimpleMinCostFlow()
+    arcs = mcf.add_arcs_with_capacity_and_unit_cost(cat(tails), cat(heads), cat(caps), cat(costs))
+    supply = np.zeros(slot0 + nk, dtype=np.int64)
+    supply[S], supply[T] = total, -total
+    mcf.set_nodes_supplies(np.arange(len(supply)), supply)
+    log(f"  Flow network       : {slot0 + nk} nodes, {len(arcs)} arcs"
+        + ("  (zero-score pairs pruned)" if pruned else ""))
+    status = mcf.solve()
+    info["status"] = status.name
+    if status != mcf.OPTIMAL:
+        log(f"  ⚠ Min-cost flow: {status.name} — keeping greedy result")
+        return None, info
+    info["flow_objective"] = -int(mcf.optimal_cost())
+
+    pair_arcs = arcs[nf + 2 * len(acp_ix) + len(gkeys):][:len(rows)]
+    on        = np.flatnonzero(mcf.flows(pair_arcs) > 0)
+
+    # ── ACP same-date repair: keep the higher-scored duty ────────
+    by_day = defaultdict(list)
+    for p in on:
+        if acp[rows[p]]:
+            by_day[(rows[p], k_date[cols[p]])].append(p)
+    drop = set()
+    for ps in by_day.values():
+        if len(ps) > 1:
+            ps.sort(key=lambda p: -int(value[p]))
+            drop |= set(ps[1:])
+    on = np.array([p for p in on if p not in drop], dtype=np.int64)
+
+    # Objective of what is actually returned (the flow's, less the dropped duties)
+    filled = np.minimum(np.bincount(cols[on], minlength=nk), req)
+    info["objective"]   = int((W_DUTY + bonus[rows[on]] + value[on]).sum() + w_seat * filled.sum())
+    info["acp_repairs"] = len(drop)
+    if drop:
+        info["status"] = "HEURISTIC"
+        log(f"  Min-cost flow      : solved — {len(on)} duties, objective {info['objective']} "
+            f"(flow optimum {info['flow_objective']} before repair)")
+        log(f"  ⚠ ACP same-date clashes: {len(drop)} duty(ies) dropped — their seats go to "
+            f"the Slot Completion Pass")
+    else:
+        log(f"  Min-cost flow      : OPTIMAL — {len(on)} duties, objective {info['objective']}")
+    chosen = zip(rows[on].tolist(), cols[on].tolist())
+    return [(names[i], keys[j]) for i, j in chosen], info
+
+
+# ═══════════════════════════════════════════════════════════════ #
+#                 SOLVE PIPELINE  (per partition)                #
+# ═══════════════════════════════════════════════════════════════ #
+def assignment_tag(fn, sc, non_sub):
+    if fn in non_sub:        return "Auto-Assigned"
+    if sc >= W_EXACT:        return "Willingness-Exact"
+    if sc >= W_ACP_ONLINE:   return "Willingness-ACPOnline"
+    if sc >= W_FLIP:         return "Willingness-SessionFlip"
+    if sc >= W_ADJ1:         return "Willingness-±1Day"
+    if sc >= W_VAL_ADJ:      return "Willingness-ValAdj"
+    return "OR-Assigned"
+
+
+def greedy_assign(fexp, fac_d, slots, fac_val_dates, non_sub,
+                  acp_online_limit, acp_offline_limit, rng=None, prof=NULL_PROFILE):
+    """Greedy Pass 1 (slots, largest first) + Pass 2 (remaining quotas).
+    With ``rng`` the slot sizes are jittered before the largest-first sort
+    and faculty ties go to a random permutation instead of list order."""
+    assigned = []
+    rank, order = None, sorted(slots, key=lambda s: -s["required"])
+    if rng is not None:
+        rank  = rng.permutation(len(fexp.names))
+        size  = np.array([-s["required"] for s in slots], dtype=float) \
+                * rng.uniform(1 - MULTISTART_JITTER, 1 + MULTISTART_JITTER, len(slots))
+        order = [slots[j] for j in np.argsort(size, kind="stable")]
+    with prof.stage("greedy pass 1"):
+        engine = GreedyEngine(fexp, fac_d, slots, fac_val_dates,
+                              acp_online_limit, acp_offline_limit, rank)
+
+        # Pass 1: fill slots largest-first, honouring willingness + seniority
+        for sl in order:
+            d2, s2, r2, t2 = sl["date"], sl["session"], sl["required"], sl["type"]
+            for fn, sc in engine.fill_slot(d2, s2, t2, r2):
+                assigned.append({"Name": fn, "Date": d2, "Session": s2,
+                                 "Type": t2, "Allocated_By": assignment_tag(fn, sc, non_sub)})
+
+    # Pass 2: fill remaining faculty duty quotas
+    with prof.stage("greedy pass 2"):
+        by_date = sorted(slots, key=lambda s: s["date"])
+        for i in engine.inv:
+            fn = engine.names[i]
+            if engine.remaining(i) <= 0:
+                continue
+            for sl in by_date:
+                if engine.remaining(i) <= 0:
+                    break
+                d2, s2, t2 = sl["date"], sl["session"], sl["type"]
+                if not engine.ok(i, d2, t2):
+                    continue
+                engine.commit(i, d2, t2)
+                assigned.append({"Name": fn, "Date": d2, "Session": s2,
+                                 "Type": t2, "Allocated_By": "Gap-Fill"})
+    return assigned
+
+
+def solve_assignments(names, fac_d, slots, wdf, fac_val_dates, non_sub,
+                      solver="greedy", time_limit=60, workers=4, starts=8, seed=0,
+                      processes=None, cal=None, log=print, prof=NULL_PROFILE):
+    """Score matrix → greedy Pass 1 (slots) → Pass 2 (quotas) → optional exact
+    model, for one set of faculty and slots.  ``solver="multistart"`` keeps
+    the best of ``starts`` randomised greedy runs instead; ``solver="flow"``
+    replaces greedy with the min-cost flow (greedy if it fails).  The Slot
+    Completion Pass is left to the caller.  Returns (assigned rows, score
+    matrix, method)."""
+    non_sub = set(non_sub)
+    # ACP 1+1 rule: at most one Online and one Offline duty each
+    acp_online_limit  = {n: 1 for n in names if fac_d[n] == "ACP"}
+    acp_offline_limit = dict(acp_online_limit)
+    with prof.stage("score matrix"):
+        fexp = build_score_matrix(names, fac_d, slots, wdf, fac_val_dates, non_sub, cal)
+    method = "Greedy + Slot Completion"
+
+    if solver == "flow":
+        log("  Running min-cost flow solver (quotas, one duty per date, ACP 1+1)...")
+        with prof.stage("min-cost flow"):
+            pairs, _ = solve_flow(fexp, fac_d, slots, fac_val_dates,
+                                  acp_online_limit, acp_offline_limit, log=log)
+        if pairs is not None:
+            return ([{"Name": fn, "Date": k[0], "Session": k[1], "Type": k[2],
+                      "Allocated_By": assignment_tag(fn, fexp.get(fn, k), non_sub)}
+                     for fn, k in pairs], fexp, "Min-cost Flow + Slot Completion")
+
+    if solver == "multistart":
+        log(f"  Running multi-start greedy ({starts} randomised runs, best kept)...")
+        assigned, _ = multistart_greedy(fexp, fac_d, slots, fac_val_dates, non_sub,
+                                        acp_online_limit, acp_offline_limit, starts, seed,
+                                        processes, log=log, prof=prof)
+        return assigned, fexp, f"Multi-start Greedy ×{starts} + Slot Completion"
+
+    log("  Running greedy solver (seniority + willingness priority)...")
+    assigned = greedy_assign(fexp, fac_d, slots, fac_val_dates, non_sub,
+                             acp_online_limit, acp_offline_limit, prof=prof)
+
+    # Exact solve, warm-started from greedy
+    if solver == "exact":
+        hint    = [(r["Name"], (r["Date"], r["Session"], r["Type"])) for r in assigned]
+        backend = EXACT_BACKENDS[0] if EXACT_BACKENDS else "none"
+        with prof.stage(f"exact ({backend})"):
+            pairs, _ = solve_exact(fexp, fac_d, slots, fac_val_dates,
+                                   acp_online_limit, acp_offline_limit, hint,
+                                   time_limit=time_limit, workers=workers, log=log)
+        if pairs is not None:
+            assigned = [{"Name": fn, "Date": k[0], "Session": k[1], "Type": k[2],
+                         "Allocated_By": assignment_tag(fn, fexp.get(fn, k), non_sub)}
+                        for fn, k in pairs]
+            method = f"{backend} + Slot Completion"
+    return assigned, fexp, method
+
+
+def _solve_partition(label, kwargs):
+    lines = []
+    assigned, _, method = solve_assignments(**kwargs, log=lines.append)
+    return label, assigned, method, lines
+
+
+# ═══════════════════════════════════════════════════════════════ #
+#             MULTI-START GREEDY  (process pool)                 #
+# ═══════════════════════════════════════════════════════════════ #
+MULTISTART_JITTER = 0.3     # slot sizes scaled by U(1 ± jitter) before the largest-first sort
+
+_MULTISTART = None          # one run's inputs, inherited by forked workers
+
+
+def _start_rng(seed, k):
+    """Start 0 is the deterministic greedy; start k > 0 is seeded by (seed, k)."""
+    return None if k == 0 else np.random.default_rng([seed, k])
+
+
+def _multistart_run(k):
+    """One variant: greedy + Slot Completion.  Returns (k, gaps, match %)."""
+    fexp, fac_d, slots, fac_val_dates, non_sub, acp_on, acp_off, seed = _MULTISTART
+    rows = greedy_assign(fexp, fac_d, slots, fac_val_dates, non_sub, acp_on, acp_off,
+                         rng=_start_rng(seed, k))
+    comp = CompletionEngine(fexp, fac_d, slots, fac_val_dates, acp_on, acp_off)
+    comp.load(rows)
+    total   = sum(1 for r in rows if r["Name"] not in non_sub)
+    matched = sum(1 for r in rows if r["Name"] not in non_sub and r["Allocated_By"] in WILL_TAGS)
+    for sl in slots:
+        picks, _ = comp.fill(sl)
+        total += sum(1 for fn, _ in picks if fn not in non_sub)
+    return k, comp.gaps(slots), round(100.0 * matched / total, 2) if total else 0.0
+
+
+def multistart_greedy(fexp, fac_d, slots, fac_val_dates, non_sub,
+                      acp_online_limit, acp_offline_limit, starts=8, seed=0,
+                      processes=None, log=print, prof=NULL_PROFILE):
+    """Run ``starts`` randomised greedy + completion variants and keep the one
+    with the fewest gaps, then the highest willingness match.  Workers only
+    return scores; the winner is re-run from its seed, so the result is
+    reproducible.  Start 0 is the plain greedy, so the best is never worse.
+    Returns (assigned rows, [(start, gaps, match %)])."""
+    global _MULTISTART
+    starts = max(int(starts), 1)
+    procs  = min(starts, processes or os.cpu_count() or 1)
+    t0, c0 = time.perf_counter(), time.process_time()
+    _MULTISTART = (fexp, fac_d, slots, fac_val_dates, set(non_sub),
+                   acp_online_limit, acp_offline_limit, seed)
+    try:
+        if procs > 1 and "fork" in mp.get_all_start_methods():
+            with ProcessPoolExecutor(procs, mp_context=mp.get_context("fork")) as pool:
+                results = list(pool.map(_multistart_run, range(starts)))
+        else:
+            procs   = 1
+            results = [_multistart_run(k) for k in range(starts)]
+    finally:
+        _MULTISTART = None
+    best  = min(results, key=lambda r: (r[1], -r[2], r[0]))
+    gaps  = sorted(r[1] for r in results)
+    match = sorted(r[2] for r in results)
+    prof.record("multi-start greedy", time.perf_counter() - t0, time.process_time() - c0,
+                starts=starts, seed=seed, best=best[0], gaps=[r[1] for r in results],
+                match_pct=[r[2] for r in results])
+    log(f"  Multi-start        : {starts} run(s) on {procs} process(es), seed {seed}")
+    log(f"  Match % over runs  : min {match[0]:.1f} | median {float(np.median(match)):.1f}"
+        f" | max {match[-1]:.1f}")
+    log(f"  Gaps over runs     : min {gaps[0]} | median {float(np.median(gaps)):g} | max {gaps[-1]}")
+    log(f"  Best run           : #{best[0]} — {best[1]} gap(s), {best[2]:.1f}% match"
+        + ("  (plain greedy)" if best[0] == 0 else f"  (plain greedy {results[0][2]:.1f}%)"))
+    rows = greedy_assign(fexp, fac_d, slots, fac_val_dates, set(non_sub),
+                         acp_online_limit, acp_offline_limit, rng=_start_rng(seed, best[0]),
+                         prof=prof)
+    return rows, results
+
+
+# ═══════════════════════════════════════════════════════════════ #
+#           MULTI-SCHOOL PARTITIONS  (process pool)              #
+# ═══════════════════════════════════════════════════════════════ #
+def slot_key(sl):
+    return (sl["date"], sl["session"], sl["type"])
+
+
+def residual_slots(slots, assigned):
+    """Copies of ``slots`` with ``required`` reduced by the seats already
+    taken by rows of the same school; fully covered slots are dropped."""
+    taken = defaultdict(int)
+    for r in assigned:
+        taken[(r["Date"], r["Session"], r["Type"], r.get("School", ""))] += 1
+    out = []
+    for sl in slots:
+        k   = slot_key(sl) + (sl.get("school", ""),)
+        use = min(taken[k], sl["required"])
+        taken[k] -= use
+        if sl["required"] > use:
+            out.append({**sl, "required": sl["required"] - use})
+    return out
+
+
+def merge_slots(slots):
+    """One slot per (date, session, type) with the seats of all schools summed."""
+    merged = {}
+    for sl in slots:
+        k = slot_key(sl)
+        if k in merged:
+            merged[k]["required"] += sl["required"]
+        else:
+            merged[k] = {**sl, "school": ""}
+    return list(merged.values())
+
+
+def attribute_schools(rows, slots, assigned):
+    """Give each row without a "School" the school whose seat it fills at
+    that (date, session, type) — the one still short of seats, in slot order."""
+    need, home = defaultdict(list), {}
+    for sl in slots:
+        home.setdefault(slot_key(sl), sl.get("school", ""))
+    for sl in residual_slots(slots, assigned):
+        need[slot_key(sl)].append([sl.get("school", ""), sl["required"]])
+    for r in rows:
+        if "School" in r:
+            continue
+        k     = (r["Date"], r["Session"], r["Type"])
+        open_ = need.get(k, [])
+        while open_ and open_[0][1] <= 0:
+            open_.pop(0)
+        if open_:
+            r["School"] = open_[0][0]
+            open_[0][1] -= 1
+        else:                               # over-quota duty: the slot's first school
+            r["School"] = home.get(k, "")
+    return rows
+
+
+def solve_by_school(names, fac_d, slots, wdf, fac_val_dates, non_sub, school_of,
+                    solver="greedy", time_limit=60, workers=4, processes=None, starts=8, seed=0,
+                    cal=None, log=print):
+    """Solve each school's faculty against its own slots in a process pool,
+    then let the shared pool (faculty without a school, or whose school has no
+    slots) take the seats still open anywhere.  Rows carry "School" — the
+    school whose seat they fill.  Returns (assigned rows, method)."""
+    slot_schools = {sl.get("school", "") for sl in slots} - {""}
+    fac_school   = {n: school_of.get(n, "") for n in names}
+    schools      = sorted(slot_schools & set(fac_school.values()))
+    shared       = [n for n in names if fac_school[n] not in schools]
+
+    parts = []
+    for sc in schools:
+        pn = [n for n in names if fac_school[n] == sc]
+        pset = set(pn)
+        parts.append((sc, dict(
+            names=pn, fac_d={n: fac_d[n] for n in pn},
+            slots=[sl for sl in slots if sl.get("school", "") == sc],
+            wdf=wdf[wdf["Faculty"].isin(pset)] if not wdf.empty else wdf,
+            fac_val_dates={n: fac_val_dates.get(n, set()) for n in pn},
+            non_sub=[n for n in non_sub if n in pset],
+            solver=solver, time_limit=time_limit, starts=starts, seed=seed, cal=cal)))
+
+    procs = min(len(parts), processes or os.cpu_count() or 1)
+    for _, kw in parts:
+        kw["workers"]   = max(1, workers // max(procs, 1))
+        kw["processes"] = max(1, (processes or os.cpu_count() or 1) // max(procs, 1))
+    log(f"  Partitions         : {len(parts)} school(s) on {procs} process(es)"
+        f" | shared pool {len(shared)} faculty")
+
+    results = []
+    if procs > 1 and "fork" in mp.get_all_start_methods():
+        with ProcessPoolExecutor(procs, mp_context=mp.get_context("fork")) as pool:
+            futures = [pool.submit(_solve_partition, sc, kw) for sc, kw in parts]
+            for f in as_completed(futures):
+                results.append(f.result())
+    else:
+        results = [_solve_partition(sc, kw) for sc, kw in parts]
+
+    assigned, methods = [], set()
+    for sc, rows, method, lines in sorted(results, key=lambda r: r[0]):
+        log(f"  ── {sc}: {len(rows)} duties")
+        for ln in lines:
+            log(f"    {ln.strip()}")
+        for r in rows:
+            r["School"] = sc
+        assigned += rows
+        methods.add(method)
+
+    open_slots = residual_slots(slots, assigned)
+    if shared and open_slots:
+        log(f"  ── Shared pool: {len(shared)} faculty over "
+            f"{sum(sl['required'] for sl in open_slots)} open seat(s)")
+        sset = set(shared)
+        rows, _, method = solve_assignments(
+            shared, {n: fac_d[n] for n in shared}, merge_slots(open_slots),
+            wdf[wdf["Faculty"].isin(sset)] if not wdf.empty else wdf,
+            {n: fac_val_dates.get(n, set()) for n in shared},
+            [n for n in non_sub if n in sset],
+            solver=solver, time_limit=time_limit, workers=workers, starts=starts, seed=seed,
+            processes=processes, cal=cal, log=log)
+        assigned += attribute_schools(rows, slots, assigned)
+        methods.add(method)
+
+    method = (methods.pop() if len(methods) == 1 else "Mixed + Slot Completion") \
+        if methods else "Greedy + Slot Completion"
+    return assigned, f"{method} × {len(parts)} schools"
+
+
+# ═══════════════════════════════════════════════════════════════ #
+#              INCREMENTAL RE-OPTIMIZATION  (baseline)           #
+# ═══════════════════════════════════════════════════════════════ #
+def input_snapshot(names, fac_d, slots, wdf, fac_val_dates, cal=None):
+    """JSON-able fingerprint of a run's inputs: one digest per faculty
+    (designation, valuation dates, willingness rows), seats per slot and
+    the holiday list."""
+    will = defaultdict(list)
+    if wdf is not None and not wdf.empty:
+        for n, d, s in zip(wdf["Faculty"].astype(str).str.strip(),
+                           pd.to_datetime(wdf["Date"]).dt.strftime("%Y-%m-%d"),
+                           wdf["Session"].astype(str).str.strip().str.upper()):
+            will[n].append(f"{d}|{s}")
+    faculty = {}
+    for n in names:
+        blob = "\n".join([fac_d[n], ",".join(sorted(map(str, fac_val_dates.get(n, ()))))]
+                         + sorted(will.get(n, ())))
+        faculty[n] = hashlib.sha1(blob.encode()).hexdigest()[:16]
+    seats = defaultdict(int)
+    for sl in slots:
+        seats["|".join(map(str, slot_key(sl) + (sl.get("school", ""),)))] += sl["required"]
+    holidays = [str(h) for h in cal.holidays] if cal else []
+    return {"faculty": faculty, "slots": dict(seats), "holidays": holidays}
+
+
+def changed_faculty(prev, cur):
+    """Faculty whose digest differs from (or is missing in) the previous
+    snapshot — everyone when the holidays moved, since ±1 business-day
+    scores shift with them."""
+    if prev.get("holidays", []) != cur.get("holidays", []):
+        return set(cur["faculty"])
+    old = prev.get("faculty", {})
+    return {n for n, h in cur["faculty"].items() if old.get(n) != h}
+
+
+def solve_incremental(baseline, prev, names, fac_d, slots, wdf, fac_val_dates, non_sub,
+                      cal=None, log=print, prof=NULL_PROFILE):
+    """Re-solve only what changed since the run that produced ``baseline``.
+
+    Baseline rows of unchanged faculty are kept where their slot still exists
+    and the rules still allow them (highest score first when a slot shrank).
+    Every other seat is released and refilled by greedy Pass 1; Pass 2 tops
+    up quotas only for changed faculty and those who lost a duty, so nobody
+    else is reshuffled.  The Slot Completion Pass is left to the caller.
+    Returns (assigned rows, score matrix, method)."""
+    non_sub  = set(non_sub)
+    cur      = input_snapshot(names, fac_d, slots, wdf, fac_val_dates, cal)
+    changed  = changed_faculty(prev, cur)
+    acp_online_limit  = {n: 1 for n in names if fac_d[n] == "ACP"}
+    acp_offline_limit = dict(acp_online_limit)
+    with prof.stage("score matrix"):
+        fexp = build_score_matrix(names, fac_d, slots, wdf, fac_val_dates, non_sub, cal)
+    t0, c0 = time.perf_counter(), time.process_time()
+    engine = GreedyEngine(fexp, fac_d, slots, fac_val_dates,
+                          acp_online_limit, acp_offline_limit)
+
+    # Seats per slot; a slot whose seat count is unchanged keeps all its
+    # baseline duties, including Pass 2's over-quota ones
+    seats, held = defaultdict(int), defaultdict(int)
+    for sl in slots:
+        seats[slot_key(sl) + (sl.get("school", ""),)] += sl["required"]
+    for r in baseline:
+        held[(r["Date"], r["Session"], r["Type"], r.get("School", ""))] += 1
+    prev_seats = prev.get("slots", {})
+    for k in seats:
+        if prev_seats.get("|".join(map(str, k))) == seats[k]:
+            seats[k] = max(seats[k], held[k])
+    cands = [r for r in baseline if r["Name"] in fexp.fidx and r["Name"] not in changed]
+    cands.sort(key=lambda r: -fexp.get(r["Name"], (r["Date"], r["Session"], r["Type"])))
+    kept, touched = [], set()
+    for r in cands:
+        k = (r["Date"], r["Session"], r["Type"], r.get("School", ""))
+        i = fexp.fidx[r["Name"]]
+        if seats[k] > 0 and engine.ok(i, r["Date"], r["Type"]):
+            engine.commit(i, r["Date"], r["Type"])
+            seats[k] -= 1
+            kept.append(dict(r))
+        else:
+            touched.add(r["Name"])
+    dropped = sum(1 for r in baseline if r["Name"] not in fexp.fidx)
+    log(f"  Incremental        : {len(changed)} changed faculty | kept "
+        f"{len(kept)}/{len(baseline)} baseline duties"
+        + (f" | {dropped} of removed faculty" if dropped else ""))
+
+    open_slots = merge_slots(residual_slots(slots, kept))
+    log(f"  Re-solving         : {sum(sl['required'] for sl in open_slots)} seat(s) "
+        f"over {len(open_slots)} slot(s)")
+
+    # Pass 1 over the released seats only
+    new = []
+    for sl in sorted(open_slots, key=lambda s: -s["required"]):
+        d2, s2, r2, t2 = sl["date"], sl["session"], sl["required"], sl["type"]
+        for fn, sc in engine.fill_slot(d2, s2, t2, r2):
+            new.append({"Name": fn, "Date": d2, "Session": s2,
+                        "Type": t2, "Allocated_By": assignment_tag(fn, sc, non_sub)})
+
+    # Pass 2 restricted to the affected neighbourhood
+    by_date = sorted(merge_slots(slots), key=lambda s: s["date"])
+    for fn in sorted(changed | touched, key=fexp.fidx.get):
+        i = fexp.fidx.get(fn)
+        if i is None or engine.remaining(i) <= 0:
+            continue
+        for sl in by_date:
+            if engine.remaining(i) <= 0:
+                break
+            d2, s2, t2 = sl["date"], sl["session"], sl["type"]
+            if not engine.ok(i, d2, t2):
+                continue
+            engine.commit(i, d2, t2)
+            new.append({"Name": fn, "Date": d2, "Session": s2,
+                        "Type": t2, "Allocated_By": "Gap-Fill"})
+
+    if any(sl.get("school") for sl in slots):
+        new = attribute_schools(new, slots, kept)
+    prof.record("incremental re-solve", time.perf_counter() - t0, time.process_time() - c0)
+    log(f"  New duties         : {len(new)}")
+    return kept + new, fexp, "Incremental + Slot Completion"
+
+
+# ═══════════════════════════════════════════════════════════════ #
+#           LOCAL SEARCH  (swap / move, after completion)        #
+# ═══════════════════════════════════════════════════════════════ #
+W_MATCH = 1_000_000   # per duty turned into a willingness match — beats any score change
+
+
+class LocalSearch:
+    """Improves a finished allocation by 2-swaps (two faculty trade seats)
+    and moves (a duty leaves a slot with more duties than seats).
+
+    Every row's value is W_MATCH for a willingness tag plus its score.  A
+    move or swap changes the value of only the rows it touches, so each
+    one is evaluated in O(1) from the score matrix.  The new places must
+    pass the unrelaxed rules: duty type, valuation date, Saturday, one
+    duty per date and the ACP per-type limits.  Quotas and covered seats
+    never drop.  Only improving changes are applied.
+    """
+
+    def __init__(self, rows, score, fac_d, slots, fac_val_dates, non_sub,
+                 acp_online_limit, acp_offline_limit):
+        self.rows    = rows
+        self.score   = score
+        self.non_sub = set(non_sub)
+        self.desig   = {n: fac_d[n] for n in score.names}
+        self.val     = {n: fac_val_dates.get(n, set()) for n in score.names}
+        self.lim     = {n: {"Online":  acp_online_limit.get(n, 1),
+                            "Offline": acp_offline_limit.get(n, 1)} for n in score.names}
+        self.req     = defaultdict(int)
+        for sl in slots:
+            self.req[slot_key(sl)] += sl["required"]
+        self.at      = defaultdict(set)                        # slot key → row indices
+        self.used    = defaultdict(lambda: defaultdict(int))   # name → date → duties
+        self.acp_tc  = defaultdict(lambda: defaultdict(int))   # name → type → duties
+        for ri, r in enumerate(rows):
+            self._add(ri, r["Name"], (r["Date"], r["Session"], r["Type"]))
+        self.moves = self.swaps = self.sweeps = 0
+
+    def _add(self, ri, n, k):
+        self.at[k].add(ri)
+        self.used[n][k[0]] += 1
+        self.acp_tc[n][k[2]] += 1
+
+    def _drop(self, ri, n, k):
+        self.at[k].discard(ri)
+        self.used[n][k[0]] -= 1
+        self.acp_tc[n][k[2]] -= 1
+
+    # ── O(1) evaluation ───────────────────────────────────────────
+    def value(self, n, k):
+        sc = self.score.get(n, k)
+        return (W_MATCH if n not in self.non_sub and sc >= W_VAL_ADJ else 0) + sc
+
+    def row_value(self, r):
+        k = (r["Date"], r["Session"], r["Type"])
+        return (W_MATCH if r["Allocated_By"] in WILL_TAGS else 0) + self.score.get(r["Name"], k)
+
+    def ok(self, n, k, leaving):
+        """Can ``n`` take a duty at ``k`` after giving up its duty at ``leaving``?"""
+        d, tp, desig = k[0], k[2], self.desig[n]
+        if tp not in DESIG_RULES[desig][2] or d in self.val[n]:
+            return False
+        if d.weekday() == 5 and desig not in SAT_DESIG:
+            return False
+        if self.used[n][d] - (leaving[0] == d) > 0:
+            return False
+        return desig != "ACP" or self.acp_tc[n][tp] - (leaving[2] == tp) < self.lim[n][tp]
+
+    def _place(self, ri, n, k):
+        r = self.rows[ri]
+        self._drop(ri, r["Name"], (r["Date"], r["Session"], r["Type"]))
+        r["Name"], (r["Date"], r["Session"], r["Type"]) = n, k
+        sc = self.score.get(n, k)
+        r["Allocated_By"] = assignment_tag(n, sc, self.non_sub) \
+            if sc >= W_VAL_ADJ or n in self.non_sub else "Gap-Fill"
+        self._add(ri, n, k)
+
+    def gaps(self):
+        return sum(max(0, q - len(self.at[k])) for k, q in self.req.items())
+
+    # ── Search ────────────────────────────────────────────────────
+    def best_change(self, ri):
+        """(gain, other row or None, target key) of the best swap or move for row ``ri``."""
+        r  = self.rows[ri]
+        n  = r["Name"]
+        k1 = (r["Date"], r["Session"], r["Type"])
+        v1 = self.row_value(r)
+        surplus = len(self.at[k1]) > self.req[k1]
+        best = (0, None, None)
+        row = self.score.M[self.score.fidx[n]]
+        for j in np.flatnonzero(row > 0):
+            k2 = self.score.keys[j]
+            if k2 == k1 or k2 not in self.req or not self.ok(n, k2, k1):
+                continue
+            v2 = self.value(n, k2)
+            if surplus:
+                gain = v2 - v1 + (W_SEAT if len(self.at[k2]) < self.req[k2] else 0)
+                if gain > best[0]:
+                    best = (gain, None, k2)
+            for rj in self.at[k2]:
+                o = self.rows[rj]
+                m = o["Name"]
+                if m == n:
+                    continue
+                gain = v2 + self.value(m, k1) - v1 - self.row_value(o)
+                if gain > best[0] and self.ok(m, k1, k2):
+                    best = (gain, rj, k2)
+        return best
+
+    def run(self, sweeps):
+        """Sweep the rows of submitted faculty (unmatched first) until a sweep
+        finds nothing or ``sweeps`` sweeps are done — a step count, not a
+        clock, so the same inputs always give the same allocation.  Returns
+        the slot keys a move took a duty from or to (swaps leave every
+        slot's rows in place)."""
+        moved = set()
+        for _ in range(sweeps):
+            self.sweeps += 1
+            order = sorted((ri for ri, r in enumerate(self.rows) if r["Name"] not in self.non_sub),
+                           key=lambda ri: self.row_value(self.rows[ri]))
+            found = False
+            for ri in order:
+                gain, rj, k2 = self.best_change(ri)
+                if gain <= 0:
+                    continue
+                r  = self.rows[ri]
+                k1 = (r["Date"], r["Session"], r["Type"])
+                if rj is None:
+                    self._place(ri, r["Name"], k2)
+                    moved |= {k1, k2}
+                    self.moves += 1
+                else:
+                    n, m = r["Name"], self.rows[rj]["Name"]
+                    self._place(ri, m, k1)
+                    self._place(rj, n, k2)
+                    self.swaps += 1
+                found = True
+            if not found:
+                break
+        return moved
+
+
+def willingness_match(rows, submitted):
+    """Share of submitted faculty's duties carrying a willingness tag."""
+    sub = [r["Allocated_By"] in WILL_TAGS for r in rows if r["Name"] in submitted]
+    return 100.0 * sum(sub) / len(sub) if sub else 0.0
+
+
+# ═══════════════════════════════════════════════════════════════ #
+#                        REPORT SHEETS                           #
+# ═══════════════════════════════════════════════════════════════ #
+def build_reports(alloc, names, fac_d, submitted, sub_counts, slots, school_of=None):
+    """(sumdf, slotdf, desigdf) for Allocation_Report.xlsx.
+
+    ``names`` keeps Faculty_Master order (one summary row per entry);
+    ``alloc`` carries dd-mm-YYYY date strings as written to Final_Allocation.
+    A "School" column in ``alloc`` (multi-school runs) adds a School column
+    to Faculty_Summary and verifies slots per school.
+    """
+    by_school = "School" in alloc.columns
+    by_tag  = pd.crosstab(alloc["Name"], alloc["Allocated_By"])
+    by_type = pd.crosstab(alloc["Name"], alloc["Type"])
+
+    def count(ct, labels):
+        cols = [c for c in labels if c in ct.columns]
+        return ct[cols].sum(axis=1).reindex(names, fill_value=0).to_numpy(dtype=np.int64)
+
+    req   = np.array([DESIG_RULES[fac_d[n]][0] for n in names], dtype=np.int64)
+    given = np.array([sub_counts.get(n, 0) for n in names], dtype=np.int64)
+    tot   = count(by_tag, by_tag.columns)
+    wt    = count(by_tag, WILL_TAGS)
+    sumdf = pd.DataFrame({
+        "Name": names, "Designation": [fac_d[n] for n in names],
+        "Submitted":          ["Yes" if n in submitted else "No" for n in names],
+        "Submitted_Count":    given,
+        "Required_Duties":    req,
+        "Submission_Shortfall": np.maximum(0, req - given),
+        "Assigned_Duties":    tot,
+        "Willingness_Total": wt,
+        "Match_%":          [f"{w/t*100:.0f}%" if t else "N/A" for w, t in zip(wt, tot)],
+        "Exact_Match":      count(by_tag, ["Willingness-Exact"]),
+        "ACP_Online":       count(by_tag, ["Willingness-ACPOnline"]),
+        "Session_Flip":     count(by_tag, ["Willingness-SessionFlip"]),
+        "Adj_±1Day":        count(by_tag, ["Willingness-±1Day"]),
+        "Val_Adj":          count(by_tag, ["Willingness-ValAdj"]),
+        "Auto_Assigned":    count(by_tag, AUTO_TAGS),
+        "Online":           count(by_type, ["Online"]),
+        "Offline":          count(by_type, ["Offline"]),
+        "Gap":              np.maximum(req - tot, 0),
+    })
+    if by_school:
+        sumdf.insert(2, "School", [(school_of or {}).get(n, "") for n in names])
+
+    key_cols = ["Date", "Session", "Type"] + (["School"] if by_school else [])
+    filled   = alloc.groupby(key_cols).size()
+    ds       = [pd.Timestamp(sl["date"]).strftime("%d-%m-%Y") for sl in slots]
+    arrays   = [ds, [sl["session"] for sl in slots], [sl["type"] for sl in slots]]
+    if by_school:
+        arrays.append([sl.get("school", "") for sl in slots])
+    na       = filled.reindex(pd.MultiIndex.from_arrays(arrays), fill_value=0).to_numpy(dtype=np.int64)
+    required = [sl["required"] for sl in slots]
+    slotdf = pd.DataFrame(dict(zip(key_cols, arrays)))
+    slotdf["Required"] = required
+    slotdf["Assigned"] = na
+    slotdf["Status"]   = ["✓" if n >= r else f"✗ short {r-n}" for n, r in zip(na, required)]
+
+    g = sumdf.groupby("Designation")
+    agg = pd.DataFrame({"Faculty_Count": g.size(),
+                        "Online": g["Online"].sum(), "Offline": g["Offline"].sum(),
+                        "Willingness_Matched": g["Willingness_Total"].sum(),
+                        "Auto_Assigned": g["Auto_Assigned"].sum()})
+    desigrows = []
+    for d2 in DESIG_RULES:
+        if d2 not in agg.index: continue
+        r  = agg.loc[d2]
+        on, of, cnt = int(r["Online"]), int(r["Offline"]), int(r["Faculty_Count"])
+        dr = DESIG_RULES[d2]
+        desigrows.append({
+            "Designation": d2, "Faculty_Count": cnt,
+            "Duties_Per_Person": dr[0],
+            "Total_Required":   dr[0] * cnt,
+            "Total_Assigned":   on + of,
+            "Willingness_Matched": int(r["Willingness_Matched"]),
+            "Auto_Assigned":    int(r["Auto_Assigned"]),
+            "Online": on, "Offline": of
+        })
+    return sumdf, slotdf, pd.DataFrame(desigrows)
@@ -0,0 +1,64 @@
+"""
+Input cache
+===========
+Typed columnar copies of the input workbooks, so Excel is parsed once per
+file version instead of on every cold start:
+
+  * each workbook goes through a loader-specific normaliser (sessions via
+    normalize_session, dates parsed day-first, counts coerced) exactly once
+  * the normalised frame is stored as an uncompressed Arrow IPC file under
+    CACHE_DIR, keyed on (name, absolute path, mtime, size) — or a content
+    hash for uploads — so runs on different input folders never share or
+    prune each other's entries
+  * later reads memory-map that file instead of opening the workbook
+  * without pyarrow the normaliser simply runs on every read
+"""
+
+import hashlib
+import os
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    PYARROW_OK = True
+except ImportError:
+    PYARROW_OK = False
+
+CACHE_DIR      = ".input_cache"
+SCHEMA_VERSION = 3      # bump when a normaliser's output columns change
+
+
+def source_key(path=None, data=None):
+    """Version key for a workbook on disk, or for uploaded bytes."""
+    if data is not None:
+        return "upload-" + hashlib.sha1(data).hexdigest()[:16]
+    stt   = os.stat(path)
+    where = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:10]
+    return f"{os.path.basename(path)}-{where}-{stt.st_mtime_ns}-{stt.st_size}"
+
+
+def cached_frame(kind, key, build):
+    """Return ``build()`` for this (kind, key), served from the Arrow cache when possible."""
+    if not PYARROW_OK:
+        return build()
+    stem = f"{kind}-v{SCHEMA_VERSION}-"
+    path = os.path.join(CACHE_DIR, f"{stem}{key}.arrow")
+    try:
+        return feather.read_table(path, memory_map=True).to_pandas()
+    except (OSError, pa.ArrowInvalid):
+        pass
+
+    df = build()
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        feather.write_feather(df, tmp, compression="uncompressed")
+        os.replace(tmp, path)
+        # Older versions of the same input (or earlier uploads) are dead weight
+        prefix = stem + key.rsplit("-", 2)[0] + "-"
+        for f in os.listdir(CACHE_DIR):
+            if f.startswith(prefix) and f.endswith(".arrow") and f != os.path.basename(path):
+                os.remove(os.path.join(CACHE_DIR, f))
+    except (OSError, pa.ArrowException):
+        pass    # read-only disk or an unstorable column — serve the parsed frame
+    return df
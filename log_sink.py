@@ -0,0 +1,78 @@
+"""
+Log sink
+========
+Buffered, rate-limited log for optimizer runs in a background worker:
+
+  * ``sink(line)`` only appends to an in-memory buffer — no I/O and no
+    re-joining of earlier lines, however many names a run logs
+  * a flusher thread writes the buffered lines to the full log file at
+    most every ``interval`` seconds (default 200 ms), in one append
+  * the last ``tail_lines`` lines are kept in a ring buffer and written
+    to a small tail file on each flush, so the live view reads a bounded
+    file instead of the whole log
+  * ``close()`` (or leaving the ``with`` block) flushes whatever is left
+"""
+
+import os
+import threading
+from collections import deque
+
+FLUSH_INTERVAL = 0.2     # seconds between flushes
+TAIL_LINES     = 400     # lines kept for the live view
+
+
+def read_tail(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        return ""
+
+
+class LogSink:
+    def __init__(self, path, tail_path=None, interval=FLUSH_INTERVAL, tail_lines=TAIL_LINES):
+        self.path, self.tail_path = path, tail_path
+        self.interval = interval
+        self.ring     = deque(maxlen=tail_lines)
+        self._buf     = []
+        self._lock    = threading.Lock()
+        self._io      = threading.Lock()     # one flush at a time, in order
+        self._stop    = threading.Event()
+        self._thread  = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def __call__(self, m=""):
+        lines = str(m).split("\n")
+        with self._lock:
+            self._buf.extend(lines)
+            self.ring.extend(lines)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def flush(self):
+        with self._io:
+            with self._lock:
+                lines, self._buf = self._buf, []
+                tail = "\n".join(self.ring) if lines and self.tail_path else None
+            if not lines:
+                return
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+            if tail is not None:
+                tmp = f"{self.tail_path}.tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    f.write(tail)
+                os.replace(tmp, self.tail_path)
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
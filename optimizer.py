@@ -0,0 +1,648 @@
+"""
+Headless optimizer
+==================
+The full allocation run — load inputs, solve, Slot Completion Pass, reports,
+Excel export — with no Streamlit dependency, so it can run from the portal's
+background job, a benchmark, cron or a shell:
+
+    python optimizer.py --dir /srv/duty --solver exact --time-limit 120
+
+  * RunFiles      — where one run reads its inputs and writes its outputs
+  * load_registry / load_willingness / parse_duty_file
+                  — input loaders, served from the Arrow input cache
+  * load_holidays — optional Holidays.xlsx; with weekends it defines the
+                    business days behind the ±1 biz-day preference
+  * run_optimizer — the run itself; progress goes to a ``log`` callable
+                    (print by default; the portal streams it to the job log)
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from willingness_store import WillingnessStore
+from report_export import export_allocation
+from input_cache import cached_frame, source_key
+from run_profile import RunProfile
+from presolve import analyze as presolve_check, log_report as log_presolve
+from duty_engine import (
+    DESIG_RULES, DESIG_PRIORITY, WILL_TAGS, AUTO_TAGS,
+    SCHOOL_COLS, FacultyRegistry, build_score_matrix, CompletionEngine,
+    EXACT_BACKENDS, FLOW_OK, BizCalendar, build_reports, solve_assignments, solve_by_school,
+    merge_slots, attribute_schools, input_snapshot, solve_incremental, clean_name,
+    LocalSearch, willingness_match,
+)
+
+# ─── File names ──────────────────────────────────────────────── #
+FACULTY_FILE      = "Faculty_Master.xlsx"
+OFFLINE_FILE      = "Offline_Duty.xlsx"
+ONLINE_FILE       = "Online_Duty.xlsx"
+WILLINGNESS_FILE  = "Willingness.xlsx"
+WILLINGNESS_DB    = "willingness.db"       # portal submissions (SQLite, WAL)
+HOLIDAYS_FILE     = "Holidays.xlsx"        # optional: university holidays, dates in the first column
+FINAL_ALLOC_FILE  = "Final_Allocation.xlsx"
+ALLOC_REPORT_FILE = "Allocation_Report.xlsx"
+ALLOC_INPUTS_FILE = "Allocation_Inputs.json"  # input fingerprint of the last run (incremental baseline)
+RUN_RECORD_FILE   = "Allocation_Run.json"  # stage timings / memory of the last run
+
+# ─── Run settings ────────────────────────────────────────────── #
+ALLOC_SIDECAR     = "parquet"              # machine-readable copy: "parquet" / "csv" / None
+EXPORT_THREADS    = True                   # write both workbooks concurrently
+EXACT_TIME_LIMIT  = 60    # seconds
+EXACT_WORKERS     = 4
+PARTITION_PROCESSES = None   # multi-school runs: pool size (None = all cores)
+MULTISTART_RUNS   = 8     # multi-start mode: randomised greedy runs, best kept
+MULTISTART_SEED   = 0
+LOCAL_SEARCH_SWEEPS  = 0  # swap / move sweeps after completion (0 = off)
+
+WILLINGNESS_COLUMNS = ["Faculty", "Date", "Session"]
+
+
+class RunFiles:
+    """Input paths under ``folder`` and output paths under ``out`` (default: ``folder``)."""
+    __slots__ = ("faculty", "offline", "online", "willingness", "store", "holidays",
+                 "final_alloc", "report", "inputs", "run_record")
+
+    def __init__(self, folder="", out=None):
+        out = folder if out is None else out
+        self.faculty     = os.path.join(folder, FACULTY_FILE)
+        self.offline     = os.path.join(folder, OFFLINE_FILE)
+        self.online      = os.path.join(folder, ONLINE_FILE)
+        self.willingness = os.path.join(folder, WILLINGNESS_FILE)
+        self.store       = os.path.join(folder, WILLINGNESS_DB)
+        self.holidays    = os.path.join(folder, HOLIDAYS_FILE)
+        self.final_alloc = os.path.join(out, FINAL_ALLOC_FILE)
+        self.report      = os.path.join(out, ALLOC_REPORT_FILE)
+        self.inputs      = os.path.join(out, ALLOC_INPUTS_FILE)
+        self.run_record  = os.path.join(out, RUN_RECORD_FILE)
+
+
+# ═══════════════════════════════════════════════════════════════ #
+#                     INPUT HELPERS                              #
+# ═══════════════════════════════════════════════════════════════ #
+def normalize_session(v):
+    t = str(v).strip().upper()
+    if t in {"FN", "FORENOON", "MORNING", "AM"}:
+        return "FN"
+    if t in {"AN", "AFTERNOON", "EVENING", "PM"}:
+        return "AN"
+    return t
+
+def parse_dates(col):
+    """Day-first dates; ISO strings (str() of Excel datetimes) are read as ISO."""
+    iso = pd.to_datetime(col, format="ISO8601", errors="coerce")
+    return iso.fillna(pd.to_datetime(col, dayfirst=True, errors="coerce", format="mixed"))
+
+def file_version(path):
+    """Cache key for a file on disk — changes whenever it is rewritten."""
+    stt = os.stat(path)
+    return (path, stt.st_mtime_ns, stt.st_size)
+
+
+# ═══════════════════════════════════════════════════════════════ #
+#               PARSE DUTY FILE (shared helper)                  #
+# ═══════════════════════════════════════════════════════════════ #
+SLOT_DTYPE = np.dtype([("date", "datetime64[D]"), ("session", "U2"), ("required", np.int32),
+                       ("school", "U64")])
+
+def _duty_frame(filepath):
+    """Duty workbook → one row per sheet row with its Excel row number.
+
+    ``status`` is "ok", "defaulted" (kept, count fell back to 1) or
+    "skipped"; ``reason`` explains anything that is not "ok"."""
+    try:
+        raw = pd.read_excel(filepath, header=None)
+    except Exception:
+        raw = pd.DataFrame()
+    try:
+        pd.to_datetime(raw.iloc[0, 0])
+        start = 0
+    except Exception:
+        start = 1
+    # Optional School / Department column, recognised by its header
+    header = [str(h).strip().lower() for h in raw.iloc[0]] if start else []
+    s_col  = next((j for j, h in enumerate(header) if h in SCHOOL_COLS), None)
+    raw = raw.iloc[start:]
+    raw = raw[~raw.isna().all(axis=1)]          # fully blank rows are not errors
+
+    def col(j):
+        return raw.iloc[:, j] if raw.shape[1] > j else pd.Series(None, index=raw.index, dtype=object)
+    d_raw, s_raw, r_raw = col(0), col(1), col(2)
+
+    sess  = s_raw.map(normalize_session)
+    dates = pd.to_datetime(d_raw, errors="coerce", format="mixed")
+    num   = pd.to_numeric(r_raw, errors="coerce").astype(float)
+    good_n = np.isfinite(num)
+    req   = np.where(good_n, np.maximum(np.trunc(num.fillna(0)), 0), 1).astype(np.int32)
+
+    reason = pd.Series(None, index=raw.index, dtype=object)
+    status = pd.Series("ok", index=raw.index, dtype=object)
+    if raw.shape[1] > 2:
+        bad_n = ~good_n
+        reason[bad_n] = "count " + r_raw[bad_n].map(lambda v: repr(str(v)) if pd.notna(v) else "missing") \
+                        + " — using 1"
+        status[bad_n] = "defaulted"
+    checks = [
+        (dates.isna() & d_raw.notna(), "date " + d_raw.astype(str).map(repr) + " not recognised"),
+        (~sess.isin(["FN", "AN"]),      "session " + s_raw.astype(str).map(repr) + " is not FN/AN"),
+        (d_raw.isna(),                  pd.Series("missing date", index=raw.index)),
+    ]
+    for mask, why in checks:             # later checks overwrite → parse order of precedence
+        reason[mask] = why[mask]
+        status[mask] = "skipped"
+
+    ok = status != "skipped"
+    return pd.DataFrame({
+        "row":      (raw.index.to_numpy() + 1).astype(np.int32),
+        "date":     dates.dt.date.where(ok, None).astype(object),
+        "session":  sess.where(ok, None).astype(object),
+        "required": req,
+        "school":   (raw.iloc[:, s_col].fillna("").astype(str).str.strip().str.removesuffix(".0")
+                     if s_col is not None else pd.Series("", index=raw.index)).astype(object),
+        "status":   status,
+        "reason":   reason,
+    }).reset_index(drop=True)
+
+def duty_table(filepath):
+    """(slots as a SLOT_DTYPE structured array, issues frame) for one duty workbook."""
+    if not os.path.exists(filepath):
+        return np.empty(0, dtype=SLOT_DTYPE), pd.DataFrame(columns=["Row", "Action", "Reason"])
+    df  = cached_frame("duty", source_key(filepath), lambda: _duty_frame(filepath))
+    acc = df[df["status"] != "skipped"]
+    arr = np.empty(len(acc), dtype=SLOT_DTYPE)
+    arr["date"]     = pd.to_datetime(acc["date"]).to_numpy(dtype="datetime64[D]")
+    arr["session"]  = acc["session"].to_numpy(dtype="U2")
+    arr["required"] = acc["required"].to_numpy()
+    arr["school"]   = acc["school"].to_numpy(dtype="U64")
+    issues = df[df["status"] != "ok"].rename(
+        columns={"row": "Row", "status": "Action", "reason": "Reason"})[["Row", "Action", "Reason"]]
+    return arr, issues.reset_index(drop=True)
+
+def parse_duty_file(filepath, duty_type):
+    arr, _ = duty_table(filepath)
+    return [{"date": d, "session": sn, "required": r, "type": duty_type, "school": sc}
+            for d, sn, r, sc in zip(arr["date"].tolist(), arr["session"].tolist(),
+                                    arr["required"].tolist(), arr["school"].tolist())]
+
+
+# ═══════════════════════════════════════════════════════════════ #
+#                 FACULTY + WILLINGNESS INPUTS                   #
+# ═══════════════════════════════════════════════════════════════ #
+def load_registry(path):
+    """Faculty_Master → FacultyRegistry, via the Arrow input cache."""
+    return FacultyRegistry.from_frame(cached_frame(
+        "faculty", source_key(path), lambda: FacultyRegistry.normalize(pd.read_excel(path))))
+
+def willingness_frame(source):
+    """Willingness workbook → Faculty / Date (date) / Session (FN|AN) / FacultyClean."""
+    try:
+        xl = pd.ExcelFile(io.BytesIO(source) if isinstance(source, bytes) else source)
+        df = None
+        for sh in xl.sheet_names:
+            c = xl.parse(sh)
+            c.columns = c.columns.astype(str).str.strip()
+            if {"Faculty", "Date", "Session"}.issubset(set(c.columns)):
+                df = c[["Faculty", "Date", "Session"]].copy()
+                break
+        if df is None:
+            c = xl.parse(xl.sheet_names[0])
+            c.columns = c.columns.astype(str).str.strip()
+            if len(c.columns) >= 3:
+                c = c.rename(columns={c.columns[0]: "Faculty", c.columns[1]: "Date", c.columns[2]: "Session"})
+                df = c[["Faculty", "Date", "Session"]].copy()
+            else:
+                df = pd.DataFrame(columns=["Faculty", "Date", "Session"])
+    except Exception:
+        df = pd.DataFrame(columns=["Faculty", "Date", "Session"])
+
+    df = df.dropna(subset=["Faculty"]).reset_index(drop=True)
+    df["Faculty"]      = df["Faculty"].astype(str).str.strip()
+    dates              = parse_dates(df["Date"]).dt.date
+    df["Date"]         = dates.astype(object).where(dates.notna(), None)
+    df["Session"]      = df["Session"].map(normalize_session).astype(object)
+    df["FacultyClean"] = df["Faculty"].map(clean_name).astype(object)
+    return df
+
+def read_willingness(key, source):
+    """Willingness rows for one workbook version, Date as dd-mm-YYYY strings
+    (the format portal submissions use)."""
+    df = cached_frame("willingness", key, lambda: willingness_frame(source))
+    df["Date"] = [d.strftime("%d-%m-%Y") if d is not None and pd.notna(d) else "" for d in df["Date"]]
+    return df
+
+def load_willingness(files, store=True):
+    """Willingness.xlsx plus portal submissions in the store, de-duplicated."""
+    frames = [pd.DataFrame(columns=WILLINGNESS_COLUMNS)]
+    if os.path.exists(files.willingness):
+        frames.append(read_willingness(source_key(files.willingness), files.willingness)
+                      [WILLINGNESS_COLUMNS])
+    if store and os.path.exists(files.store):
+        frames.append(WillingnessStore(files.store).frame())
+    combined = pd.concat(frames, ignore_index=True)
+    return combined.drop_duplicates(subset=WILLINGNESS_COLUMNS).reset_index(drop=True)
+
+def load_holidays(path):
+    """Dates in the first (or "Date") column of the holiday workbook; [] without one."""
+    if not os.path.exists(path):
+        return []
+    df  = pd.read_excel(path)
+    if df.empty:
+        return []
+    col = next((c for c in df.columns if str(c).strip().lower() == "date"), df.columns[0])
+    return sorted(set(parse_dates(df[col]).dropna().dt.date))
+
+
+# ═══════════════════════════════════════════════════════════════ #
+#                  PREVIOUS RUN (incremental)                    #
+# ═══════════════════════════════════════════════════════════════ #
+def incremental_ready(files):
+    return os.path.exists(files.final_alloc) and os.path.exists(files.inputs)
+
+def load_baseline(files):
+    """(previous allocation rows, input snapshot) for an incremental run, or None."""
+    if not incremental_ready(files):
+        return None
+    try:
+        with open(files.inputs) as f:
+            prev = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    # The sidecar is only trusted while the workbook is the one written with it
+    side = prev.get("sidecar")
+    if side and os.path.exists(side) and \
+            list(file_version(files.final_alloc)) == prev.get("allocation"):
+        df = pd.read_parquet(side) if side.endswith(".parquet") else pd.read_csv(side)
+    else:
+        df = pd.read_excel(files.final_alloc)
+    df = df.drop(columns=["Sl.No"], errors="ignore")
+    df["Date"] = pd.to_datetime(df["Date"], format="%d-%m-%Y").dt.date
+    if "School" in df.columns:
+        df["School"] = df["School"].fillna("").astype(str)
+    return df.to_dict("records"), prev
+
+
+# ═══════════════════════════════════════════════════════════════ #
+#           OR-Tools CP-SAT OPTIMIZER  (v5)                      #
+# ═══════════════════════════════════════════════════════════════ #
+def run_optimizer(files=None, will_df=None, solver="greedy", time_limit=EXACT_TIME_LIMIT,
+                  workers=EXACT_WORKERS, starts=MULTISTART_RUNS, seed=MULTISTART_SEED,
+                  local_search=LOCAL_SEARCH_SWEEPS, registry=None, log=print):
+    """Full optimizer run: reads ``files``' inputs, writes its outputs and
+    returns (alloc, sumdf, slotdf, desigdf).
+
+    ``will_df`` defaults to load_willingness(files); ``registry`` to the
+    Faculty_Master registry (the portal passes its cached one).  Every log
+    line goes to ``log``.  Input problems raise RuntimeError.
+    """
+    files = files or RunFiles()
+    prof = RunProfile(solver=solver)
+    log("=" * 62)
+    log("  SASTRA SoME Duty Optimizer  (OR-Tools CP-SAT  –  v5)")
+    log("  Slot-fill guaranteed | val-safe | session-flip |")
+    log("  ±1 biz-day adj | Sat→TA/RA | seniority | ACP 1+1")
+    log("=" * 62)
+
+    if solver == "exact" and not EXACT_BACKENDS:
+        raise RuntimeError(
+            "Exact mode needs OR-Tools (or SciPy). Add 'ortools' to requirements.txt and redeploy.")
+    if solver == "flow" and not FLOW_OK:
+        raise RuntimeError(
+            "Flow mode needs OR-Tools. Add 'ortools' to requirements.txt and redeploy.")
+
+    # ── Load faculty ─────────────────────────────────────────────
+    try:
+        reg = registry or load_registry(files.faculty)
+    except FileNotFoundError as e:
+        raise RuntimeError(f"{files.faculty} not found.") from e
+    except ValueError as e:
+        raise RuntimeError(str(e)) from e
+    ALL_FAC = [r.name for r in reg.records]
+    N_FAC   = len(ALL_FAC)
+    fac_d   = reg.fac_d
+    dgroups = reg.groups()
+    # ACP 1+1 rule: at most one Online and one Offline duty each
+    acp_online_limit  = {n: 1 for n in dgroups["ACP"]}
+    acp_offline_limit = {n: 1 for n in dgroups["ACP"]}
+    log(f"\n  Faculty loaded     : {N_FAC}")
+    prof.lap("faculty + valuation dates")
+
+    # ── Per-faculty valuation dates ──────────────────────────────
+    fac_val_dates = reg.val_dates
+    log(f"  Valuation dates    : {sum(1 for v in fac_val_dates.values() if v)} faculty")
+
+    # ── Load willingness ─────────────────────────────────────────
+    wdf = (will_df if will_df is not None else load_willingness(files)
+           ).drop(columns=["FacultyClean"], errors="ignore")
+    if not wdf.empty:
+        wdf["Date"]    = pd.to_datetime(wdf["Date"], dayfirst=True, errors="coerce")
+        wdf["Session"] = wdf["Session"].astype(str).str.strip().str.upper()
+        wdf = wdf.dropna(subset=["Date"])
+    submitted  = set(wdf["Faculty"].str.strip().unique()) if not wdf.empty else set()
+    non_sub    = [n for n in ALL_FAC if n not in submitted]
+
+    # Count how many willingness dates each faculty submitted vs required
+    sub_counts = {}
+    if not wdf.empty:
+        for n, grp in wdf.groupby("Faculty"):
+            sub_counts[n.strip()] = len(grp)
+
+    under_sub = []   # submitted but fewer dates than required
+    for n in submitted:
+        required = DESIG_RULES.get(fac_d.get(n, "TA"), (0,0))[0]
+        given    = sub_counts.get(n, 0)
+        if given < required:
+            under_sub.append((n, given, required))
+
+    log(f"  Willingness loaded : {len(submitted)} submitted | {len(non_sub)} not submitted")
+    if under_sub:
+        log(f"  ⚠ Under-submitted  : {len(under_sub)} faculty submitted fewer dates than required:")
+        for n, given, req in sorted(under_sub, key=lambda x: x[0]):
+            log(f"      {n}  →  submitted {given} / required {req}")
+    if non_sub:
+        log(f"  ⚠ No submission    : {len(non_sub)} faculty — will be auto-assigned:")
+        for n in non_sub:
+            log(f"      {n}")
+    prof.lap("willingness")
+
+    log("")
+    for fp, lbl in [(files.offline, "Offline"), (files.online, "Online")]:
+        log(f"  {lbl:8} : {'✓ found' if os.path.exists(fp) else '✗ MISSING — ' + fp}")
+
+    # ── Load slots ───────────────────────────────────────────────
+    s_off = parse_duty_file(files.offline, "Offline")
+    s_on  = parse_duty_file(files.online,  "Online")
+    ALL_S = s_off + s_on
+    NS    = len(ALL_S)
+    if NS == 0:
+        raise RuntimeError("No exam slots found. Check Offline_Duty.xlsx / Online_Duty.xlsx.")
+    log(f"  Slots parsed       : {NS}  ({len(s_off)} offline + {len(s_on)} online)")
+    log(f"  Total seats needed : {sum(s['required'] for s in ALL_S)}")
+    prof.lap("duty slots")
+
+    holidays = load_holidays(files.holidays)
+    cal      = BizCalendar.for_slots(ALL_S, holidays)
+    exam_days = [sl["date"] for sl in ALL_S]
+    log(f"  Business days      : {cal.count(min(exam_days), max(exam_days))} in exam period"
+        f" | {len(cal.holidays)} holiday(s){' from ' + HOLIDAYS_FILE if holidays else ''}")
+    feas = presolve_check(ALL_FAC, fac_d, ALL_S, fac_val_dates)
+    log_presolve(feas, log)
+    prof.lap("pre-solve check")
+    log(f"  Preference window  : exact + flip + ±1 biz-day (exam dates only)")
+
+    # ── Solve: greedy-first, exact optional ──────────────────────
+    # Greedy always runs (instant); it is both the fallback and the
+    # warm-start hint for the exact model. In exact mode CP-SAT (or
+    # scipy MILP) gets a hard time limit and worker cap, and its
+    # result is only kept if it beats the greedy objective. The
+    # mandatory slot completion pass then fills any remaining seats.
+    if solver == "exact":
+        log(f"\n  Solver: Greedy → {EXACT_BACKENDS[0]} (≤{time_limit:.0f}s, "
+            f"{workers} worker(s)) + Slot Completion Pass")
+    elif solver == "flow":
+        log(f"\n  Solver: Min-cost Flow + Slot Completion Pass")
+    elif solver == "multistart":
+        log(f"\n  Solver: Multi-start Greedy (best of {starts}, seed {seed}) + Slot Completion Pass")
+    elif solver == "incremental":
+        log(f"\n  Solver: Incremental (previous allocation as baseline) + Slot Completion Pass")
+    else:
+        log(f"\n  Solver: Greedy + Slot Completion Pass (resource-safe mode)")
+    if local_search > 0 and solver != "incremental":
+        log(f"          + Local Search (≤{int(local_search)} sweep(s) of swaps / moves)")
+
+    # Multi-school: each school's faculty solve their own slots in a
+    # process pool; the global completion pass below then works on
+    # the seats still open across all schools.
+    multi    = any(sl["school"] for sl in ALL_S) and any(reg.school.values())
+    baseline = load_baseline(files) if solver == "incremental" else None
+    if solver == "incremental" and baseline is None:
+        log("  ⚠ No previous allocation to build on — running a full greedy solve")
+    if baseline is not None:
+        assigned, fexp, method = solve_incremental(
+            baseline[0], baseline[1], ALL_FAC, fac_d, ALL_S, wdf, fac_val_dates, non_sub,
+            cal=cal, log=log, prof=prof)
+        fill_slots = merge_slots(ALL_S) if multi else ALL_S
+    elif multi:
+        assigned, method = solve_by_school(
+            ALL_FAC, fac_d, ALL_S, wdf, fac_val_dates, non_sub, reg.school,
+            solver=solver if solver in ("exact", "flow", "multistart") else "greedy", time_limit=time_limit,
+            workers=workers, processes=PARTITION_PROCESSES, starts=starts, seed=seed,
+            cal=cal, log=log)
+        prof.lap("school partitions")
+        fill_slots = merge_slots(ALL_S)
+        fexp = build_score_matrix(ALL_FAC, fac_d, fill_slots, wdf, fac_val_dates, non_sub, cal)
+        prof.lap("score matrix")
+    else:
+        assigned, fexp, method = solve_assignments(
+            ALL_FAC, fac_d, ALL_S, wdf, fac_val_dates, non_sub,
+            solver=solver if solver in ("exact", "flow", "multistart") else "greedy", time_limit=time_limit,
+            workers=workers, starts=starts, seed=seed, cal=cal, log=log, prof=prof)
+        fill_slots = ALL_S
+    prof.lap()
+
+    # ══════════════════════════════════════════════════════════════
+    #  MANDATORY SLOT COMPLETION PASS
+    #  Runs after CP-SAT or greedy.  Guarantees every slot seat is
+    #  filled by progressively relaxing soft constraints:
+    #    Relax-0  full rules enforced
+    #    Relax-1  allow same-date second duty
+    #    Relax-2  allow Saturday for non-TA/RA
+    #    Relax-3  allow duty on valuation date (absolute last resort)
+    #  ACP 1-online + 1-offline rule is NEVER relaxed.
+    # ══════════════════════════════════════════════════════════════
+    log("\n  ── Slot Completion Pass ─────────────────────────────")
+
+    completion = CompletionEngine(fexp, fac_d, fill_slots, fac_val_dates,
+                                  acp_online_limit, acp_offline_limit)
+    completion.load(assigned)
+
+    gaps_before = completion.gaps(fill_slots)
+    log(f"  Gaps after solver  : {gaps_before}")
+
+    filled = []
+    for sl in fill_slots:
+        picks, needed = completion.fill(sl)
+        for fn, relax in picks:
+            lbl = "Gap-Fill" if relax == 0 else f"Gap-Fill-R{relax+1}"
+            filled.append({"Name": fn, "Date": sl["date"],
+                           "Session": sl["session"], "Type": sl["type"],
+                           "Allocated_By": lbl})
+
+        if needed > 0:
+            log(f"  ⚠ Unfillable: {needed} seat(s) at "
+                f"{sl['date']} {sl['session']} {sl['type']} "
+                f"(insufficient eligible faculty)")
+
+    assigned += attribute_schools(filled, ALL_S, assigned) if multi else filled
+
+    prof.lap("slot completion")
+    for k, (wall, seats) in enumerate(zip(completion.relax_wall, completion.relax_picks)):
+        prof.record(f"completion relax {k}", wall, seats=seats)
+    gaps_after = completion.gaps(fill_slots)
+    log(f"  Gaps after completion: {gaps_after}  "
+        f"{'✓ All slots filled!' if gaps_after == 0 else '⚠ Some seats unfilled'}")
+
+    # ── Local search: swaps / moves that turn duties into matches ──
+    # Skipped for incremental runs, which must not reshuffle faculty
+    # whose inputs did not change.
+    if local_search > 0 and baseline is None:
+        log("\n  ── Local Search (swap / move) ───────────────────────")
+        before = willingness_match(assigned, submitted)
+        orig   = [(r["Name"], r["Date"], r["Session"], r["Type"]) for r in assigned]
+        with prof.stage("local search"):
+            ls    = LocalSearch(assigned, fexp, fac_d, fill_slots, fac_val_dates, non_sub,
+                                acp_online_limit, acp_offline_limit)
+            moved = ls.run(int(local_search))
+            if multi and moved:                 # re-attribute schools at the slots moves touched
+                redo = [r for r in assigned if (r["Date"], r["Session"], r["Type"]) in moved]
+                for r in redo:
+                    r.pop("School", None)
+                attribute_schools(redo, ALL_S, [r for r in assigned if "School" in r])
+        gaps_after = ls.gaps()
+        log(f"  Changes            : {ls.swaps} swap(s), {ls.moves} move(s) in {ls.sweeps} "
+            f"sweep(s) (≤{int(local_search)})")
+        changed = sum(o != (r["Name"], r["Date"], r["Session"], r["Type"])
+                      for o, r in zip(orig, assigned))
+        if changed:
+            log(f"  ⚠ Local search changed {changed} of {len(assigned)} duties from the "
+                f"{method} result")
+        log(f"  Willingness match  : {before:.1f}% → {willingness_match(assigned, submitted):.1f}%")
+        if ls.moves:
+            log(f"  Gaps after search  : {gaps_after}")
+
+    # ── Build output dataframes ───────────────────────────────────
+    if not assigned:
+        raise RuntimeError("No assignments produced. Check input files.")
+
+    alloc = pd.DataFrame(assigned)
+    alloc["Date"] = pd.to_datetime(alloc["Date"]).dt.strftime("%d-%m-%Y")
+    alloc = alloc.sort_values(["Date", "Session", "Name"]).reset_index(drop=True)
+    alloc.insert(0, "Sl.No", alloc.index + 1)
+
+    sumdf, slotdf, desigdf = build_reports(alloc, ALL_FAC, fac_d, submitted, sub_counts, ALL_S,
+                                           school_of=reg.school)
+    prof.lap("report build")
+
+    # ── Save to Excel ─────────────────────────────────────────────
+    side = export_allocation(alloc, [("Designation_Summary", desigdf),
+                              ("Faculty_Summary",     sumdf),
+                              ("Slot_Verification",   slotdf)],
+                      files.final_alloc, files.report,
+                      sidecar=ALLOC_SIDECAR, threads=EXPORT_THREADS)
+    tmp = f"{files.inputs}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({**input_snapshot(ALL_FAC, fac_d, ALL_S, wdf, fac_val_dates, cal),
+                   "allocation": list(file_version(files.final_alloc)), "sidecar": side}, f)
+    os.replace(tmp, files.inputs)
+    prof.lap("excel write")
+
+    # ── Summary log ───────────────────────────────────────────────
+    tot  = len(alloc); ab2 = alloc["Allocated_By"]
+    unmet = slotdf[~slotdf["Status"].str.startswith("✓")]
+    gaps  = sumdf[sumdf["Gap"] > 0]
+
+    sub_alloc      = alloc[alloc["Name"].isin(submitted)]
+    will_matched   = int(sub_alloc["Allocated_By"].isin(WILL_TAGS).sum()) if not sub_alloc.empty else 0
+    will_total_sub = len(sub_alloc)
+    overall_match_pct = (will_matched / will_total_sub * 100) if will_total_sub > 0 else 0
+
+    asg       = sumdf["Assigned_Duties"]
+    match_pct = (sumdf["Willingness_Total"] / asg.where(asg > 0) * 100).fillna(0)
+    sub_mask  = sumdf["Submitted"] == "Yes"
+    above80   = int((match_pct[sub_mask] >= 80).sum())
+    prof.save(files.run_record, method=method, faculty=N_FAC, slots=NS,
+              seats=sum(s["required"] for s in ALL_S), assignments=tot, gaps=gaps_after,
+              match_pct=round(overall_match_pct, 2), presolve_short=feas["short"],
+              local_search=int(local_search) if baseline is None else 0)
+
+    log(f"\n{'='*62}\n  RESULTS  [{method}]\n{'='*62}")
+    log(f"  Total assignments          : {tot}")
+    log(f"  ├─ Exact willingness       : {int((ab2 == 'Willingness-Exact').sum())}")
+    log(f"  ├─ ACP offline→online      : {int((ab2 == 'Willingness-ACPOnline').sum())}")
+    log(f"  ├─ Session flip FN↔AN      : {int((ab2 == 'Willingness-SessionFlip').sum())}")
+    log(f"  ├─ Adjacent ±1 biz-day     : {int((ab2 == 'Willingness-±1Day').sum())}")
+    log(f"  ├─ Valuation-adj           : {int((ab2 == 'Willingness-ValAdj').sum())}")
+    log(f"  └─ Auto / Gap-Fill         : {int(ab2.isin(AUTO_TAGS).sum())}")
+    log(f"\n  ★ Overall willingness match: {overall_match_pct:.1f}%  ({will_matched}/{will_total_sub})")
+    log(f"  ★ Faculty ≥80% match       : {above80}/{int(sub_mask.sum())}")
+
+    log(f"\n  Designation-wise breakdown:")
+    by_desig = sumdf.assign(_pct=match_pct).groupby("Designation")
+    for dg in ["P", "ACP", "SAP", "AP3", "AP2", "TA", "RA"]:
+        if dg not in by_desig.groups: continue
+        sub2 = by_desig.get_group(dg)
+        prio_lbl = "⭐ priority" if DESIG_PRIORITY.get(dg, 0) > 0 else "  fill-in"
+        log(f"  {dg:4} [{prio_lbl}]: {len(sub2):3} faculty | "
+            f"avg match {sub2['_pct'].mean():.0f}% | auto {int(sub2['Auto_Assigned'].sum())}")
+
+    if not unmet.empty:
+        log(f"\n  ⚠ Unfilled slots ({len(unmet)}):")
+        for _, r in unmet.iterrows():
+            sch = f" [{r['School']}]" if r.get("School") else ""
+            log(f"    {r['Date']} {r['Session']} {r['Type']}{sch} — {r['Status']}")
+    else:
+        log(f"\n  ✓ All {len(slotdf)} slots fully filled")
+
+    if not gaps.empty:
+        log(f"  ⚠ Faculty under-assigned ({len(gaps)}):")
+        for _, r in gaps.iterrows():
+            log(f"    {r['Name']} ({r['Designation']}) — {r['Gap']} duty gap")
+    else:
+        log(f"  ✓ All faculty assigned correct duty count")
+
+    if non_sub:
+        log(f"\n  ⚠ No-submission faculty ({len(non_sub)}) — auto-assigned:")
+        for n in non_sub:
+            log(f"      {n}  ({fac_d.get(n,'?')})")
+    if under_sub:
+        log(f"\n  ⚠ Under-submitted faculty ({len(under_sub)}):")
+        matched = dict(zip(sumdf["Name"], sumdf["Willingness_Total"]))
+        for n, given, req in under_sub:
+            exact = int(matched.get(n, 0))
+            log(f"      {n}  ({fac_d.get(n,'?')})  submitted {given}/{req}  →  {exact} matched")
+
+    return alloc, sumdf, slotdf, desigdf
+
+
+# ═══════════════════════════════════════════════════════════════ #
+#                            CLI                                 #
+# ═══════════════════════════════════════════════════════════════ #
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Run the SASTRA SoME duty optimizer without the portal.")
+    ap.add_argument("--dir", default="", help="folder with the input workbooks (default: cwd)")
+    ap.add_argument("--out", help="folder for the output files (default: --dir)")
+    ap.add_argument("--solver", choices=["greedy", "exact", "flow", "multistart", "incremental"],
+                    default="greedy")
+    ap.add_argument("--time-limit", type=float, default=EXACT_TIME_LIMIT, help="exact mode, seconds")
+    ap.add_argument("--workers", type=int, default=EXACT_WORKERS, help="exact mode solver workers")
+    ap.add_argument("--starts", type=int, default=MULTISTART_RUNS, help="multistart mode: greedy runs")
+    ap.add_argument("--seed", type=int, default=MULTISTART_SEED, help="multistart mode: random seed")
+    ap.add_argument("--local-search", type=int, default=LOCAL_SEARCH_SWEEPS, metavar="SWEEPS",
+                    help="swap / move sweeps after completion (default 0 = off)")
+    ap.add_argument("--no-store", action="store_true",
+                    help=f"ignore portal submissions in {WILLINGNESS_DB}")
+    ap.add_argument("--quiet", action="store_true", help="only print the final summary")
+    a = ap.parse_args(argv)
+
+    files = RunFiles(a.dir, a.out)
+    if a.out:
+        os.makedirs(a.out, exist_ok=True)
+    try:
+        alloc, _, slotdf, _ = run_optimizer(
+            files, load_willingness(files, store=not a.no_store), solver=a.solver,
+            time_limit=a.time_limit, workers=a.workers, starts=a.starts, seed=a.seed,
+            local_search=a.local_search, log=(lambda m="": None) if a.quiet else print)
+    except RuntimeError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    unmet = int((~slotdf["Status"].str.startswith("✓")).sum())
+    print(f"{len(alloc)} duties, {unmet} unfilled slot(s) → {files.final_alloc}, {files.report}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
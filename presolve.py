@@ -0,0 +1,203 @@
+"""
+Pre-solve check
+===============
+Supply vs demand before the optimizer runs, so shortfalls show up in
+milliseconds instead of as "⚠ Unfillable" lines at the end of a run:
+
+  * per exam date: seats against the faculty who may sit them under the
+    unrelaxed rules (duty type, valuation date, Saturday → TA/RA, one duty
+    per date).  Seats on a date only differ by duty type, so Hall's
+    condition over {Online}, {Offline}, {both} gives the exact shortfall
+  * across dates: one max flow (quota → faculty-date → date-type seats)
+    bounds how many seats the full rules can fill at all
+  * per duty type: seats against the total quota of faculty allowed that
+    type — a shortfall here survives every Slot Completion relaxation
+
+Every shortfall reported is a lower bound: no solver can fill those seats.
+"""
+
+import time
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from duty_engine import DESIG_RULES, DUTY_TYPES, SAT_DESIG
+
+try:
+    from ortools.graph.python import max_flow
+    MAXFLOW_OK = True
+except ImportError:
+    MAXFLOW_OK = False
+
+
+def _demand(slots):
+    """{(date, type): seats}"""
+    seats = defaultdict(int)
+    for sl in slots:
+        seats[(sl["date"], sl["type"])] += sl["required"]
+    return seats
+
+
+def _type_masks(names, fac_d):
+    allow = np.array([[tp in DESIG_RULES[fac_d[n]][2] for tp in DUTY_TYPES] for n in names],
+                     dtype=bool).reshape(len(names), len(DUTY_TYPES))
+    return allow[:, DUTY_TYPES.index("Online")], allow[:, DUTY_TYPES.index("Offline")]
+
+
+def date_shortfalls(names, fac_d, slots, fac_val_dates):
+    """One row per exam date: Online / Offline seats, eligible faculty and
+    the Hall shortfall, with the condition that binds."""
+    on, off = _type_masks(names, fac_d)
+    sat     = np.array([fac_d[n] in SAT_DESIG for n in names], dtype=bool)
+    val_ix  = defaultdict(list)
+    for i, n in enumerate(names):
+        for d in fac_val_dates.get(n, ()):
+            val_ix[d].append(i)
+    seats = _demand(slots)
+    rows  = []
+    for d in sorted({d for d, _ in seats}):
+        avail = np.ones(len(names), dtype=bool)
+        avail[val_ix.get(d, [])] = False
+        if d.weekday() == 5:
+            avail &= sat
+        a = int((avail & on & ~off).sum())        # Online only (P)
+        b = int((avail & off & ~on).sum())        # Offline only
+        c = int((avail & on & off).sum())         # either (ACP)
+        d_on, d_off = seats.get((d, "Online"), 0), seats.get((d, "Offline"), 0)
+        short = {"Online": d_on - (a + c), "Offline": d_off - (b + c),
+                 "Total": d_on + d_off - (a + b + c)}
+        worst = max(short, key=short.get)
+        rows.append({"Date": d, "Online_Seats": d_on, "Offline_Seats": d_off,
+                     "Online_Faculty": a + c, "Offline_Faculty": b + c,
+                     "On_Valuation": len(set(val_ix.get(d, []))),
+                     "Short": max(0, short[worst]),
+                     "Binding": worst if short[worst] > 0 else ""})
+    return pd.DataFrame(rows, columns=["Date", "Online_Seats", "Offline_Seats", "Online_Faculty",
+                                       "Offline_Faculty", "On_Valuation", "Short", "Binding"])
+
+
+def type_shortfalls(names, fac_d, slots, acp_limit=1):
+    """Seats per duty type against the quota of everyone allowed it (ACP:
+    ``acp_limit`` per type) — what even the most relaxed pass cannot fill."""
+    seats = defaultdict(int)
+    for sl in slots:
+        seats[sl["type"]] += sl["required"]
+    cap = defaultdict(int)
+    for n in names:
+        quota, types = DESIG_RULES[fac_d[n]][1], DESIG_RULES[fac_d[n]][2]
+        for tp in types:
+            cap[tp] += acp_limit if fac_d[n] == "ACP" else quota
+    return pd.DataFrame([{"Type": tp, "Seats": seats[tp], "Capacity": cap[tp],
+                          "Short": max(0, seats[tp] - cap[tp])}
+                         for tp in DUTY_TYPES if seats[tp]],
+                        columns=["Type", "Seats", "Capacity", "Short"])
+
+
+def fill_bound(names, fac_d, slots, fac_val_dates, acp_limit=1):
+    """Max flow  source → faculty (quota) → [ACP: type (limit)] → faculty-date
+    (1) → date-type (seats) → sink.  Returns the most seats the unrelaxed
+    rules can fill, or None without OR-Tools.  ACP type chains get separate
+    date nodes, so the bound is never too low."""
+    if not MAXFLOW_OK or not slots:
+        return None
+    seats = _demand(slots)
+    cells = sorted(seats)
+    dates = sorted({d for d, _ in cells})
+    didx  = {d: j for j, d in enumerate(dates)}
+    nf, nd = len(names), len(dates)
+    on, off = _type_masks(names, fac_d)
+    desig = [fac_d[n] for n in names]
+    quota = np.array([DESIG_RULES[g][1] for g in desig], dtype=np.int64)
+    acp   = np.array([g == "ACP" for g in desig], dtype=bool)
+    sat   = np.array([g in SAT_DESIG for g in desig], dtype=bool)
+
+    # Faculty × date availability (valuation dates, Saturdays)
+    avail = np.ones((nf, nd), dtype=bool)
+    for i, n in enumerate(names):
+        for d in fac_val_dates.get(n, ()):
+            if d in didx:
+                avail[i, didx[d]] = False
+    is_sat = np.array([d.weekday() == 5 for d in dates], dtype=bool)
+    avail[np.ix_(~sat, is_sat)] = False
+
+    # Node ids: source, sink, faculty, ACP type nodes, date-type cells, gadgets
+    S, T, fac0 = 0, 1, 2
+    acp_ix   = np.flatnonzero(acp)
+    type0    = fac0 + nf
+    acp_pos  = np.full(nf, -1, dtype=np.int64)
+    acp_pos[acp_ix] = np.arange(len(acp_ix))
+    cell0    = type0 + 2 * len(acp_ix)
+    cell_of  = {k: cell0 + j for j, k in enumerate(cells)}
+    gad0     = cell0 + len(cells)
+
+    # (parent, faculty-date gadget, cell) per eligible faculty × date × type;
+    # the gadget is shared by both types except on an ACP's type chains
+    par, gk, cell = [], [], []
+    for t, tp in enumerate(DUTY_TYPES):
+        allowed = on if tp == "Online" else off
+        tcells  = np.array([cell_of.get((d, tp), -1) for d in dates], dtype=np.int64)
+        fi, dj  = np.nonzero(avail & allowed[:, None] & (tcells >= 0)[None, :])
+        par.append(np.where(acp[fi], type0 + 2 * acp_pos[fi] + t, fac0 + fi))
+        gk.append(np.where(acp[fi], (nf + 2 * acp_pos[fi] + t) * nd, fi * nd) + dj)
+        cell.append(tcells[dj])
+    par, gk, cell = (np.concatenate(x) for x in (par, gk, cell))
+    gkeys, g = np.unique(gk, return_inverse=True)
+    first    = np.unique(g, return_index=True)[1]
+
+    tail = [np.full(nf, S), np.repeat(fac0 + acp_ix, 2), par[first], gad0 + g,
+            [cell_of[k] for k in cells]]
+    head = [fac0 + np.arange(nf), type0 + np.arange(2 * len(acp_ix)), gad0 + np.arange(len(gkeys)),
+            cell, np.full(len(cells), T)]
+    cap  = [quota, np.full(2 * len(acp_ix), acp_limit), np.ones(len(gkeys)), np.ones(len(g)),
+            [seats[k] for k in cells]]
+    tail, head, cap = (np.concatenate([np.asarray(x, dtype=np.int64) for x in p])
+                       for p in (tail, head, cap))
+
+    mf = max_flow.SimpleMaxFlow()
+    mf.add_arcs_with_capacity(tail, head, cap)
+    if mf.solve(S, T) != mf.OPTIMAL:
+        return None
+    return int(mf.optimal_flow())
+
+
+def analyze(names, fac_d, slots, fac_val_dates):
+    """Everything above in one dict: seats, fill bound, shortfalls, timing."""
+    t0      = time.perf_counter()
+    names   = list(dict.fromkeys(names))
+    by_date = date_shortfalls(names, fac_d, slots, fac_val_dates)
+    by_type = type_shortfalls(names, fac_d, slots)
+    seats   = sum(sl["required"] for sl in slots)
+    bound   = fill_bound(names, fac_d, slots, fac_val_dates)
+    return {"seats":     seats,
+            "fill_bound": bound,
+            "short":     seats - bound if bound is not None else int(by_date["Short"].sum()),
+            "by_date":   by_date,
+            "by_type":   by_type,
+            "ms":        round((time.perf_counter() - t0) * 1000, 1)}
+
+
+def log_report(rep, log, limit=15):
+    """Run-log lines for analyze()'s result."""
+    bound = rep["fill_bound"]
+    log(f"  Pre-solve check    : {rep['seats']} seats | "
+        + (f"≤{bound} fillable under full rules" if bound is not None else "no max-flow (OR-Tools)")
+        + f" | {rep['ms']:.0f} ms")
+    short = rep["by_date"][rep["by_date"]["Short"] > 0]
+    if len(short):
+        log(f"  ⚠ Short dates (full rules): {len(short)} date(s), "
+            f"{int(short['Short'].sum())} seat(s) — relaxations may recover some:")
+        for r in short.head(limit).itertuples():
+            log(f"      {r.Date.strftime('%d-%m-%Y %a')}  short {r.Short}  ({r.Binding}: "
+                f"{r.Online_Seats} online / {r.Offline_Seats} offline seats, "
+                f"{r.Online_Faculty} / {r.Offline_Faculty} faculty free)")
+        if len(short) > limit:
+            log(f"      … {len(short) - limit} more")
+    if bound is not None and rep["short"] > short["Short"].sum():
+        log(f"  ⚠ Quotas across dates: at least {rep['short']} seat(s) cannot be filled "
+            f"without relaxation")
+    for r in rep["by_type"][rep["by_type"]["Short"] > 0].itertuples():
+        log(f"  ⚠ {r.Type}: {r.Seats} seats > {r.Capacity} duty capacity — "
+            f"{r.Short} seat(s) unfillable even with every relaxation")
+    if rep["short"] == 0 and rep["by_type"]["Short"].sum() == 0:
+        log("  ✓ Every seat can be filled under the full rules")
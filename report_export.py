@@ -0,0 +1,108 @@
+"""
+Report export
+=============
+Streaming writers for the optimizer's output workbooks.
+
+  * openpyxl write-only mode — rows go straight to the zip stream, so
+    memory stays flat however many allocations there are
+  * the allocation frame is converted to plain row tuples once and shared
+    by Final_Allocation.xlsx and the Full_Allocation report sheet
+  * each workbook is written to a temp file and moved into place, so the
+    portal never reads a half-written file
+  * optional Parquet (pyarrow) or CSV sidecar for machine consumers
+"""
+
+import os
+import threading
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, Side
+
+try:
+    import pyarrow  # noqa: F401  (pandas' parquet engine)
+    PYARROW_OK = True
+except ImportError:
+    PYARROW_OK = False
+
+_THIN = Side(style="thin")
+HEADER_FONT   = Font(bold=True)
+HEADER_BORDER = Border(left=_THIN, right=_THIN, top=_THIN, bottom=_THIN)
+HEADER_ALIGN  = Alignment(horizontal="center", vertical="top")
+
+
+def frame_rows(df):
+    """Header + row tuples with NaN → None (blank cell), as to_excel writes them."""
+    if df.isna().values.any():
+        df = df.astype(object).where(df.notna(), None)
+    return list(df.columns), list(df.itertuples(index=False, name=None))
+
+
+def write_xlsx(path, sheets):
+    """Write [(sheet_name, (header, rows))] to ``path`` in write-only mode."""
+    wb = Workbook(write_only=True)
+    for name, (header, rows) in sheets:
+        ws = wb.create_sheet(title=name)
+        cells = []
+        for h in header:
+            c = WriteOnlyCell(ws, value=str(h))
+            c.font, c.border, c.alignment = HEADER_FONT, HEADER_BORDER, HEADER_ALIGN
+            cells.append(c)
+        ws.append(cells)
+        for r in rows:
+            ws.append(r)
+    tmp = f"{path}.tmp"
+    wb.save(tmp)
+    os.replace(tmp, path)
+
+
+def sidecar_path(path, fmt):
+    return os.path.splitext(path)[0] + (".parquet" if fmt == "parquet" else ".csv")
+
+
+def write_sidecar(df, path, fmt):
+    """Machine-readable copy of ``df``; Parquet falls back to CSV without pyarrow."""
+    if fmt == "parquet" and not PYARROW_OK:
+        fmt = "csv"
+    out = sidecar_path(path, fmt)
+    tmp = f"{out}.tmp"
+    if fmt == "parquet":
+        df.to_parquet(tmp, index=False)
+    else:
+        df.to_csv(tmp, index=False)
+    os.replace(tmp, out)
+    return out
+
+
+def export_allocation(alloc, report_sheets, final_path, report_path,
+                      sidecar=None, threads=False):
+    """Write Final_Allocation + Allocation_Report (+ sidecar).
+
+    ``report_sheets`` is [(sheet_name, df)]; the allocation is appended as
+    the Full_Allocation sheet. With ``threads`` the two workbooks (and the
+    sidecar) are written concurrently. Returns the sidecar path, if any.
+    """
+    alloc_rows = frame_rows(alloc)
+    report     = [(n, frame_rows(df)) for n, df in report_sheets] + [("Full_Allocation", alloc_rows)]
+    jobs = [lambda: write_xlsx(final_path, [("Sheet1", alloc_rows)]),
+            lambda: write_xlsx(report_path, report)]
+    if sidecar:
+        jobs.append(lambda: write_sidecar(alloc, final_path, sidecar))
+
+    results, errors = [None] * len(jobs), []
+    def run(i):
+        try:
+            results[i] = jobs[i]()
+        except Exception as e:          # re-raised on the caller's thread
+            errors.append(e)
+
+    if threads:
+        workers = [threading.Thread(target=run, args=(i,)) for i in range(len(jobs))]
+        for t in workers: t.start()
+        for t in workers: t.join()
+    else:
+        for i in range(len(jobs)):
+            run(i)
+    if errors:
+        raise errors[0]
+    return results[2] if sidecar else None
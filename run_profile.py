@@ -0,0 +1,93 @@
+"""
+Run profile
+===========
+Per-stage wall time, CPU time and peak memory for one optimizer run,
+saved as a JSON run record next to Allocation_Report.xlsx:
+
+  * ``with prof.stage("greedy pass 1"):`` times a block; ``prof.lap(name)``
+    closes a stage running since the previous lap, for straight-line code;
+    ``record`` adds a stage measured elsewhere (e.g. inside an engine loop)
+  * CPU time is this process's user+system time, so a stage that waits on
+    a process pool shows wall ≫ CPU
+  * memory is the process peak RSS after each stage (``resource``, Unix
+    only) — it only ever rises, so the stage where it jumps is the one
+    that allocated
+  * NULL_PROFILE stands in when nobody is listening
+"""
+
+import datetime
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+
+try:
+    import resource
+    RESOURCE_OK = True
+except ImportError:                 # Windows
+    RESOURCE_OK = False
+
+
+def peak_rss_mb():
+    if not RESOURCE_OK:
+        return None
+    kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(kb / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class RunProfile:
+    def __init__(self, **meta):
+        self.meta   = {"started": datetime.datetime.now().isoformat(timespec="seconds"), **meta}
+        self.stages = []
+        self._t0    = (time.perf_counter(), time.process_time())
+        self._lap   = self._t0
+
+    @contextmanager
+    def stage(self, name):
+        w, c = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - w, time.process_time() - c)
+
+    def lap(self, name=None):
+        """Record the stage since the previous lap as ``name`` (None: just reset)."""
+        now = (time.perf_counter(), time.process_time())
+        if name:
+            self.record(name, now[0] - self._lap[0], now[1] - self._lap[1])
+        self._lap = now
+
+    def record(self, name, wall, cpu=None, **extra):
+        self.stages.append({"stage": name, "wall_s": round(wall, 4),
+                            "cpu_s": None if cpu is None else round(cpu, 4),
+                            "peak_rss_mb": peak_rss_mb(), **extra})
+
+    def to_dict(self, **meta):
+        w, c = self._t0
+        return {**self.meta, **meta,
+                "finished":    datetime.datetime.now().isoformat(timespec="seconds"),
+                "wall_s":      round(time.perf_counter() - w, 3),
+                "cpu_s":       round(time.process_time() - c, 3),
+                "peak_rss_mb": peak_rss_mb(),
+                "stages":      self.stages}
+
+    def save(self, path, **meta):
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.to_dict(**meta), f, indent=1, default=str)
+        os.replace(tmp, path)
+
+
+class _NullProfile:
+    def stage(self, name):
+        return nullcontext()
+
+    def lap(self, name=None):
+        pass
+
+    def record(self, *args, **kwargs):
+        pass
+
+
+NULL_PROFILE = _NullProfile()
@@ -0,0 +1,35 @@
+import os
+
+import pytest
+
+from .support import ROOT  # noqa: F401  (puts the repo and benchmarks/ on sys.path)
+
+import input_cache
+from synth import generate
+
+FACULTY = 150      # big enough for contested slots, small enough to run in about a second
+
+
+@pytest.fixture(autouse=True)
+def _input_cache(tmp_path, monkeypatch):
+    """Keep the Arrow input cache out of the working directory."""
+    monkeypatch.setattr(input_cache, "CACHE_DIR", str(tmp_path / ".input_cache"))
+
+
+@pytest.fixture(scope="session")
+def dataset(tmp_path_factory):
+    folder = str(tmp_path_factory.mktemp("synth"))
+    generate(FACULTY, folder, seed=5)
+    return folder
+
+
+@pytest.fixture(scope="session")
+def school_dataset(tmp_path_factory):
+    folder = str(tmp_path_factory.mktemp("synth-schools"))
+    generate(FACULTY, folder, seed=5, schools=2)
+    return folder
+
+
+@pytest.fixture
+def out(tmp_path):
+    return os.path.join(tmp_path, "out")
@@ -0,0 +1,91 @@
+"""
+Test support
+============
+Runs the headless optimizer on a synthetic dataset (benchmarks/synth.py)
+and checks an allocation against the duty rules:
+
+  * every row: duty type allowed for the designation, ACP at most one
+    duty per type, nobody over quota
+  * rows without a relaxation tag (everything but Gap-Fill-R2..R4) also
+    keep the unrelaxed rules — no valuation date, Saturday only TA/RA,
+    one duty per date
+"""
+
+import collections
+import os
+import sys
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "benchmarks")]
+
+from duty_engine import DESIG_RULES, SAT_DESIG  # noqa: E402
+from optimizer import RunFiles, load_registry, parse_duty_file, run_optimizer  # noqa: E402
+
+# Relax level each Gap-Fill tag was allowed to break (see CompletionEngine)
+RELAXED = {"Gap-Fill-R2": 1, "Gap-Fill-R3": 2, "Gap-Fill-R4": 3}
+
+
+def _quiet(m=""):
+    pass
+
+
+def run(folder, out, **opts):
+    """run_optimizer on ``folder``'s inputs, outputs in ``out``."""
+    os.makedirs(out, exist_ok=True)
+    return run_optimizer(RunFiles(folder, out), log=_quiet, **opts)
+
+
+def inputs(folder):
+    """(registry, slots) as run_optimizer sees them."""
+    files = RunFiles(folder)
+    return (load_registry(files.faculty),
+            parse_duty_file(files.offline, "Offline") + parse_duty_file(files.online, "Online"))
+
+
+def duties(alloc):
+    """Allocation as a sorted list of (name, date, session, type) tuples."""
+    return sorted(alloc[["Name", "Date", "Session", "Type"]].itertuples(index=False, name=None))
+
+
+def violations(alloc, reg):
+    """Human-readable rule breaks in ``alloc`` (a Final_Allocation frame)."""
+    fac_d, out = reg.fac_d, []
+    dates  = pd.to_datetime(alloc["Date"], format="%d-%m-%Y").dt.date
+    relax  = alloc["Allocated_By"].map(RELAXED).fillna(0)
+    per_day, acp_types = collections.Counter(), collections.Counter()
+    for n, d, tp, lvl in zip(alloc["Name"], dates, alloc["Type"], relax):
+        desig = fac_d[n]
+        if tp not in DESIG_RULES[desig][2]:
+            out.append(f"{n}: {tp} duty for {desig}")
+        if desig == "ACP":
+            acp_types[(n, tp)] += 1
+        if lvl < 3 and d in reg.val_dates.get(n, ()):
+            out.append(f"{n}: duty on valuation date {d}")
+        if lvl < 2 and d.weekday() == 5 and desig not in SAT_DESIG:
+            out.append(f"{n}: Saturday duty for {desig}")
+        if lvl < 1:
+            per_day[(n, d)] += 1
+    out += [f"{n}: {c} duties on {d}" for (n, d), c in per_day.items() if c > 1]
+    out += [f"{n}: {c} ACP {tp} duties" for (n, tp), c in acp_types.items() if c > 1]
+    for n, c in alloc["Name"].value_counts().items():
+        if c > DESIG_RULES[fac_d[n]][1]:
+            out.append(f"{n}: {c} duties over quota {DESIG_RULES[fac_d[n]][1]}")
+    return out
+
+
+def strict_seats(alloc, slots):
+    """Seats covered by rows that keep the unrelaxed rules."""
+    strict = alloc[~alloc["Allocated_By"].isin(RELAXED)]
+    held   = collections.Counter(zip(pd.to_datetime(strict["Date"], format="%d-%m-%Y").dt.date,
+                                     strict["Session"], strict["Type"]))
+    need   = collections.Counter()
+    for sl in slots:
+        need[(sl["date"], sl["session"], sl["type"])] += sl["required"]
+    return sum(min(held[k], q) for k, q in need.items())
+
+
+def gaps(slotdf):
+    """Unfilled seats according to Slot_Verification."""
+    return int((slotdf["Required"] - slotdf["Assigned"]).clip(lower=0).sum())
@@ -0,0 +1,34 @@
+import pandas as pd
+import pytest
+
+import duty_engine
+from duty_engine import EXACT_BACKENDS, merge_slots, solve_assignments
+from optimizer import RunFiles, load_willingness
+
+from .support import gaps, inputs, run, violations
+
+
+def test_greedy_keeps_the_rules(dataset, out):
+    alloc, _, _, _ = run(dataset, out)
+    reg, _ = inputs(dataset)
+    assert violations(alloc, reg) == []
+
+
+@pytest.mark.skipif(not EXACT_BACKENDS, reason="needs OR-Tools or SciPy")
+def test_exact_keeps_the_rules_and_never_loses_seats(dataset, out, tmp_path):
+    greedy = run(dataset, str(tmp_path / "greedy"))
+    alloc, _, slotdf, _ = run(dataset, out, solver="exact", time_limit=10, workers=1)
+    reg, _ = inputs(dataset)
+    assert violations(alloc, reg) == []
+    assert gaps(slotdf) <= gaps(greedy[2])
+
+
+def test_exact_without_backend_keeps_greedy(dataset, monkeypatch):
+    reg, slots = inputs(dataset)
+    wdf = load_willingness(RunFiles(dataset))
+    wdf["Date"] = pd.to_datetime(wdf["Date"], format="%d-%m-%Y")
+    monkeypatch.setattr(duty_engine, "EXACT_BACKENDS", [])
+    rows, _, method = solve_assignments(
+        [r.name for r in reg.records], reg.fac_d, merge_slots(slots), wdf, reg.val_dates, set(),
+        solver="exact", log=lambda m="": None)
+    assert method == "Greedy + Slot Completion" and rows
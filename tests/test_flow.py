@@ -0,0 +1,21 @@
+import pytest
+
+from duty_engine import FLOW_OK
+
+from .support import duties, inputs, run, violations
+
+pytestmark = pytest.mark.skipif(not FLOW_OK, reason="needs OR-Tools")
+
+
+@pytest.mark.parametrize("data", ["dataset", "school_dataset"])
+def test_keeps_the_rules(data, out, request):
+    folder = request.getfixturevalue(data)
+    alloc, _, _, _ = run(folder, out, solver="flow")
+    reg, _ = inputs(folder)
+    assert violations(alloc, reg) == []          # incl. no ACP same-date clash left behind
+
+
+def test_deterministic(dataset, tmp_path):
+    a = run(dataset, str(tmp_path / "a"), solver="flow")
+    b = run(dataset, str(tmp_path / "b"), solver="flow")
+    assert duties(a[0]) == duties(b[0])
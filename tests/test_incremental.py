@@ -0,0 +1,26 @@
+import pytest
+
+from optimizer import RunFiles, load_willingness
+
+from .support import duties, inputs, run, violations
+
+
+@pytest.mark.parametrize("data", ["dataset", "school_dataset"])
+def test_unchanged_inputs_reproduce_the_allocation(data, out, request):
+    folder = request.getfixturevalue(data)
+    base   = run(folder, out)
+    again  = run(folder, out, solver="incremental")
+    assert duties(again[0]) == duties(base[0])
+
+
+@pytest.mark.parametrize("data", ["dataset", "school_dataset"])
+def test_only_changed_faculty_are_reshuffled(data, out, request):
+    folder = request.getfixturevalue(data)
+    wdf    = load_willingness(RunFiles(folder))
+    who    = wdf["Faculty"].iloc[0]
+    base   = run(folder, out)
+    inc, _, _, _ = run(folder, out, solver="incremental", will_df=wdf[wdf["Faculty"] != who])
+    reg, _ = inputs(folder)
+    assert violations(inc, reg) == []
+    kept = {d for d in duties(base[0]) if d[0] != who}
+    assert kept <= set(duties(inc))
@@ -0,0 +1,30 @@
+import pytest
+
+from duty_engine import WILL_TAGS
+
+from .support import duties, gaps, inputs, run, violations
+
+
+@pytest.mark.parametrize("data", ["dataset", "school_dataset"])
+def test_improves_matches_without_breaking_rules(data, tmp_path, request):
+    folder = request.getfixturevalue(data)
+    before = run(folder, str(tmp_path / "off"))
+    after  = run(folder, str(tmp_path / "on"), local_search=2)
+    reg, _ = inputs(folder)
+    assert violations(after[0], reg) == []
+    assert gaps(after[2]) <= gaps(before[2])
+    assert after[0]["Name"].value_counts().to_dict() == before[0]["Name"].value_counts().to_dict()
+    assert (after[0]["Allocated_By"].isin(WILL_TAGS).sum()
+            >= before[0]["Allocated_By"].isin(WILL_TAGS).sum())
+
+
+def test_same_sweeps_same_allocation(dataset, tmp_path):
+    a = run(dataset, str(tmp_path / "a"), local_search=2)
+    b = run(dataset, str(tmp_path / "b"), local_search=2)
+    assert duties(a[0]) == duties(b[0])
+
+
+def test_off_by_default(dataset, tmp_path):
+    a = run(dataset, str(tmp_path / "a"))
+    b = run(dataset, str(tmp_path / "b"), local_search=0)
+    assert duties(a[0]) == duties(b[0])
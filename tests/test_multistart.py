@@ -0,0 +1,33 @@
+import pandas as pd
+
+from duty_engine import merge_slots, solve_assignments
+from optimizer import RunFiles, load_willingness
+
+from .support import duties, gaps, inputs, run, violations
+
+
+def test_keeps_the_rules_and_never_loses_to_greedy(dataset, out, tmp_path):
+    greedy = run(dataset, str(tmp_path / "greedy"))
+    alloc, _, slotdf, _ = run(dataset, out, solver="multistart", starts=4, seed=3)
+    reg, _ = inputs(dataset)
+    assert violations(alloc, reg) == []
+    assert gaps(slotdf) <= gaps(greedy[2])
+
+
+def test_same_seed_same_allocation(dataset, tmp_path):
+    a = run(dataset, str(tmp_path / "a"), solver="multistart", starts=4, seed=3)
+    b = run(dataset, str(tmp_path / "b"), solver="multistart", starts=4, seed=3)
+    assert duties(a[0]) == duties(b[0])
+
+
+def test_pool_size_does_not_change_the_result(dataset):
+    reg, slots = inputs(dataset)
+    wdf = load_willingness(RunFiles(dataset))
+    wdf["Date"] = pd.to_datetime(wdf["Date"], format="%d-%m-%Y")
+    names   = [r.name for r in reg.records]
+    non_sub = set(names) - set(wdf["Faculty"])
+    runs = [solve_assignments(names, reg.fac_d, merge_slots(slots), wdf, reg.val_dates, non_sub,
+                              solver="multistart", starts=4, seed=3, processes=procs,
+                              log=lambda m="": None)[0]
+            for procs in (1, 2)]
+    assert runs[0] == runs[1]
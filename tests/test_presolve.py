@@ -0,0 +1,43 @@
+import datetime
+
+import pytest
+
+from duty_engine import EXACT_BACKENDS, FLOW_OK
+from presolve import MAXFLOW_OK, analyze
+
+from .support import gaps, inputs, run, strict_seats
+
+MONDAY, SATURDAY = datetime.date(2025, 5, 5), datetime.date(2025, 5, 10)
+
+MODES = {"greedy": {}, "multistart": {"solver": "multistart", "starts": 3},
+         "local-search": {"local_search": 1}}
+if FLOW_OK:
+    MODES["flow"] = {"solver": "flow"}
+if EXACT_BACKENDS:
+    MODES["exact"] = {"solver": "exact", "time_limit": 10, "workers": 1}
+
+
+def _slot(d, tp, n, session="FN"):
+    return {"date": d, "session": session, "required": n, "type": tp, "school": ""}
+
+
+def test_date_shortfall_counts_valuation_and_saturday():
+    fac_d = {"a": "SAP", "b": "SAP", "c": "TA", "p": "P"}
+    slots = [_slot(MONDAY, "Offline", 5), _slot(SATURDAY, "Offline", 2), _slot(MONDAY, "Online", 1)]
+    rep   = analyze(list(fac_d), fac_d, slots, {"a": {MONDAY}})
+    by    = rep["by_date"].set_index("Date")
+    assert by.loc[MONDAY, "Short"] == 3 and by.loc[MONDAY, "Binding"] == "Offline"
+    assert by.loc[SATURDAY, "Short"] == 1                 # only the TA may sit it
+    if MAXFLOW_OK:
+        assert rep["fill_bound"] == 2 + 1 + 1 and rep["short"] == 4
+
+
+@pytest.mark.skipif(not MAXFLOW_OK, reason="needs OR-Tools")
+@pytest.mark.parametrize("mode", MODES)
+def test_fill_bound_holds_for_every_solver(dataset, tmp_path, mode):
+    reg, slots = inputs(dataset)
+    rep = analyze([r.name for r in reg.records], reg.fac_d, slots, reg.val_dates)
+    alloc, _, slotdf, _ = run(dataset, str(tmp_path / "out"), **MODES[mode])
+    assert strict_seats(alloc, slots) <= rep["fill_bound"] <= rep["seats"]
+    assert rep["by_date"]["Short"].sum() <= rep["short"]
+    assert rep["by_type"]["Short"].sum() <= gaps(slotdf)
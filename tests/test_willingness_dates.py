@@ -0,0 +1,26 @@
+import datetime
+
+import pandas as pd
+
+from optimizer import RunFiles, load_willingness, parse_dates
+
+from . import support  # noqa: F401
+
+
+def test_iso_strings_are_not_read_day_first():
+    # str() of an Excel datetime is ISO; day-first parsing turned 8 May into 5 Aug
+    got = parse_dates(pd.Series(["2025-05-08 00:00:00", "2025-05-13", "08-05-2025", "13/05/2025"]))
+    assert got.dt.date.tolist() == [datetime.date(2025, 5, 8), datetime.date(2025, 5, 13),
+                                    datetime.date(2025, 5, 8), datetime.date(2025, 5, 13)]
+
+
+def test_excel_date_cells_survive_loading_and_the_cache(tmp_path):
+    pd.DataFrame({"Faculty": ["Dr. A", "Dr. B", "Dr. C"],
+                  "Date":    [pd.Timestamp("2025-05-08"), pd.Timestamp("2025-05-13"), "09-05-2025"],
+                  "Session": ["FN", "Afternoon", "fn"]}).to_excel(tmp_path / "Willingness.xlsx",
+                                                                 index=False)
+    files = RunFiles(str(tmp_path))
+    for _ in range(2):                                  # parsed, then served from the cache
+        df = load_willingness(files, store=False).sort_values("Faculty")
+        assert df["Date"].tolist() == ["08-05-2025", "13-05-2025", "09-05-2025"]
+        assert df["Session"].tolist() == ["FN", "AN", "FN"]
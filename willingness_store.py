@@ -0,0 +1,166 @@
+"""
+Willingness store
+=================
+Durable, concurrency-safe storage for willingness submitted through the
+portal.  Backed by SQLite in WAL mode so many faculty can submit at once
+while the admin and optimizer read:
+
+  * one transaction per submission — a faculty's rows are replaced
+    atomically (per-faculty upsert), never half-written
+  * primary key (faculty_clean, date, session) doubles as the by-faculty
+    index; a second index serves (date, session) lookups
+  * a revision counter bumps on every write so readers can cache frames
+  * applicants per (date, session, duty type) are kept in ``slot_demand``
+    and adjusted inside the same transaction as each upsert
+"""
+
+import datetime
+import sqlite3
+import time
+from contextlib import closing
+
+import pandas as pd
+
+COLUMNS = ["Faculty", "Date", "Session"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS willingness (
+    faculty_clean TEXT NOT NULL,
+    faculty       TEXT NOT NULL,
+    date          TEXT NOT NULL,          -- ISO yyyy-mm-dd
+    session       TEXT NOT NULL,
+    submitted_at  REAL NOT NULL,
+    duty_type     TEXT NOT NULL DEFAULT 'Offline',
+    PRIMARY KEY (faculty_clean, date, session)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_willingness_slot ON willingness (date, session);
+CREATE TABLE IF NOT EXISTS slot_demand (
+    date          TEXT NOT NULL,
+    session       TEXT NOT NULL,
+    duty_type     TEXT NOT NULL,
+    applicants    INTEGER NOT NULL,
+    PRIMARY KEY (date, session, duty_type)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO meta VALUES ('revision', 0);
+"""
+
+
+def clean_name(x):
+    return str(x).strip().lower()
+
+
+class WillingnessStore:
+    def __init__(self, path):
+        self.path = path
+        with closing(self._connect()) as conn:
+            tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            if not {"willingness", "slot_demand", "meta"} <= tables:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(_SCHEMA)
+            cols  = {r[1] for r in conn.execute("PRAGMA table_info(willingness)")}
+            stale = (conn.execute("SELECT 1 FROM slot_demand LIMIT 1").fetchone() is None
+                     and conn.execute("SELECT 1 FROM willingness LIMIT 1").fetchone() is not None)
+        # Opening is read-only unless the store predates slot_demand: then
+        # the column is added and the counters rebuilt, once
+        if "duty_type" not in cols:
+            def migrate(conn):
+                conn.execute("ALTER TABLE willingness ADD COLUMN duty_type TEXT NOT NULL "
+                             "DEFAULT 'Offline'")
+                self._rebuild_demand(conn)
+            self._write(migrate)
+        elif stale:
+            self._write(self._rebuild_demand)
+
+    def _connect(self):
+        # One short-lived connection per call: safe across Streamlit's
+        # per-session threads and worker processes.
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA busy_timeout=30000")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _write(self, fn):
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            fn(conn)
+            conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'revision'")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _rebuild_demand(conn):
+        conn.execute("DELETE FROM slot_demand")
+        conn.execute("INSERT INTO slot_demand SELECT date, session, duty_type, COUNT(*) "
+                     "FROM willingness GROUP BY date, session, duty_type")
+
+    # ── Writes ────────────────────────────────────────────────────
+    def upsert(self, faculty, slots, duty_type="Offline"):
+        """Replace ``faculty``'s submission with ``slots`` [(date, session)]."""
+        fc  = clean_name(faculty)
+        now = time.time()
+        keys = list(dict.fromkeys((pd.Timestamp(d).strftime("%Y-%m-%d"), str(s).strip().upper())
+                                  for d, s in slots))
+        rows = [(fc, str(faculty).strip(), d, s, now, duty_type) for d, s in keys]
+
+        def tx(conn):
+            conn.execute("UPDATE slot_demand SET applicants = applicants - 1 "
+                         "WHERE (date, session, duty_type) IN (SELECT date, session, duty_type "
+                         "FROM willingness WHERE faculty_clean = ?)", (fc,))
+            conn.execute("DELETE FROM willingness WHERE faculty_clean = ?", (fc,))
+            conn.executemany("INSERT INTO willingness (faculty_clean, faculty, date, session, "
+                             "submitted_at, duty_type) VALUES (?, ?, ?, ?, ?, ?)", rows)
+            conn.executemany("INSERT INTO slot_demand VALUES (?, ?, ?, 1) "
+                             "ON CONFLICT (date, session, duty_type) "
+                             "DO UPDATE SET applicants = applicants + 1",
+                             [(d, s, duty_type) for d, s in keys])
+        self._write(tx)
+
+    def clear(self):
+        def tx(conn):
+            conn.execute("DELETE FROM willingness")
+            conn.execute("DELETE FROM slot_demand")
+        self._write(tx)
+
+    # ── Reads ─────────────────────────────────────────────────────
+    def revision(self):
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()[0]
+
+    def _frame(self, sql, args=()):
+        with closing(self._connect()) as conn:
+            rows = conn.execute(sql, args).fetchall()
+        df = pd.DataFrame(rows, columns=COLUMNS)
+        df["Date"] = pd.to_datetime(df["Date"], format="%Y-%m-%d").dt.strftime("%d-%m-%Y")
+        return df
+
+    def frame(self):
+        return self._frame("SELECT faculty, date, session FROM willingness "
+                           "ORDER BY submitted_at, faculty_clean, date, session")
+
+    def for_faculty(self, faculty):
+        return self._frame("SELECT faculty, date, session FROM willingness "
+                           "WHERE faculty_clean = ? ORDER BY date, session",
+                           (clean_name(faculty),))
+
+    def at_slot(self, date, session):
+        return self._frame("SELECT faculty, date, session FROM willingness "
+                           "WHERE date = ? AND session = ?",
+                           (pd.Timestamp(date).strftime("%Y-%m-%d"), str(session).upper()))
+
+    def demand(self):
+        """{(date, session, duty_type): applicants} for every non-empty slot."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT date, session, duty_type, applicants "
+                                "FROM slot_demand WHERE applicants > 0").fetchall()
+        return {(datetime.date.fromisoformat(d), s, t): n for d, s, t, n in rows}
+
+    def has_faculty(self, faculty):
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT 1 FROM willingness WHERE faculty_clean = ? LIMIT 1",
+                                (clean_name(faculty),)).fetchone() is not None